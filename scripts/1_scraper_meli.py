@@ -1,26 +1,25 @@
 # Arquivo: scripts/1_scraper_meli.py (VERSÃO COMPLETA - COM E SEM PROMOÇÃO + % DE DESCONTO)
 
-import re
-import json
+import os
+import argparse
 import requests
 import time
-import random
-from io import BytesIO
-from PIL import Image
-from pathlib import Path
+from urllib.parse import urljoin
 
 # Importações do Selenium
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-def sanitize_filename(name, max_length=50):
-    cleaned = re.sub(r'[<>:"/\\|?*\n\r]+', '', name).strip()
-    return cleaned[:max_length]
+from core_scraper import JANELA_DUPLICADOS, AdaptadorSite, executar_site, montar_registro, verificar_bloqueio
+from resolver_links import eh_pagina_intermediaria_meli
+from dados_estruturados import extrair_estruturado_meli
+from parser_html import parse_html
+import metricas
+
+# Quantidade padrão de Chromes headless rodando em paralelo
+NUM_WORKERS_PADRAO = int(os.environ.get("MELI_WORKERS", "3"))
 
 def get_price_from_element(element):
     try:
@@ -31,128 +30,187 @@ def get_price_from_element(element):
         return None
     return f"R${fracao},{centavos}"
 
-def process_links_com_selenium():
-    print("--- INICIANDO ETAPA: Coleta de Dados do Mercado Livre (TODOS OS PRODUTOS) ---")
-    
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    LINKS_PATH = BASE_DIR / "input_links" / "promos_meli.txt"
-    IMAGES_PATH = BASE_DIR / "output" / "imagens_produtos"
-    OUTPUT_JSON_FILE = BASE_DIR / "output" / "mensagens_json" / "mensagens_meli.json"
+# -------------------------------------------------------------------
+# Caminho rápido: título, preço e imagem já vêm no HTML renderizado pelo
+# servidor, então uma requisição simples resolve a maioria dos produtos.
+# Retorna None quando não encontra preço, e aí o Chrome assume.
+# -------------------------------------------------------------------
+def get_price_from_tag(tag):
+    fracao = tag.select_one(".andes-money-amount__fraction")
+    if not fracao:
+        return None
+    centavos = tag.select_one(".andes-money-amount__cents")
+    return f"R${fracao.get_text(strip=True)},{centavos.get_text(strip=True) if centavos else '00'}"
+
+def extrair_via_http(url, session, prefixo="  "):
+    with metricas.etapa("navegar", via="http") as span:
+        try:
+            resp = session.get(url, allow_redirects=True, timeout=15)
+            verificar_bloqueio(resp.url, status=resp.status_code)
+            resp.raise_for_status()
+            soup = parse_html(resp.text)
+
+            # Página intermediária de afiliado: segue o link "Ir para produto"
+            if not soup.select_one(".ui-pdp-title"):
+                link = soup.find("a", string=lambda t: t and "Ir para produto" in t)
+                if link and link.get("href"):
+                    print(f"{prefixo}➡️  Página de afiliado encontrada. Seguindo link via HTTP...")
+                    resp = session.get(urljoin(resp.url, link["href"]), allow_redirects=True, timeout=15)
+                    verificar_bloqueio(resp.url, status=resp.status_code)
+                    resp.raise_for_status()
+                    soup = parse_html(resp.text)
+        except requests.RequestException as e:
+            span.resultado = type(e).__name__
+            print(f"{prefixo}ℹ️  Caminho HTTP falhou ({e}).")
+            return None
+
+    with metricas.etapa("extrair", via="http") as span:
+        dados = extrair_da_soup(soup)
+        if not dados:
+            span.resultado = "sem_dados"
+    return dados
+
+def extrair_do_dom(soup):
+    titulo = soup.select_one(".ui-pdp-title")
+    price_container = soup.select_one("div.ui-pdp-price__main-container")
+    if not titulo or not price_container:
+        return None
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    preco_de_tag = price_container.select_one("s.andes-money-amount")
+    preco_de = get_price_from_tag(preco_de_tag) if preco_de_tag else None
+    preco_tag = price_container.select_one(".ui-pdp-price__second-line .andes-money-amount") if preco_de else None
+    if not preco_tag:
+        preco_tag = price_container.select_one(".andes-money-amount:not(s)")
+    preco = get_price_from_tag(preco_tag) if preco_tag else None
+    if not preco:
+        return None
 
-    try:
-        urls = [u.strip() for u in LINKS_PATH.read_text(encoding="utf-8").splitlines() if u.strip()]
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo de links não encontrado em '{LINKS_PATH}'")
-        return
-
-    IMAGES_PATH.mkdir(exist_ok=True, parents=True)
-    OUTPUT_JSON_FILE.parent.mkdir(exist_ok=True, parents=True)
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    
-    service = Service(executable_path=str(BASE_DIR / "drivers" / "chromedriver.exe"))
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
+    img_el = soup.select_one(".ui-pdp-gallery__figure__image")
+    img_url = None
+    if img_el:
+        # Imagens fora da primeira dobra vêm com placeholder "data:" no src
+        candidatos = [img_el.get("data-zoom"), img_el.get("data-src"), img_el.get("src")]
+        img_url = next((c for c in candidatos if c and not c.startswith("data:")), None)
+
+    return {"nome": titulo.get_text(strip=True), "preco": preco, "preco_original": preco_de, "img_url": img_url}
+
+def extrair_da_soup(soup):
+    """Dados estruturados (estado pré-carregado/JSON-LD) primeiro; os
+    seletores do DOM completam o que faltar. O campo "fonte" diz de onde
+    vieram nome e preço, para o relatório."""
+    dados = extrair_estruturado_meli(soup)
+    if not (dados.get("nome") and dados.get("preco")):
+        dom = extrair_do_dom(soup)
+        if dom:
+            dom["fonte"] = "dom"
+        return dom
+
+    if not dados.get("preco_original_confiavel") or not dados.get("img_url"):
+        dom = extrair_do_dom(soup) or {}
+        if not dados.get("preco_original_confiavel"):
+            dados["preco_original"] = dados.get("preco_original") or dom.get("preco_original")
+        dados["img_url"] = dados.get("img_url") or dom.get("img_url")
+    return {"nome": dados["nome"], "preco": dados["preco"], "preco_original": dados.get("preco_original"),
+            "img_url": dados.get("img_url"), "fonte": "json"}
+
+def extrair_via_selenium(driver, url, prefixo="  ", verificar_intermediaria=True):
     wait = WebDriverWait(driver, 15)
-    resultados_finais = []
-    
-    for url in urls:
-        print(f"Processando: {url}")
-        try:
-            driver.get(url)
-            
+    with metricas.etapa("navegar", via="selenium"):
+        driver.get(url)
+
+        # Com o link já resolvido, não há página de afiliado para esperar
+        if verificar_intermediaria:
             try:
                 wait_curto = WebDriverWait(driver, 3)
                 ir_para_produto_botao = wait_curto.until(EC.element_to_be_clickable((By.LINK_TEXT, "Ir para produto")))
-                print("  ➡️  Página de afiliado encontrada. Clicando...")
+                print(f"{prefixo}➡️  Página de afiliado encontrada. Clicando...")
                 ir_para_produto_botao.click()
-                time.sleep(1) 
+                # Espera a página de afiliado sair de cena em vez de um sleep fixo
+                wait.until(EC.staleness_of(ir_para_produto_botao))
             except TimeoutException:
-                print("  ℹ️  Assumindo que já estamos na página final.")
-            
+                print(f"{prefixo}ℹ️  Assumindo que já estamos na página final.")
+
+        try:
             nome = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-title"))).text
-            
-            preco, preco_de = None, None
-            try:
-                price_container = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container")))
-                
-                short_wait = WebDriverWait(driver, 5)
-                preco_de_element = short_wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container s.andes-money-amount"))
-                )
-                preco_de = get_price_from_element(preco_de_element)
-                
-                preco_venda_element = price_container.find_element(By.CSS_SELECTOR, ".ui-pdp-price__second-line .andes-money-amount")
-                preco = get_price_from_element(preco_venda_element)
-
-            except (NoSuchElementException, TimeoutException):
-                print("  ℹ️  Preço original (riscado) não encontrado. Assumindo preço único.")
-                preco_de = None
-                try:
-                    price_container = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container")))
-                    preco_venda_element = price_container.find_element(By.CSS_SELECTOR, ".andes-money-amount")
-                    preco = get_price_from_element(preco_venda_element)
-                except (NoSuchElementException, TimeoutException):
-                    print("  ⚠️  Nenhum preço encontrado na página.")
-                    preco = "Não encontrado"
-
-            img_url = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-gallery__figure__image"))).get_attribute("src")
-            safe_name = sanitize_filename(nome)
-            img_path = IMAGES_PATH / f"{safe_name}.jpeg"
-            
-            if img_url:
-                try:
-                    response = session.get(img_url, timeout=15)
-                    response.raise_for_status()
-                    Image.open(BytesIO(response.content)).convert("RGB").save(img_path, "JPEG")
-                except requests.RequestException as e:
-                    print(f"  ⚠️ Erro de rede ao baixar imagem: {e}")
-                    img_path = None
-                except Exception as e:
-                    print(f"  ⚠️ Erro ao processar imagem: {e}")
-                    img_path = None
-
-            if preco_de:
-                # --- BLOCO PARA CÁLCULO DO DESCONTO ---
-                texto_desconto = ""
-                try:
-                    preco_float = float(preco.replace("R$", "").replace(".", "").replace(",", ".").strip())
-                    preco_original_float = float(preco_de.replace("R$", "").replace(".", "").replace(",", ".").strip())
-
-                    if preco_original_float > 0:
-                        desconto = round((1 - (preco_float / preco_original_float)) * 100)
-                        texto_desconto = f" ({desconto}% OFF)"
-                except (ValueError, TypeError, AttributeError):
-                    print("  ⚠️  Não foi possível calcular o percentual de desconto.")
-                # --- FIM DO BLOCO DE CÁLCULO ---
-
-                # Mensagem para produtos em promoção com o percentual de desconto
-                msg = (f"**{nome}**\n\nDe: ~{preco_de}~\nPor apenas: {preco} !!!{texto_desconto}\n\nConfira a promo aqui:\n{url}")
-            else:
-                # Mensagem para produtos com preço normal
-                msg = (f"**{nome}**\n\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{url}")
-
-            resultados_finais.append({
-                "nome": nome, "preco": preco, "preco_original": preco_de, "imagem": str(img_path), "mensagem": msg
-            })
-            print(f"  ✅ Sucesso: {nome} | Preço: {preco} | Original: {preco_de or 'N/A'}")
-
-        except Exception as e:
-            print(f"  ❌ Erro GERAL ao processar {url}: {e}")
-        
-        time.sleep(random.uniform(1, 3))
-
-    driver.quit()
-
-    OUTPUT_JSON_FILE.write_text(json.dumps(resultados_finais, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"\n\n--- ETAPA FINALIZADA: {len(resultados_finais)} produtos salvos em {OUTPUT_JSON_FILE} ---")
+        except TimeoutException:
+            verificar_bloqueio(driver.current_url, driver.page_source)
+            raise
+
+    # Uma leitura só da página renderizada, sem esperar campo por campo
+    # (o short_wait de 5 s do preço riscado estourava em todo produto sem promoção)
+    with metricas.etapa("extrair", via="selenium"):
+        dados = extrair_da_soup(parse_html(driver.page_source))
+    if dados:
+        return dados
+
+    preco, preco_de = None, None
+    try:
+        price_container = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container")))
+
+        short_wait = WebDriverWait(driver, 5)
+        preco_de_element = short_wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container s.andes-money-amount"))
+        )
+        preco_de = get_price_from_element(preco_de_element)
+
+        preco_venda_element = price_container.find_element(By.CSS_SELECTOR, ".ui-pdp-price__second-line .andes-money-amount")
+        preco = get_price_from_element(preco_venda_element)
+
+    except (NoSuchElementException, TimeoutException):
+        print(f"{prefixo}ℹ️  Preço original (riscado) não encontrado. Assumindo preço único.")
+        preco_de = None
+        try:
+            price_container = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-pdp-price__main-container")))
+            preco_venda_element = price_container.find_element(By.CSS_SELECTOR, ".andes-money-amount")
+            preco = get_price_from_element(preco_venda_element)
+        except (NoSuchElementException, TimeoutException):
+            print(f"{prefixo}⚠️  Nenhum preço encontrado na página.")
+            preco = "Não encontrado"
+
+    img_url = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-gallery__figure__image"))).get_attribute("src")
+    return {"nome": nome, "preco": preco, "preco_original": preco_de, "img_url": img_url, "fonte": "dom-espera"}
+
+# -------------------------------------------------------------------
+# Adaptador do Mercado Livre para o executor do core_scraper: tenta o
+# caminho HTTP e só abre o Chrome (por worker, sob demanda) quando ele
+# não encontra preço.
+# -------------------------------------------------------------------
+class AdaptadorMeli(AdaptadorSite):
+    nome = "meli"
+    arquivo_links = "promos_meli.txt"
+    arquivo_saida = "mensagens_meli.json"
+    workers = NUM_WORKERS_PADRAO
+    intervalo = (0.5, 1.0)
+
+    def processar(self, ctx, url, url_resolvida, indice):
+        inicio_url = time.perf_counter()
+        dados = extrair_via_http(url_resolvida, ctx.session, ctx.prefixo)
+        if dados:
+            caminho = "http"
+        else:
+            ctx.log("ℹ️  Preço não encontrado via HTTP. Usando o Chrome...")
+            verificar = url_resolvida == url or eh_pagina_intermediaria_meli(url_resolvida)
+            dados = extrair_via_selenium(ctx.driver, url_resolvida, ctx.prefixo, verificar_intermediaria=verificar)
+            caminho = "selenium"
+        # Ex.: "http/json", "selenium/dom-espera": o relatório mostra o tempo médio de cada um
+        ctx.registrar_caminho(f"{caminho}/{dados['fonte']}", time.perf_counter() - inicio_url)
+
+        nome, preco, preco_de = dados["nome"], dados["preco"], dados["preco_original"]
+        registro = montar_registro(nome, preco, preco_de, url, self.mostrar_desconto)
+        ctx.log(f"✅ Sucesso: {nome} | Preço: {preco} | Original: {preco_de or 'N/A'}")
+        return [(registro, dados["img_url"])]
+
+def process_links_com_selenium(num_workers=NUM_WORKERS_PADRAO, retomar=False, janela_duplicados=JANELA_DUPLICADOS):
+    print("--- INICIANDO ETAPA: Coleta de Dados do Mercado Livre (TODOS OS PRODUTOS) ---")
+    return executar_site(AdaptadorMeli(), workers=num_workers, retomar=retomar, janela_duplicados=janela_duplicados)
 
 if __name__ == "__main__":
-    process_links_com_selenium()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Coleta de dados do Mercado Livre")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS_PADRAO,
+                        help=f"Quantidade de Chromes em paralelo (padrão: {NUM_WORKERS_PADRAO}, ou MELI_WORKERS)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Pula as URLs que já estão no journal da execução anterior")
+    parser.add_argument("--janela-duplicados", type=float, default=JANELA_DUPLICADOS, metavar="HORAS",
+                        help=f"Não coleta de novo um produto enviado há menos de HORAS (padrão: {JANELA_DUPLICADOS:g}, ou JANELA_DUPLICADOS; 0 desliga)")
+    args = parser.parse_args()
+    process_links_com_selenium(num_workers=args.workers, retomar=args.resume, janela_duplicados=args.janela_duplicados)
@@ -2,173 +2,275 @@
 
 import os
 import re
-import json
+import argparse
 import requests
 import time
-import random
-from bs4 import BeautifulSoup
-from PIL import Image
-from io import BytesIO
-from urllib.parse import urlparse, urlunparse
-from pathlib import Path
 
 # Importações do Selenium
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-def sanitize_filename(name, max_length=50):
-    cleaned = re.sub(r'[<>:"/\\|?*\n\r]+', '', name).strip()
-    return cleaned[:max_length].rstrip()
+from core_scraper import JANELA_DUPLICADOS, AdaptadorSite, executar_site, montar_registro, verificar_bloqueio
+from precos import preco_para_float, formatar_preco
+from dados_estruturados import extrair_estruturado_amazon
+from parser_html import parse_html
+import metricas
 
-def expandir_url(url, session):
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-        }
-        resp = session.get(url, allow_redirects=True, timeout=15, headers=headers)
-        final = resp.url
-        parsed = urlparse(final)
-        if "amazon." in parsed.netloc and not parsed.netloc.endswith("amazon.com.br"):
-            parsed = parsed._replace(netloc="www.amazon.com.br")
-            final = urlunparse(parsed)
-        return final
-    except Exception as e:
-        print(f"  ⚠️ Erro ao expandir URL: {e}")
-        return url
+# Trechos da página que a extração usa: com selectolax, só eles viram
+# árvore do BeautifulSoup (a página inteira tem vários MB)
+RECORTES_AMAZON = (
+    "#productTitle", "#corePrice_feature_div", "#landingImage",
+    "#promoPriceBlockMessage_feature_div", 'label[for^="promo-coupon-check-box-id"]', '[id^="couponText"]', ".twister-plus-buying-options-price-data",
+    'script[type="a-state"]', 'script[type="application/ld+json"]', 'meta[property="og:image"]',
+)
+
+SELETOR_CUPOM = 'label[for^="promo-coupon-check-box-id"]'
+
+# Cupom: "calcular" lê o valor do selo e calcula o preço final sem clicar;
+# "clicar" é o caminho antigo (clica e relê o preço); "conferir" faz os
+# dois e avisa quando o preço calculado diverge do que a página mostrou
+MODOS_CUPOM = ("calcular", "clicar", "conferir")
+MODO_CUPOM_PADRAO = os.environ.get("AMAZON_CUPOM", "calcular")
+
+RE_CUPOM_PERCENTUAL = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+RE_CUPOM_VALOR = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+
+JS_BLOCO_PRECO = "const el = document.querySelector('#corePrice_feature_div'); return el ? el.outerHTML : '';"
 
 def get_price_from_soup(soup, selector):
     el = soup.select_one(selector)
     return el.get_text(strip=True) if el else None
 
-def process_links_amazon():
-    print("--- INICIANDO ETAPA: Coleta de Dados da Amazon ---")
-    
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    LINKS_PATH = BASE_DIR / "input_links" / "promos_amazon.txt"
-    IMAGES_PATH = BASE_DIR / "output" / "imagens_produtos"
-    OUTPUT_JSON_FILE = BASE_DIR / "output" / "mensagens_json" / "mensagens_amazon.json"
+def extrair_dados_da_pagina(soup_antes, soup_final, cupom_aplicado):
+    """soup_final só precisa do bloco de preço: título e imagem não mudam com o cupom."""
+    preco_antes_cupom = get_price_from_soup(soup_antes, "#corePrice_feature_div .a-price .a-offscreen")
+    price_container_final = soup_final.select_one("#corePrice_feature_div")
 
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-    })
+    preco, preco_de = None, None
+    if price_container_final:
+        # Seletor definitivo para o preço riscado, baseado no HTML fornecido
+        preco_riscado = get_price_from_soup(price_container_final, "div[data-cy='price-basis'] span.a-offscreen")
+        preco_final = get_price_from_soup(price_container_final, ".priceToPay .a-offscreen")
 
-    try:
-        urls = [u.strip() for u in LINKS_PATH.read_text(encoding="utf-8").splitlines() if u.strip()]
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo de links não encontrado em '{LINKS_PATH}'")
-        return
-
-    IMAGES_PATH.mkdir(exist_ok=True, parents=True)
-    OUTPUT_JSON_FILE.parent.mkdir(exist_ok=True, parents=True)
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    
-    service = Service(executable_path=str(BASE_DIR / "drivers" / "chromedriver.exe"))
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    resultados_finais = []
-    
-    for url in urls:
+        if preco_riscado:
+            preco_de = preco_riscado
+            preco = preco_final if preco_final else preco_antes_cupom
+        elif cupom_aplicado:
+            preco_de = preco_antes_cupom
+            preco = preco_final if preco_final else preco_antes_cupom
+        else:
+            preco_de = None
+            preco = preco_antes_cupom
+
+    titulo = soup_antes.select_one("#productTitle")
+    nome = titulo.get_text(strip=True) if titulo else "Produto sem nome"
+
+    img_el = soup_antes.select_one("#landingImage")
+    img_url = img_el['src'] if img_el and img_el.has_attr('src') else None
+
+    return {"nome": nome, "preco": preco, "preco_original": preco_de, "img_url": img_url}
+
+# -------------------------------------------------------------------
+# Cupom calculado: o selo já diz o desconto ("Aplicar cupom de 10%",
+# "Economize R$ 20,00 com cupom"), então o preço final sai de uma conta
+# em vez de um clique e de uma nova leitura da página
+# -------------------------------------------------------------------
+def texto_do_cupom(soup):
+    partes = [el.get_text(" ", strip=True) for el in soup.select(f'{SELETOR_CUPOM}, [id^="couponText"]')]
+    return " ".join(p for p in partes if p)
+
+def ler_cupom(texto):
+    """("percentual", 10.0), ("valor", 20.0) ou None se o selo não tiver valor."""
+    achado = RE_CUPOM_PERCENTUAL.search(texto or "")
+    if achado:
+        return ("percentual", float(achado.group(1).replace(",", ".")))
+    achado = RE_CUPOM_VALOR.search(texto or "")
+    if achado:
+        return ("valor", preco_para_float(achado.group(1)))
+    return None
+
+def aplicar_cupom(preco, cupom):
+    """Preço (float) depois do cupom, ou None se o desconto não fizer sentido."""
+    tipo, valor = cupom
+    final = preco * (1 - valor / 100) if tipo == "percentual" else preco - valor
+    return round(final, 2) if 0 < final < preco else None
+
+def calcular_cupom(soup):
+    """Dados da página com o cupom aplicado por conta, ou None se não der
+    para calcular (aí só clicando)."""
+    cupom = ler_cupom(texto_do_cupom(soup))
+    if not cupom:
+        return None
+    dados = extrair_dados_da_pagina(soup, soup, cupom_aplicado=False)
+    preco_antes = preco_para_float(dados["preco"])
+    preco_final = aplicar_cupom(preco_antes, cupom) if preco_antes else None
+    if preco_final is None:
+        return None
+    dados["preco_original"] = dados["preco_original"] or dados["preco"]
+    dados["preco"] = formatar_preco(preco_final)
+    dados["fonte"] = "cupom-calculado"
+    return dados
+
+def extrair_da_soup(soup):
+    """Página sem cupom: JSON de preço do twister/a-state/JSON-LD primeiro,
+    seletores do DOM para completar (o preço riscado só aparece no DOM)."""
+    dados = extrair_estruturado_amazon(soup)
+    dom = extrair_dados_da_pagina(soup, soup, cupom_aplicado=False)
+    if not dados["preco"]:
+        dom["fonte"] = "dom"
+        return dom
+    for campo in ("nome", "preco_original", "img_url"):
+        dados[campo] = dados[campo] or dom[campo]
+    dados["fonte"] = "json"
+    return dados
+
+# -------------------------------------------------------------------
+# Caminho rápido: a página do produto já vem com título, preço e imagem
+# no HTML do servidor. Só precisamos do Chrome quando o preço não aparece
+# (captcha, página dinâmica) ou quando o selo do cupom não diz o valor.
+# -------------------------------------------------------------------
+def extrair_via_http(url_real, session, prefixo="  ", modo_cupom=MODO_CUPOM_PADRAO):
+    with metricas.etapa("navegar", via="http") as span:
         try:
-            print(f"Processando: {url}")
-            url_real = expandir_url(url, session)
-            print(f"  ➡️  URL final: {url_real}")
+            resp = session.get(url_real, allow_redirects=True, timeout=15)
+            verificar_bloqueio(resp.url, status=resp.status_code)
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            span.resultado = type(e).__name__
+            print(f"{prefixo}ℹ️  Caminho HTTP falhou ({e}).")
+            return None
+        if 'id="dp-container"' not in resp.text:
+            span.resultado = "sem_produto"
+            return None
+
+    with metricas.etapa("extrair", via="http") as span:
+        soup = parse_html(resp.text, recortes=RECORTES_AMAZON)
+        if soup.select_one(SELETOR_CUPOM):
+            dados = calcular_cupom(soup) if modo_cupom == "calcular" else None
+            if not dados:
+                span.resultado = "cupom"
+                print(f"{prefixo}ℹ️  Cupom encontrado: é preciso clicar no navegador.")
+            return dados
 
-            driver.get(url_real)
+        dados = extrair_da_soup(soup)
+        if not dados["preco"]:
+            span.resultado = "sem_preco"
+            return None
+        return dados
+
+def estado_do_cupom(driver):
+    """HTML do bloco de preço e do cupom: muda quando o cupom é aplicado."""
+    return driver.execute_script("""
+        const preco = document.querySelector('#corePrice_feature_div');
+        const cupom = document.querySelector('label[for^="promo-coupon-check-box-id"]');
+        const bloco = cupom && (cupom.closest('[id$="_feature_div"]') || cupom.parentElement);
+        return (preco ? preco.innerHTML : '') + '|' + (bloco ? bloco.innerHTML : '');
+    """)
+
+def extrair_via_selenium(driver, url_real, prefixo="  ", modo_cupom=MODO_CUPOM_PADRAO):
+    with metricas.etapa("navegar", via="selenium"):
+        driver.get(url_real)
+        try:
             WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.ID, "dp-container")))
-            
-            soup_antes = BeautifulSoup(driver.page_source, "html.parser")
-            preco_antes_cupom = get_price_from_soup(soup_antes, "#corePrice_feature_div .a-price .a-offscreen")
-            
-            cupom_aplicado = False
+        except TimeoutException:
+            verificar_bloqueio(driver.current_url, driver.page_source)
+            raise
+
+    # Uma leitura só da página; sem cupom, ela é a única
+    with metricas.etapa("extrair", via="selenium"):
+        soup_antes = parse_html(driver.page_source, recortes=RECORTES_AMAZON)
+
+    calculado = None
+    if soup_antes.select_one(SELETOR_CUPOM) and modo_cupom != "clicar":
+        calculado = calcular_cupom(soup_antes)
+        if calculado and modo_cupom == "calcular":
+            return calculado
+        if not calculado:
+            print(f"{prefixo}ℹ️  Não deu para ler o valor do cupom. Clicando...")
+
+    cupom_aplicado = False
+    try:
+        coupon_label = driver.find_elements(By.CSS_SELECTOR, SELETOR_CUPOM)
+        if coupon_label:
+            print(f"{prefixo}ℹ️  Cupom de desconto encontrado. Aplicando...")
+            antes = estado_do_cupom(driver)
+            coupon_label[0].click()
+            # Espera o bloco de preço ou o do cupom mudar, em vez de 3 s fixos
             try:
-                coupon_label = driver.find_elements(By.CSS_SELECTOR, 'label[for^="promo-coupon-check-box-id"]')
-                if coupon_label:
-                    print("  ℹ️  Cupom de desconto encontrado. Aplicando...")
-                    coupon_label[0].click()
-                    time.sleep(3)
-                    cupom_aplicado = True
-            except Exception as e:
-                print(f"  ⚠️  Não foi possível clicar no cupom: {e}")
-
-            soup_final = BeautifulSoup(driver.page_source, "html.parser")
-            price_container_final = soup_final.select_one("#corePrice_feature_div")
-            
-            preco, preco_de = None, None
-            if price_container_final:
-                # Seletor definitivo para o preço riscado, baseado no HTML fornecido
-                preco_riscado = get_price_from_soup(price_container_final, "div[data-cy='price-basis'] span.a-offscreen")
-                preco_final = get_price_from_soup(price_container_final, ".priceToPay .a-offscreen")
-
-                if preco_riscado:
-                    preco_de = preco_riscado
-                    preco = preco_final if preco_final else preco_antes_cupom
-                elif cupom_aplicado:
-                    preco_de = preco_antes_cupom
-                    preco = preco_final if preco_final else preco_antes_cupom
-                else:
-                    preco_de = None
-                    preco = preco_antes_cupom
-            
-            if not preco: preco = "Não encontrado"
-            
-            nome = soup_final.select_one("#productTitle").get_text(strip=True) if soup_final.select_one("#productTitle") else "Produto sem nome"
-            
-            img_el = soup_final.select_one("#landingImage")
-            img_url = img_el['src'] if img_el and img_el.has_attr('src') else None
-
-            safe_name = sanitize_filename(nome)
-            img_path = IMAGES_PATH / f"{safe_name}.jpeg"
-            if img_url:
-                try:
-                    response = session.get(img_url, timeout=15)
-                    response.raise_for_status()
-                    Image.open(BytesIO(response.content)).convert("RGB").save(img_path, "JPEG")
-                except Exception as e:
-                    print(f"  ⚠️ Erro ao processar imagem: {e}")
-                    img_path = None
-            
-            if preco_de and preco and preco_de != preco:
-                texto_desconto = ""
-                try:
-                    preco_float = float(preco.replace("R$", "").replace(".", "").replace(",", ".").strip())
-                    preco_original_float = float(preco_de.replace("R$", "").replace(".", "").replace(",", ".").strip())
-                    if preco_original_float > preco_float:
-                        desconto = round((1 - (preco_float / preco_original_float)) * 100)
-                        texto_desconto = f" ({desconto}% OFF)"
-                except (ValueError, TypeError, AttributeError):
-                    print("  ⚠️  Não foi possível calcular o percentual de desconto.")
-
-                mensagem = (f"**{nome}**\n\nDe: ~{preco_de}~\nPor apenas: {preco} !!!{texto_desconto}\n\nConfira a promo aqui:\n{url}")
-                print_status = "PROMOÇÃO SALVA"
-            else:
-                mensagem = (f"**{nome}**\n\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{url}")
-                print_status = "PRODUTO SALVO"
-
-            resultados_finais.append({
-                "nome": nome, "preco": preco, "preco_original": preco_de, "imagem": str(img_path), "mensagem": mensagem
-            })
-            print(f"  ✅ {print_status}: {nome} | Preço: {preco} | Original: {preco_de or 'N/A'}")
-
-        except Exception as e:
-            print(f"  ❌ Erro GERAL ao processar {url}: {e}")
-        
-        time.sleep(random.uniform(1, 3))
-
-    driver.quit()
-
-    OUTPUT_JSON_FILE.write_text(json.dumps(resultados_finais, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"\n\n--- ETAPA FINALIZADA: {len(resultados_finais)} produtos da Amazon salvos em {OUTPUT_JSON_FILE} ---")
+                WebDriverWait(driver, 5).until(lambda d: estado_do_cupom(d) != antes)
+            except TimeoutException:
+                print(f"{prefixo}ℹ️  A página não mudou depois do clique no cupom.")
+            cupom_aplicado = True
+    except Exception as e:
+        print(f"{prefixo}⚠️  Não foi possível clicar no cupom: {e}")
+
+    if not cupom_aplicado:
+        return extrair_da_soup(soup_antes)
+
+    # Depois do clique só o bloco de preço muda: lê só ele, não a página inteira de novo
+    soup_final = parse_html(driver.execute_script(JS_BLOCO_PRECO))
+    dados = extrair_dados_da_pagina(soup_antes, soup_final, cupom_aplicado)
+    dados["fonte"] = "cupom"
+    if calculado and calculado["preco"] != dados["preco"]:
+        print(f"{prefixo}⚠️  Cupom calculado ({calculado['preco']}) diferente do clicado ({dados['preco']}).")
+    return dados
+
+# -------------------------------------------------------------------
+# Adaptador da Amazon para o executor do core_scraper
+# -------------------------------------------------------------------
+class AdaptadorAmazon(AdaptadorSite):
+    nome = "amazon"
+    arquivo_links = "promos_amazon.txt"
+    arquivo_saida = "mensagens_amazon.json"
+    workers = 2
+    intervalo = (1, 3)
+
+    def __init__(self, modo_cupom=MODO_CUPOM_PADRAO):
+        if modo_cupom not in MODOS_CUPOM:
+            raise ValueError(f"Modo de cupom inválido '{modo_cupom}'. Use um de {MODOS_CUPOM}")
+        self.modo_cupom = modo_cupom
+
+    def processar(self, ctx, url, url_resolvida, indice):
+        ctx.log(f"➡️  URL final: {url_resolvida}")
+
+        inicio_url = time.perf_counter()
+        # No modo "conferir" o cupom sempre passa pelo Chrome para comparar
+        modo_http = "clicar" if self.modo_cupom == "conferir" else self.modo_cupom
+        dados = extrair_via_http(url_resolvida, ctx.session, ctx.prefixo, modo_http)
+        if dados:
+            caminho = "http"
+        else:
+            ctx.log("ℹ️  Usando o Chrome para este produto...")
+            dados = extrair_via_selenium(ctx.driver, url_resolvida, ctx.prefixo, self.modo_cupom)
+            caminho = "selenium"
+        ctx.registrar_caminho(f"{caminho}/{dados['fonte']}", time.perf_counter() - inicio_url)
+
+        nome, preco, preco_de = dados["nome"], dados["preco"], dados["preco_original"]
+        if not preco: preco = "Não encontrado"
+
+        registro = montar_registro(nome, preco, preco_de, url, self.mostrar_desconto)
+        print_status = "PROMOÇÃO SALVA" if preco_de and preco_de != preco else "PRODUTO SALVO"
+        ctx.log(f"✅ {print_status}: {nome} | Preço: {preco} | Original: {preco_de or 'N/A'}")
+        return [(registro, dados["img_url"])]
+
+def process_links_amazon(retomar=False, workers=None, modo_cupom=MODO_CUPOM_PADRAO, janela_duplicados=JANELA_DUPLICADOS):
+    print("--- INICIANDO ETAPA: Coleta de Dados da Amazon ---")
+    return executar_site(AdaptadorAmazon(modo_cupom=modo_cupom), workers=workers, retomar=retomar,
+                         janela_duplicados=janela_duplicados)
 
 if __name__ == "__main__":
-    process_links_amazon()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Coleta de dados da Amazon")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Quantidade de Chromes em paralelo (padrão: {AdaptadorAmazon.workers})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Pula as URLs que já estão no journal da execução anterior")
+    parser.add_argument("--cupom", choices=MODOS_CUPOM, default=MODO_CUPOM_PADRAO,
+                        help="calcular: preço com cupom pela conta do selo; clicar: clica no cupom; "
+                             "conferir: calcula e clica para comparar (padrão: AMAZON_CUPOM ou calcular)")
+    parser.add_argument("--janela-duplicados", type=float, default=JANELA_DUPLICADOS, metavar="HORAS",
+                        help=f"Não coleta de novo um produto enviado há menos de HORAS (padrão: {JANELA_DUPLICADOS:g}, ou JANELA_DUPLICADOS; 0 desliga)")
+    args = parser.parse_args()
+    process_links_amazon(retomar=args.resume, workers=args.workers, modo_cupom=args.cupom,
+                         janela_duplicados=args.janela_duplicados)
@@ -1,137 +1,321 @@
 # Arquivo: scripts/3_scraper_shopee.py (VERSÃO HEADLESS)
 
+import os
 import re
 import json
-import requests
-import time
-import random
-from bs4 import BeautifulSoup
-from PIL import Image
-from io import BytesIO
-from pathlib import Path
+import base64
+import argparse
+from urllib.parse import urljoin
 
 # Importações do Selenium
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-def sanitize_filename(name, max_length=50):
-    cleaned = re.sub(r'[<>:"/\\|?*\n\r]+', '', name).strip()
-    return cleaned[:max_length].rstrip()
+from core_scraper import JANELA_DUPLICADOS, AdaptadorSite, executar_site, montar_registro, verificar_bloqueio, criar_driver, ler_eventos_rede
+from precos import formatar_preco
+from dados_estruturados import percorrer_json
+from parser_html import parse_html
+import metricas
 
-def process_links_shopee():
-    print("--- INICIANDO ETAPA: Coleta de Dados de Lista da Shopee ---")
-    
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    LINKS_PATH = BASE_DIR / "input_links" / "promos_shopee.txt"
-    IMAGES_PATH = BASE_DIR / "output" / "imagens_produtos"
-    OUTPUT_JSON_FILE = BASE_DIR / "output" / "mensagens_json" / "mensagens_shopee.json"
+# Limite de cards coletados por lista de ofertas
+MAX_CARDS_PADRAO = int(os.environ.get("SHOPEE_MAX_CARDS", "100"))
+# "xhr": lê o JSON da API de ofertas; "dom": lê os cards renderizados;
+# "auto": tenta o JSON e cai para os cards se a API não trouxer produtos
+MODOS = ("auto", "xhr", "dom")
+MODO_PADRAO = os.environ.get("SHOPEE_MODO", "auto")
+
+# Respostas da API que trazem a lista de produtos das páginas de ofertas
+# (flash sale, busca e recomendações). Outro endpoint: SHOPEE_PADRAO_API
+PADRAO_API_PADRAO = os.environ.get(
+    "SHOPEE_PADRAO_API",
+    r"/api/v4/(flash_sale/flash_sale_batch_get_items|search/search_items|recommend/recommend)\b",
+)
+URL_IMAGEM_SHOPEE = "https://down-br.img.susercontent.com/file/{}"
+# Os preços da API vêm multiplicados por 100000
+ESCALA_PRECO_API = 100000
+
+SELETOR_CARD = "a.ofs-desktop-product-card"
 
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-    })
+JS_BOTAO_FECHAR_POPUP = 'const p = document.querySelector("shopee-banner-popup-stateful"); return p && p.shadowRoot ? p.shadowRoot.querySelector(".shopee-popup__close-btn") : null'
 
+# Devolve só os cards que ainda não foram lidos e marca todos como lidos
+JS_CARDS_NOVOS = f"""
+const novos = Array.from(document.querySelectorAll('{SELETOR_CARD}:not([data-colhido])'));
+novos.forEach(c => c.setAttribute('data-colhido', '1'));
+return novos.map(c => c.outerHTML);
+"""
+JS_HA_CARDS_NOVOS = f"return document.querySelectorAll('{SELETOR_CARD}:not([data-colhido])').length > 0"
+JS_ROLAR = "window.scrollBy(0, Math.round(window.innerHeight * 0.9));"
+
+def extrair_card(card, prefixo="  "):
     try:
-        urls = [u.strip() for u in LINKS_PATH.read_text(encoding="utf-8").splitlines() if u.strip()]
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo de links não encontrado em '{LINKS_PATH}'")
-        return
-
-    IMAGES_PATH.mkdir(exist_ok=True, parents=True)
-    OUTPUT_JSON_FILE.parent.mkdir(exist_ok=True, parents=True)
-    
-    chrome_options = Options()
-    # --- ALTERAÇÃO PRINCIPAL: ATIVANDO O MODO HEADLESS ---
-    chrome_options.add_argument("--headless")
-    # ----------------------------------------------------
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    
-    service = Service(executable_path=str(BASE_DIR / "drivers" / "chromedriver.exe"))
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    resultados_finais = []
-    
-    for url in urls:
+        nome = card.select_one(".ofs-desktop-product-card__product-name").get_text(strip=True)
+        preco = card.select_one(".ofs-desktop-product-card__product-price").get_text(strip=True)
+        link_produto = card.get('href')
+
+        preco_de = None
+        preco_de_el = card.select_one(".ofs-desktop-product-card__original-price")
+        if preco_de_el:
+            preco_de = preco_de_el.get_text(strip=True)
+
+        img_el = card.select_one("img.ofs-desktop-product-card__img")
+        img_url = img_el['src'] if img_el else None
+
+        if not nome or not preco or not link_produto:
+            return None
+
+        return {"nome": nome, "preco": preco, "preco_original": preco_de,
+                "link": link_produto, "img_url": img_url}
+    except Exception as e:
+        print(f"{prefixo}  ❌ Erro ao processar um card de produto: {e}")
+        return None
+
+def colher_cards(driver, max_cards, prefixo="  ", espera_rolagem=4, rolagens_sem_novidade=2):
+    """Rola a lista aos poucos e devolve (yield) o HTML de cada card novo,
+    sem reler a página inteira a cada passo."""
+    total, sem_novidade = 0, 0
+    while total < max_cards:
+        novos = driver.execute_script(JS_CARDS_NOVOS)
+        for card_html in novos[:max_cards - total]:
+            total += 1
+            yield card_html
+        if total >= max_cards:
+            print(f"{prefixo}-> Limite de {max_cards} cards atingido.")
+            break
+
+        driver.execute_script(JS_ROLAR)
         try:
-            print(f"Processando a lista de ofertas: {url}")
-            driver.get(url)
-
-            time.sleep(5) 
-            try:
-                close_button = driver.execute_script('return document.querySelector("shopee-banner-popup-stateful").shadowRoot.querySelector(".shopee-popup__close-btn")')
-                if close_button:
-                    print("  ℹ️  Pop-up encontrado. Fechando...")
-                    close_button.click()
-                    time.sleep(2)
-            except Exception:
-                print("  ℹ️  Nenhum pop-up detectado ou não foi possível fechá-lo.")
+            WebDriverWait(driver, espera_rolagem).until(lambda d: d.execute_script(JS_HA_CARDS_NOVOS))
+            sem_novidade = 0
+        except TimeoutException:
+            # Nada novo depois de rolar: fim da lista (ou o carregamento parou)
+            sem_novidade += 1
+            if sem_novidade >= rolagens_sem_novidade:
+                break
+    print(f"{prefixo}-> {total} cards lidos na lista.")
+
+# -------------------------------------------------------------------
+# Modo XHR: a página de ofertas preenche os cards a partir de chamadas
+# JSON em segundo plano. Com o log de performance do Chrome ligado, as
+# respostas dessas chamadas são lidas direto pelo DevTools, sem esperar
+# renderização, sem pop-up e sem HTML para interpretar.
+# -------------------------------------------------------------------
+class ColetorXHR:
+    def __init__(self, driver, padrao_api=PADRAO_API_PADRAO):
+        self.driver = driver
+        self.padrao_api = re.compile(padrao_api)
+        self.aguardando = {}
+        self.respostas = []
+
+    def descartar_eventos(self):
+        # Eventos da página anterior no mesmo Chrome não interessam (os
+        # bytes continuam somados para medir_carga)
+        for _ in ler_eventos_rede(self.driver):
+            pass
+
+    def ler(self):
+        """Lê o log de rede e guarda o JSON das respostas da API que já
+        terminaram de carregar. Devolve quantas respostas novas chegaram."""
+        novas = 0
+        for metodo, params in ler_eventos_rede(self.driver):
+            request_id = params.get("requestId")
+            if metodo == "Network.responseReceived":
+                resposta = params.get("response", {})
+                if self.padrao_api.search(resposta.get("url", "")) and "json" in resposta.get("mimeType", ""):
+                    self.aguardando[request_id] = resposta["url"]
+            elif metodo == "Network.loadingFinished" and request_id in self.aguardando:
+                del self.aguardando[request_id]
+                try:
+                    corpo = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                    texto = corpo["body"]
+                    if corpo.get("base64Encoded"):
+                        texto = base64.b64decode(texto).decode("utf-8")
+                    self.respostas.append(json.loads(texto))
+                    novas += 1
+                except (WebDriverException, KeyError, ValueError):
+                    continue
+        return novas
+
+    def aguardar_respostas(self, timeout):
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(lambda d: self.ler() or self.respostas)
+            return True
+        except TimeoutException:
+            return False
+
+    def retirar(self):
+        respostas, self.respostas = self.respostas, []
+        return respostas
+
+def _preco_api(valor):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor <= 0:
+        return None
+    return valor / ESCALA_PRECO_API
 
+def item_da_api(d, url_base):
+    """Converte um item da API ({"itemid", "shopid", "name", "price", ...})
+    no mesmo formato de extrair_card()."""
+    preco = _preco_api(d.get("price")) or _preco_api(d.get("price_min"))
+    if not d.get("name") or preco is None:
+        return None
+    preco_de = _preco_api(d.get("price_before_discount")) or _preco_api(d.get("price_min_before_discount"))
+    imagem = d.get("image")
+    if imagem and not imagem.startswith("http"):
+        imagem = URL_IMAGEM_SHOPEE.format(imagem)
+    return {
+        "nome": d["name"],
+        "preco": formatar_preco(preco),
+        "preco_original": formatar_preco(preco_de) if preco_de and preco_de > preco else None,
+        "link": urljoin(url_base, f"/product/{d['shopid']}/{d['itemid']}"),
+        "img_url": imagem,
+    }
+
+def itens_das_respostas(respostas, url_base):
+    for resposta in respostas:
+        for d in percorrer_json(resposta):
+            if "itemid" in d and "shopid" in d and "name" in d:
+                item = item_da_api(d, url_base)
+                if item:
+                    yield item
+
+def colher_itens_xhr(driver, coletor, max_cards, url_base, prefixo="  ", espera_rolagem=4, rolagens_sem_novidade=2):
+    """Lê os itens das respostas já capturadas e rola a página para
+    disparar as próximas páginas da API, até o limite de cards."""
+    total, sem_novidade = 0, 0
+    while total < max_cards:
+        for item in itens_das_respostas(coletor.retirar(), url_base):
+            total += 1
+            yield item
+            if total >= max_cards:
+                print(f"{prefixo}-> Limite de {max_cards} cards atingido.")
+                break
+        if total >= max_cards:
+            break
+
+        driver.execute_script(JS_ROLAR)
+        if coletor.aguardar_respostas(espera_rolagem):
+            sem_novidade = 0
+        else:
+            sem_novidade += 1
+            if sem_novidade >= rolagens_sem_novidade:
+                break
+    print(f"{prefixo}-> {total} itens lidos da API.")
+
+# -------------------------------------------------------------------
+# Adaptador da Shopee: cada URL é uma lista de ofertas e gera vários
+# registros, um por card. processar() é um gerador: cada card vai para
+# as imagens e para o journal assim que aparece na rolagem (ou na API).
+# -------------------------------------------------------------------
+class AdaptadorShopee(AdaptadorSite):
+    nome = "shopee"
+    arquivo_links = "promos_shopee.txt"
+    arquivo_saida = "mensagens_shopee.json"
+    workers = 1
+    intervalo = (2, 5)
+    mostrar_desconto = False
+    # As imagens do CDN da Shopee não têm extensão na URL
+    bloquear = ("*susercontent.com/file/*",)
+
+    def __init__(self, max_cards=MAX_CARDS_PADRAO, modo=MODO_PADRAO, padrao_api=PADRAO_API_PADRAO, timeout_xhr=None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo inválido '{modo}'. Use um de {MODOS}")
+        self.max_cards = max_cards
+        self.modo = modo
+        self.padrao_api = padrao_api
+        # No modo auto a espera é menor: se a API não aparecer, ainda há os cards
+        self.timeout_xhr = timeout_xhr or (20 if modo == "xhr" else 10)
+
+    def criar_driver(self):
+        # O log de performance serve ao modo XHR e aos bytes do relatório de carga
+        return criar_driver(log_performance=True, bloquear_imagens=self.bloquear_imagens)
+
+    def processar(self, ctx, url, url_resolvida, indice):
+        driver = ctx.driver
+        ctx.log("Processando a lista de ofertas...")
+
+        coletor = None
+        if self.modo != "dom":
+            coletor = ColetorXHR(driver, self.padrao_api)
+            coletor.descartar_eventos()
+        with metricas.etapa("navegar", via="selenium", modo=self.modo):
+            driver.get(url_resolvida)
+
+        if coletor is not None:
+            if coletor.aguardar_respostas(self.timeout_xhr):
+                ctx.log("📡 Lendo os produtos direto das respostas da API...")
+                itens = colher_itens_xhr(driver, coletor, self.max_cards, url_resolvida, ctx.prefixo)
+                total = 0
+                for registro in self._registros(ctx, itens):
+                    total += 1
+                    yield registro
+                if total:
+                    return
+                motivo = "As respostas da API capturadas não trouxeram produtos"
+            else:
+                motivo = "Nenhuma resposta da API de ofertas foi capturada"
+            if self.modo == "xhr":
+                verificar_bloqueio(driver.current_url, driver.page_source)
+                raise TimeoutException(motivo)
+            ctx.log(f"ℹ️  {motivo}. Lendo os cards da página...")
+
+        yield from self._registros(ctx, self._colher_dom(ctx, driver))
+
+    def _registros(self, ctx, itens):
+        links_vistos = set()
+        for item in itens:
+            if item["link"] in links_vistos:
+                continue
+            links_vistos.add(item["link"])
+            registro = montar_registro(item["nome"], item["preco"], item["preco_original"], item["link"],
+                                       self.mostrar_desconto)
+            ctx.log(f"  ✅ Produto salvo: {item['nome']}")
+            yield registro, item["img_url"]
+
+    def _colher_dom(self, ctx, driver):
+        # Espera os cards aparecerem (em vez dos 5 s fixos antes do pop-up)
+        try:
             WebDriverWait(driver, 20).until(
-                EC.visibility_of_element_located((By.CSS_SELECTOR, "a.ofs-desktop-product-card"))
+                EC.visibility_of_element_located((By.CSS_SELECTOR, SELETOR_CARD))
             )
+        except TimeoutException:
+            verificar_bloqueio(driver.current_url, driver.page_source)
+            raise
 
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            cards = soup.select("a.ofs-desktop-product-card")
-            print(f"  -> Encontrados {len(cards)} produtos na página.")
+        # O pop-up não atrapalha a leitura dos cards: só fecha se já estiver aberto
+        try:
+            close_button = driver.execute_script(JS_BOTAO_FECHAR_POPUP)
+            if close_button:
+                ctx.log("ℹ️  Pop-up encontrado. Fechando...")
+                close_button.click()
+        except Exception:
+            ctx.log("ℹ️  Não foi possível fechar o pop-up.")
 
-            for card in cards:
-                nome, preco, preco_de, link_produto, img_url = (None,) * 5
-                try:
-                    nome = card.select_one(".ofs-desktop-product-card__product-name").get_text(strip=True)
-                    preco = card.select_one(".ofs-desktop-product-card__product-price").get_text(strip=True)
-                    link_produto = card.get('href')
-                    
-                    preco_de_el = card.select_one(".ofs-desktop-product-card__original-price")
-                    if preco_de_el:
-                        preco_de = preco_de_el.get_text(strip=True)
-
-                    img_el = card.select_one("img.ofs-desktop-product-card__img")
-                    img_url = img_el['src'] if img_el else None
-
-                    if not nome or not preco or not link_produto:
-                        continue
-
-                    safe_name = sanitize_filename(nome)
-                    img_path = IMAGES_PATH / f"{safe_name}.jpeg"
-                    if img_url:
-                        try:
-                            response = session.get(img_url, timeout=15)
-                            response.raise_for_status()
-                            Image.open(BytesIO(response.content)).convert("RGB").save(img_path, "JPEG")
-                        except Exception as e:
-                            print(f"    ⚠️ Erro ao baixar imagem para '{safe_name}': {e}")
-                            img_path = None
-                    
-                    if preco_de:
-                        msg = (f"**{nome}**\n\nDe: ~{preco_de}~\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{link_produto}")
-                    else:
-                        msg = (f"**{nome}**\n\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{link_produto}")
-
-                    resultados_finais.append({
-                        "nome": nome, "preco": preco, "preco_original": preco_de, "imagem": str(img_path), "mensagem": msg
-                    })
-                    print(f"    ✅ Produto salvo: {nome}")
-
-                except Exception as e:
-                    print(f"    ❌ Erro ao processar um card de produto: {e}")
-
-        except Exception as e:
-            print(f"  ❌ Erro GERAL ao processar a URL {url}: {e}")
-        
-        time.sleep(random.uniform(3, 5))
-
-    driver.quit()
-
-    OUTPUT_JSON_FILE.write_text(json.dumps(resultados_finais, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"\n\n--- ETAPA FINALIZADA: {len(resultados_finais)} produtos da Shopee salvos em {OUTPUT_JSON_FILE} ---")
+        for card_html in colher_cards(driver, self.max_cards, ctx.prefixo):
+            card = parse_html(card_html).select_one(SELETOR_CARD)
+            item = extrair_card(card, ctx.prefixo) if card else None
+            if item:
+                yield item
+
+def process_links_shopee(retomar=False, workers=None, max_cards=MAX_CARDS_PADRAO, modo=MODO_PADRAO,
+                         janela_duplicados=JANELA_DUPLICADOS):
+    print("--- INICIANDO ETAPA: Coleta de Dados de Lista da Shopee ---")
+    return executar_site(AdaptadorShopee(max_cards=max_cards, modo=modo), workers=workers, retomar=retomar,
+                         janela_duplicados=janela_duplicados)
 
 if __name__ == "__main__":
-    process_links_shopee()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Coleta de dados de listas da Shopee")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Quantidade de Chromes em paralelo (padrão: {AdaptadorShopee.workers})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Pula as URLs que já estão no journal da execução anterior")
+    parser.add_argument("--max-cards", type=int, default=MAX_CARDS_PADRAO,
+                        help=f"Máximo de cards por lista de ofertas (padrão: {MAX_CARDS_PADRAO}, ou SHOPEE_MAX_CARDS)")
+    parser.add_argument("--modo", choices=MODOS, default=MODO_PADRAO,
+                        help=f"xhr: JSON da API; dom: cards renderizados; auto: API com fallback para os cards (padrão: {MODO_PADRAO}, ou SHOPEE_MODO)")
+    parser.add_argument("--janela-duplicados", type=float, default=JANELA_DUPLICADOS, metavar="HORAS",
+                        help=f"Não coleta de novo um produto enviado há menos de HORAS (padrão: {JANELA_DUPLICADOS:g}, ou JANELA_DUPLICADOS; 0 desliga)")
+    args = parser.parse_args()
+    process_links_shopee(retomar=args.resume, workers=args.workers, max_cards=args.max_cards, modo=args.modo,
+                         janela_duplicados=args.janela_duplicados)
@@ -1,32 +1,29 @@
 # Arquivo: scripts/4_scraper_llama_meli.py (VERSÃO LLAMA COM SALVAMENTO DE HTML)
 
-import re
-import json
-import requests
-import time
-import random
-from io import BytesIO
-from PIL import Image
-from pathlib import Path
-import ollama
+import os
+import argparse
+import threading
 
 # Importações do Selenium
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-def sanitize_filename(name, max_length=50):
-    cleaned = re.sub(r'[<>:"/\\|?*\n\r]+', '', name).strip()
-    return cleaned[:max_length].rstrip()
+from core_scraper import BASE_DIR, JANELA_DUPLICADOS, CACHE_PATH, AdaptadorSite, executar_site, montar_registro, verificar_bloqueio
+from resolver_links import eh_pagina_intermediaria_meli
+from podar_html import podar_html, estimar_tokens
+from cliente_llama import ClienteLlama
+import metricas
 
-def extrair_dados_com_llama(html_content):
-    print("  🧠 Enviando HTML para o Llama para análise...")
-    
-    prompt = f"""
+# Suba a versão sempre que o prompt mudar: as respostas em cache deixam de valer
+VERSAO_PROMPT = 2
+LLAMA_CACHE_PATH = CACHE_PATH / "llama"
+# Chamadas simultâneas ao Ollama (o Chrome segue para a próxima página enquanto isso)
+LLAMA_CONCORRENTES = int(os.environ.get("LLAMA_CONCORRENTES", "2"))
+
+def montar_prompt(html_podado):
+    return f"""
     You are an expert web scraping specialist. Your task is to analyze the HTML code of a Mercado Livre product page and extract the product name, the final price, and the original (strikethrough) price.
 
     Rules:
@@ -43,125 +40,119 @@ def extrair_dados_com_llama(html_content):
 
     Here is the HTML to analyze:
     ```html
-    {html_content}
+    {html_podado}
     ```
     """
 
-    try:
-        response = ollama.chat(
-            model='llama3',
-            messages=[{'role': 'user', 'content': prompt}],
-            options={'temperature': 0.0}
-        )
-        
-        resposta_texto = response['message']['content']
-        match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-            dados_json = json.loads(json_str)
-            print("  ✅ Llama retornou os dados com sucesso.")
-            return dados_json
-        else:
-            print(f"  ❌ ERRO: Nenhum JSON encontrado na resposta do Llama: {resposta_texto}")
-            return None
-    except Exception as e:
-        print(f"  ❌ ERRO: Falha ao se comunicar com a API do Ollama: {e}")
-        return None
-
-def process_links_meli_com_llama():
-    print("--- INICIANDO ETAPA: Coleta de Dados do Mercado Livre com Llama e HTML ---")
-    
-    BASE_DIR = Path(__file__).resolve().parent.parent
-    LINKS_PATH = BASE_DIR / "input_links" / "promos_meli.txt"
-    IMAGES_PATH = BASE_DIR / "output" / "imagens_produtos"
-    OUTPUT_JSON_FILE = BASE_DIR / "output" / "mensagens_json" / "mensagens_meli_llama.json"
-    HTML_DEBUG_PATH = BASE_DIR / "output" / "debug_html" # Pasta para salvar os HTMLs
-
-    # Cria as pastas de saída, se não existirem
-    IMAGES_PATH.mkdir(exist_ok=True, parents=True)
-    OUTPUT_JSON_FILE.parent.mkdir(exist_ok=True, parents=True)
-    HTML_DEBUG_PATH.mkdir(exist_ok=True, parents=True)
-
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0"})
-
-    try:
-        urls = [u.strip() for u in LINKS_PATH.read_text(encoding="utf-8").splitlines() if u.strip()]
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo de links não encontrado em '{LINKS_PATH}'")
-        return
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920,1080")
-    
-    service = Service(executable_path=str(BASE_DIR / "drivers" / "chromedriver.exe"))
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
-    wait = WebDriverWait(driver, 15)
-    resultados_finais = []
-    
-    for i, url in enumerate(urls):
-        print(f"\nProcessando: {url}")
-        try:
-            driver.get(url)
-            
+def podar_para_llama(html_content, prefixo="  "):
+    # Só o container do produto, os preços e o JSON-LD vão para o prompt
+    html_podado = podar_html(html_content)
+    print(f"{prefixo}✂️  HTML podado: ~{estimar_tokens(html_content)} -> ~{estimar_tokens(html_podado)} tokens")
+    return html_podado
+
+HTML_DEBUG_PATH = BASE_DIR / "output" / "debug_html" # Pasta para salvar os HTMLs
+
+# -------------------------------------------------------------------
+# Adaptador do Mercado Livre com Llama: o HTML final é salvo para debug
+# e enviado ao Ollama, que extrai nome e preços. A extração roda em
+# segundo plano (processar devolve um Future) e as respostas ficam em cache.
+# -------------------------------------------------------------------
+class AdaptadorMeliLlama(AdaptadorSite):
+    nome = "llama-meli"
+    arquivo_links = "promos_meli.txt"
+    arquivo_saida = "mensagens_meli_llama.json"
+    workers = 1
+    intervalo = (1, 3)
+    mostrar_desconto = False
+
+    def __init__(self, ollama_host=None, max_concorrentes=LLAMA_CONCORRENTES):
+        self.ollama_host = ollama_host
+        self.max_concorrentes = max_concorrentes
+        # Pastas por instância: o benchmark offline troca as duas por temporárias
+        self.cache_path = LLAMA_CACHE_PATH
+        self.html_debug_path = HTML_DEBUG_PATH
+        self.max_pendentes = max_concorrentes
+        self._cliente = None
+        self._lock = threading.Lock()
+
+    @property
+    def cliente(self):
+        with self._lock:
+            if self._cliente is None:
+                self._cliente = ClienteLlama(self.cache_path, montar_prompt, VERSAO_PROMPT,
+                                             host=self.ollama_host, max_concorrentes=self.max_concorrentes)
+            return self._cliente
+
+    def processar(self, ctx, url, url_resolvida, indice):
+        driver = ctx.driver
+        wait = WebDriverWait(driver, 15)
+        with metricas.etapa("navegar", via="selenium"):
+            driver.get(url_resolvida)
+
+            if url_resolvida == url or eh_pagina_intermediaria_meli(url_resolvida):
+                try:
+                    wait_curto = WebDriverWait(driver, 3)
+                    botao_ir = wait_curto.until(EC.element_to_be_clickable((By.LINK_TEXT, "Ir para produto")))
+                    ctx.log("➡️  Página de afiliado encontrada. Clicando...")
+                    botao_ir.click()
+                    # Espera a página de afiliado sair de cena em vez de um sleep fixo
+                    wait.until(EC.staleness_of(botao_ir))
+                except TimeoutException:
+                    ctx.log("ℹ️  Assumindo que já estamos na página final.")
+
             try:
-                wait_curto = WebDriverWait(driver, 3)
-                botao_ir = wait_curto.until(EC.element_to_be_clickable((By.LINK_TEXT, "Ir para produto")))
-                print("  ➡️  Página de afiliado encontrada. Clicando...")
-                botao_ir.click()
-                time.sleep(2) # Espera extra para a página de destino carregar
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-container")))
             except TimeoutException:
-                print("  ℹ️  Assumindo que já estamos na página final.")
-            
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-container")))
-            
-            # --- PONTO-CHAVE: SALVANDO O HTML ---
-            html_content = driver.page_source
-            html_filename = HTML_DEBUG_PATH / f"meli_page_{i+1}.html"
-            html_filename.write_text(html_content, encoding='utf-8')
-            print(f"  📄 HTML da página final salvo em: {html_filename}")
-            
-            # --- USANDO O LLAMA PARA LER O HTML SALVO ---
-            dados_do_produto = extrair_dados_com_llama(html_content)
+                verificar_bloqueio(driver.current_url, driver.page_source)
+                raise
 
-            if not dados_do_produto or not dados_do_produto.get("nome"):
-                print("  ❌ Llama não conseguiu extrair os dados. Pulando este link.")
-                continue
+        # --- PONTO-CHAVE: SALVANDO O HTML ---
+        self.html_debug_path.mkdir(exist_ok=True, parents=True)
+        html_content = driver.page_source
+        html_filename = self.html_debug_path / f"meli_page_{indice+1}.html"
+        html_filename.write_text(html_content, encoding='utf-8')
+        ctx.log(f"📄 HTML da página final salvo em: {html_filename}")
 
+        # A extração de imagem continua sendo feita com Selenium, que é mais rápido e direto
+        img_url = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-gallery__figure__image"))).get_attribute("src")
+
+        def montar(dados_do_produto):
+            if not dados_do_produto or not dados_do_produto.get("nome"):
+                # Sem marcar a URL como concluída: uma execução com --resume tenta de novo
+                raise ValueError("Llama não conseguiu extrair os dados")
             nome = dados_do_produto.get("nome")
             preco = dados_do_produto.get("preco")
             preco_de = dados_do_produto.get("preco_original")
-
-            # A extração de imagem continua sendo feita com Selenium/BS4, que é mais rápido e direto
-            img_url = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-pdp-gallery__figure__image"))).get_attribute("src")
-            safe_name = sanitize_filename(nome)
-            img_path = IMAGES_PATH / f"{safe_name}.jpeg"
-            
-            if img_url:
-                # Lógica de download da imagem... (sem alterações)
-                pass
-
-            if preco_de:
-                msg = (f"**{nome}**\n\nDe: ~{preco_de}~\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{url}")
-            else:
-                msg = (f"**{nome}**\n\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{url}")
-
-            resultados_finais.append({
-                "nome": nome, "preco": preco, "preco_original": preco_de, "imagem": str(img_path), "mensagem": msg
-            })
-            print(f"  ✅ Sucesso via Llama: {nome}")
-
-        except Exception as e:
-            print(f"  ❌ Erro GERAL ao processar {url}: {e}")
-        
-        time.sleep(random.uniform(1, 3))
-
-    driver.quit()
-
-    OUTPUT_JSON_FILE.write_text(json.dumps(resultados_finais, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"\n\n--- ETAPA FINALIZADA: {len(resultados_finais)} produtos salvos em {OUTPUT_JSON_FILE} ---")
+            registro = montar_registro(nome, preco, preco_de, url, self.mostrar_desconto)
+            ctx.log(f"✅ Sucesso via Llama: {nome}")
+            return [(registro, img_url)]
+
+        # --- USANDO O LLAMA PARA LER O HTML (em segundo plano) ---
+        ctx.log("🧠 Enviando HTML para o Llama para análise...")
+        return self.cliente.enviar(podar_para_llama(html_content, ctx.prefixo), montar)
+
+    def fechar(self):
+        with self._lock:
+            if self._cliente is not None:
+                self._cliente.fechar()
+                self._cliente = None
+
+def process_links_meli_com_llama(retomar=False, ollama_host=None, concorrentes=LLAMA_CONCORRENTES,
+                                 janela_duplicados=JANELA_DUPLICADOS):
+    print("--- INICIANDO ETAPA: Coleta de Dados do Mercado Livre com Llama e HTML ---")
+    adaptador = AdaptadorMeliLlama(ollama_host=ollama_host, max_concorrentes=concorrentes)
+    return executar_site(adaptador, retomar=retomar, janela_duplicados=janela_duplicados)
 
 if __name__ == "__main__":
-    process_links_meli_com_llama()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Coleta de dados do Mercado Livre com Llama")
+    parser.add_argument("--resume", action="store_true",
+                        help="Pula as URLs que já estão no journal da execução anterior")
+    parser.add_argument("--ollama-host", default=None,
+                        help="Endereço do servidor Ollama (padrão: OLLAMA_HOST ou http://localhost:11434)")
+    parser.add_argument("--concorrentes", type=int, default=LLAMA_CONCORRENTES,
+                        help=f"Chamadas simultâneas ao Ollama (padrão: {LLAMA_CONCORRENTES}, ou LLAMA_CONCORRENTES)")
+    parser.add_argument("--janela-duplicados", type=float, default=JANELA_DUPLICADOS, metavar="HORAS",
+                        help=f"Não coleta de novo um produto enviado há menos de HORAS (padrão: {JANELA_DUPLICADOS:g}, ou JANELA_DUPLICADOS; 0 desliga)")
+    args = parser.parse_args()
+    process_links_meli_com_llama(retomar=args.resume, ollama_host=args.ollama_host, concorrentes=args.concorrentes,
+                                 janela_duplicados=args.janela_duplicados)
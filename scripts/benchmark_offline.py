@@ -0,0 +1,437 @@
+# Arquivo: scripts/benchmark_offline.py
+# Benchmark dos scrapers sem depender dos sites ao vivo. Um servidor HTTP
+# local serve um corpus de páginas gravadas (produto do Mercado Livre e da
+# Amazon, listas de ofertas da Shopee), imagens de mentira no lugar das do
+# CDN, redirects no papel dos links curtos e um /api/chat que imita o Ollama
+# (para o llama-meli, que usa o corpus do meli). Cada scraper roda contra
+# esse servidor com o executor de sempre e o resultado vai para um JSON em
+# benchmark/resultados, para comparar execuções ao longo do tempo.
+#
+# Além do tempo total de cada fase do executor, o resultado guarda p50/p95
+# por etapa (navegar, extrair, imagem, llm...) dos spans do metricas.py
+# (vazio com METRICAS=0).
+#
+# A passada cronometrada mede só o RSS (psutil). O pico do heap Python
+# (tracemalloc, que deixa cada alocação mais lenta) sai de uma segunda
+# passada sem cronômetro, com --heap.
+#
+# Corpus em benchmark/corpus/<site>/*.html:
+#   python scripts/benchmark_offline.py importar              (output/debug_html do llama-meli)
+#   python scripts/benchmark_offline.py gravar --site amazon URL...
+#
+# Execução e comparação:
+#   python scripts/benchmark_offline.py rodar --sites meli amazon --paginas 40
+#   python scripts/benchmark_offline.py rodar --sites llama-meli --latencia-llm 800 --heap
+#   python scripts/benchmark_offline.py comparar benchmark/resultados/A.json benchmark/resultados/B.json
+
+import io
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PIL import Image
+
+try:
+    import psutil
+    TEM_PSUTIL = True
+except ImportError:
+    TEM_PSUTIL = False
+
+import core_scraper
+import resolver_links
+import metricas
+from core_scraper import BASE_DIR, executar_site, criar_driver
+from pipeline_imagens import PipelineImagens
+from preparar_imagens import PreparadorImagens
+from resolver_links import ResolvedorLinks
+from rodar_todos import carregar_adaptador
+
+BENCHMARK_PATH = BASE_DIR / "benchmark"
+CORPUS_PATH = BENCHMARK_PATH / "corpus"
+RESULTADOS_PATH = BENCHMARK_PATH / "resultados"
+HTML_DEBUG_PATH = BASE_DIR / "output" / "debug_html"
+
+SITES_BENCHMARK = ("meli", "amazon", "shopee", "llama-meli")
+# Sites que reaproveitam o corpus de outro
+CORPUS_DO_SITE = {"llama-meli": "meli"}
+PORTA_PADRAO = 8765
+# Hosts de imagem reescritos para o servidor local: nada sai para a internet
+RE_HOST_IMAGEM = re.compile(r"https?://((?:[a-z0-9-]+\.)*(?:media-amazon\.com|mlstatic\.com|susercontent\.com))/", re.IGNORECASE)
+
+class ServidorFixtures(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cliente fechando a conexão keep-alive no meio não é erro do benchmark
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+# -------------------------------------------------------------------
+# Servidor de fixtures
+#   /<site>/<arquivo>          -> página do corpus (hosts de imagem reescritos)
+#   /curto/<site>/<arquivo>    -> 302 para a página (papel do link curto)
+#   /img/<host>/<caminho>      -> JPEG de mentira
+#   POST /api/chat             -> resposta no formato do Ollama (nome do <h1>)
+# -------------------------------------------------------------------
+def imagem_de_mentira():
+    saida = io.BytesIO()
+    Image.new("RGB", (800, 800), (230, 230, 230)).save(saida, "JPEG", quality=85)
+    return saida.getvalue()
+
+def resposta_llama(corpo):
+    """Imita o /api/chat do Ollama: devolve o JSON que o modelo extrairia,
+    com o nome tirado do <h1> do HTML que veio no prompt."""
+    pedido = json.loads(corpo or b"{}")
+    prompt = "".join(m.get("content", "") for m in pedido.get("messages", []))
+    titulo = re.search(r"<h1[^>]*>(.*?)</h1>", prompt, re.DOTALL)
+    nome = " ".join(re.sub(r"<[^>]+>", " ", titulo.group(1)).split()) if titulo else "Produto do benchmark"
+    dados = {"nome": nome, "preco": "R$ 99,90", "preco_original": "R$ 129,90"}
+    return json.dumps({
+        "model": pedido.get("model"), "created_at": datetime.now().isoformat(), "done": True,
+        "message": {"role": "assistant", "content": json.dumps(dados, ensure_ascii=False)},
+    }).encode("utf-8")
+
+def criar_servidor(porta, corpus=None, latencia=0.0, latencia_llm=0.0):
+    corpus = corpus or CORPUS_PATH
+    imagem = imagem_de_mentira()
+    paginas = {}
+    base = f"http://127.0.0.1:{porta}/img/"
+
+    def pagina(site, arquivo):
+        chave = (site, arquivo)
+        if chave not in paginas:
+            caminho = corpus / site / arquivo
+            if not caminho.is_file():
+                return None
+            html = caminho.read_text(encoding="utf-8", errors="ignore")
+            paginas[chave] = RE_HOST_IMAGEM.sub(lambda m: base + m.group(1) + "/", html).encode("utf-8")
+        return paginas[chave]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _responder(self, status, corpo=b"", tipo="text/html; charset=utf-8", extras=None):
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            for nome, valor in (extras or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if latencia:
+                time.sleep(latencia)
+            partes = urlparse(self.path).path.strip("/").split("/")
+            if partes[0] == "img":
+                self._responder(200, imagem, "image/jpeg", {"Cache-Control": "max-age=3600"})
+            elif partes[0] == "curto" and len(partes) == 3:
+                self._responder(302, extras={"Location": f"http://127.0.0.1:{porta}/{partes[1]}/{partes[2]}"})
+            elif len(partes) == 2 and pagina(*partes) is not None:
+                self._responder(200, pagina(*partes))
+            else:
+                self._responder(404, b"nao encontrado")
+
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if urlparse(self.path).path != "/api/chat":
+                self._responder(404, b"nao encontrado")
+                return
+            if latencia_llm:
+                time.sleep(latencia_llm)
+            self._responder(200, resposta_llama(corpo), "application/json")
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ServidorFixtures(("127.0.0.1", porta), Handler)
+
+# -------------------------------------------------------------------
+# Corpus
+# -------------------------------------------------------------------
+def importar_debug_html():
+    destino = CORPUS_PATH / "meli"
+    destino.mkdir(exist_ok=True, parents=True)
+    arquivos = sorted(HTML_DEBUG_PATH.glob("meli_page_*.html"))
+    for arquivo in arquivos:
+        shutil.copy2(arquivo, destino / arquivo.name)
+    print(f"✅ {len(arquivos)} páginas importadas de {HTML_DEBUG_PATH} para {destino}")
+
+def gravar_paginas(site, urls, espera=5, rolagens=5):
+    """Grava o HTML já renderizado pelo Chrome (as listas da Shopee só têm
+    os cards depois do JavaScript e da rolagem)."""
+    destino = CORPUS_PATH / site
+    destino.mkdir(exist_ok=True, parents=True)
+    driver = criar_driver()
+    try:
+        for i, url in enumerate(urls, start=len(list(destino.glob("*.html"))) + 1):
+            driver.get(url)
+            time.sleep(espera)
+            for _ in range(rolagens):
+                driver.execute_script("window.scrollBy(0, window.innerHeight);")
+                time.sleep(1)
+            caminho = destino / f"{site}_{i}.html"
+            caminho.write_text(driver.page_source, encoding="utf-8")
+            print(f"  📄 {url} -> {caminho}")
+    finally:
+        driver.quit()
+
+# -------------------------------------------------------------------
+# Execução
+# -------------------------------------------------------------------
+class MedidorMemoria:
+    """Pico de memória: com psutil, RSS do processo somado ao dos filhos
+    (chromedriver e Chrome); com `heap`, também o heap Python (tracemalloc),
+    que pesa no tempo e por isso fica fora da passada cronometrada."""
+
+    def __init__(self, intervalo=0.2, heap=False):
+        self.intervalo = intervalo
+        self.heap = heap
+        self.pico_rss = 0
+        self.pico_python = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _rss_total(self):
+        processo = psutil.Process()
+        total = processo.memory_info().rss
+        for filho in processo.children(recursive=True):
+            try:
+                total += filho.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico_rss = max(self.pico_rss, self._rss_total())
+
+    def __enter__(self):
+        if self.heap:
+            tracemalloc.start()
+        if TEM_PSUTIL:
+            self._thread = threading.Thread(target=self._amostrar, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+        if self.heap:
+            _, self.pico_python = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return False
+
+    def resultado(self):
+        return {"pico_python_mb": round(self.pico_python / 1024 / 1024, 1) if self.pico_python is not None else None,
+                "pico_rss_mb": round(self.pico_rss / 1024 / 1024, 1) if TEM_PSUTIL else None}
+
+def montar_links(site, porta, paginas):
+    """URLs do corpus repetidas até `paginas`; uma em cada duas passa pelo link curto."""
+    site = CORPUS_DO_SITE.get(site, site)
+    arquivos = sorted(p.name for p in (CORPUS_PATH / site).glob("*.html"))
+    if not arquivos:
+        return []
+    links = []
+    for i in range(paginas):
+        arquivo = arquivos[i % len(arquivos)]
+        host, prefixo = ("localhost", f"curto/{site}") if i % 2 else ("127.0.0.1", site)
+        links.append(f"http://{host}:{porta}/{prefixo}/{arquivo}?copia={i}")
+    return links
+
+def resumir_workers(workers):
+    caminhos, carga = {}, {"paginas": 0, "segundos": 0.0, "bytes": 0}
+    for stats in workers:
+        for caminho, (contagem, segundos) in stats["caminhos"].items():
+            n, s = caminhos.get(caminho, (0, 0.0))
+            caminhos[caminho] = (n + contagem, s + segundos)
+        for campo in carga:
+            carga[campo] += stats["carga"][campo]
+    return {
+        "caminhos": {c: {"urls": n, "media_s": round(s / n, 3)} for c, (n, s) in caminhos.items()},
+        "erros": sum(s["erros"] for s in workers),
+        "carga_media_s": round(carga["segundos"] / carga["paginas"], 3) if carga["paginas"] else None,
+    }
+
+def executar_passada(site, porta, pasta, workers=None, heap=False):
+    """Uma execução completa do site, com imagens, cache do resolvedor e (no
+    llama-meli) cache do modelo novos em `pasta`. Devolve (resumo, segundos, memória)."""
+    adaptador = carregar_adaptador(site)
+    # O servidor local não tem rate limit
+    adaptador.intervalo = (0.001, 0.001)
+    if site == "shopee":
+        adaptador.modo = "dom"
+    if site == "llama-meli":
+        adaptador.ollama_host = f"http://127.0.0.1:{porta}"
+        adaptador.cache_path = pasta / "llama"
+        adaptador.html_debug_path = pasta / "debug_html"
+
+    (pasta / "imagens").mkdir(parents=True, exist_ok=True)
+    with MedidorMemoria(heap=heap) as memoria, \
+            PipelineImagens(pasta / "imagens") as pipeline, \
+            PreparadorImagens(pasta / "imagens") as preparador:
+        resolvedor = ResolvedorLinks(pasta / "links_resolvidos.json")
+        inicio = time.perf_counter()
+        resumo = executar_site(adaptador, workers=workers, pipeline=pipeline, resolvedor=resolvedor,
+                               filtrar_precos=False, preparador=preparador, janela_duplicados=0)
+        ponta_a_ponta = time.perf_counter() - inicio
+    return resumo, ponta_a_ponta, memoria
+
+def rodar_site(site, porta, paginas, pasta, workers=None, heap=False):
+    links = montar_links(site, porta, paginas)
+    if not links:
+        print(f"  ⚠️ [{site}] Corpus vazio em {CORPUS_PATH / CORPUS_DO_SITE.get(site, site)}. Pulando.")
+        return None
+    arquivo_links = carregar_adaptador(site).arquivo_links
+    (core_scraper.INPUT_LINKS_PATH / arquivo_links).write_text("\n".join(links), encoding="utf-8")
+
+    # Percentis por etapa (navegar, extrair, imagem, llm...) só da passada cronometrada
+    metricas.limpar(site)
+    resumo, ponta_a_ponta, memoria = executar_passada(site, porta, pasta / site, workers)
+    if not resumo:
+        return None
+    spans = metricas.percentis(site)
+    memoria = memoria.resultado()
+    if heap:
+        print(f"\n  🧮 [{site}] Passada extra, fora do cronômetro, para o pico do heap Python...")
+        _, _, memoria_heap = executar_passada(site, porta, pasta / f"{site}_heap", workers, heap=True)
+        memoria["pico_python_mb"] = memoria_heap.resultado()["pico_python_mb"]
+
+    return {
+        "urls": resumo["urls"],
+        "produtos": resumo["produtos"],
+        "ponta_a_ponta_s": round(ponta_a_ponta, 2),
+        "paginas_por_minuto": round(resumo["urls"] / ponta_a_ponta * 60, 1) if ponta_a_ponta else None,
+        "etapas_s": {etapa: round(s, 3) for etapa, s in resumo["etapas"].items()},
+        "spans": spans,
+        **resumir_workers(resumo["workers"]),
+        "memoria": memoria,
+    }
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def rodar(args):
+    # Tudo o que os scrapers gravam vai para uma pasta temporária
+    pasta = Path(tempfile.mkdtemp(prefix="benchmark_"))
+    core_scraper.INPUT_LINKS_PATH = pasta / "input_links"
+    core_scraper.OUTPUT_JSON_PATH = pasta / "mensagens_json"
+    core_scraper.IMAGES_PATH = pasta / "imagens"
+    core_scraper.INPUT_LINKS_PATH.mkdir(parents=True)
+    # O host "localhost" faz o papel de encurtador de links
+    resolver_links.DOMINIOS_ENCURTADOS += (f"localhost:{args.porta}",)
+
+    servidor = criar_servidor(args.porta, latencia=args.latencia / 1000, latencia_llm=args.latencia_llm / 1000)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    print(f"🧪 Servidor de fixtures em http://127.0.0.1:{args.porta} "
+          f"(latência {args.latencia} ms, modelo {args.latencia_llm} ms)")
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "paginas": args.paginas,
+        "latencia_ms": args.latencia,
+        "latencia_llm_ms": args.latencia_llm,
+        "sites": {},
+    }
+    try:
+        for site in args.sites:
+            print(f"\n=== {site} ===")
+            resultado["sites"][site] = rodar_site(site, args.porta, args.paginas, pasta, args.workers, args.heap)
+    finally:
+        servidor.shutdown()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    RESULTADOS_PATH.mkdir(exist_ok=True, parents=True)
+    destino = RESULTADOS_PATH / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    destino.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print("\n--- RESULTADO DO BENCHMARK ---")
+    for site, r in resultado["sites"].items():
+        if r:
+            print(f"  {site}: {r['urls']} páginas em {r['ponta_a_ponta_s']}s -> {r['paginas_por_minuto']} páginas/min | "
+                  f"etapas {r['etapas_s']} | erros {r['erros']} | memória {r['memoria']}")
+            if r["spans"]:
+                print("    p50/p95: " + " | ".join(f"{etapa} {p['p50_s']:.3f}/{p['p95_s']:.3f}s"
+                                                  for etapa, p in r["spans"].items()))
+    print(f"  Salvo em {destino}")
+
+def comparar(caminho_a, caminho_b):
+    a = json.loads(Path(caminho_a).read_text(encoding="utf-8"))
+    b = json.loads(Path(caminho_b).read_text(encoding="utf-8"))
+    print(f"--- {caminho_a} ({a.get('commit')}) -> {caminho_b} ({b.get('commit')}) ---")
+
+    def linha(nome, antes, depois, menor_melhor=True):
+        if antes is None or depois is None:
+            return
+        variacao = (depois - antes) / antes if antes else 0.0
+        melhorou = variacao < 0 if menor_melhor else variacao > 0
+        marca = "✅" if melhorou and abs(variacao) >= 0.05 else ("⚠️" if abs(variacao) >= 0.05 else "  ")
+        print(f"  {marca} {nome:<28} {antes:>10} -> {depois:<10} ({variacao:+.0%})")
+
+    for site in sorted(set(a["sites"]) & set(b["sites"])):
+        ra, rb = a["sites"][site], b["sites"][site]
+        if not ra or not rb:
+            continue
+        print(f"\n[{site}]")
+        linha("ponta a ponta (s)", ra["ponta_a_ponta_s"], rb["ponta_a_ponta_s"])
+        linha("páginas/min", ra["paginas_por_minuto"], rb["paginas_por_minuto"], menor_melhor=False)
+        for etapa in ra["etapas_s"]:
+            linha(f"etapa {etapa} (s)", ra["etapas_s"][etapa], rb["etapas_s"].get(etapa))
+        # Resultados gravados antes dos percentis não têm "spans"
+        spans_b = rb.get("spans", {})
+        for etapa, pa in ra.get("spans", {}).items():
+            for p in ("p50_s", "p95_s"):
+                linha(f"{etapa} {p[:3]} (s)", pa[p], spans_b.get(etapa, {}).get(p))
+        linha("pico heap Python (MB)", ra["memoria"]["pico_python_mb"], rb["memoria"]["pico_python_mb"])
+        linha("pico RSS (MB)", ra["memoria"]["pico_rss_mb"], rb["memoria"]["pico_rss_mb"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline dos scrapers com corpus gravado")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("importar", help="Copia output/debug_html/meli_page_*.html para o corpus")
+
+    p_gravar = sub.add_parser("gravar", help="Grava páginas ao vivo no corpus")
+    p_gravar.add_argument("--site", choices=[s for s in SITES_BENCHMARK if s not in CORPUS_DO_SITE], required=True)
+    p_gravar.add_argument("urls", nargs="+")
+
+    p_rodar = sub.add_parser("rodar", help="Roda os scrapers contra o servidor de fixtures")
+    p_rodar.add_argument("--sites", nargs="+", choices=SITES_BENCHMARK, default=list(SITES_BENCHMARK))
+    p_rodar.add_argument("--paginas", type=int, default=20, help="Páginas por site (o corpus é repetido)")
+    p_rodar.add_argument("--workers", type=int, default=None, help="Workers por site (padrão: o do adaptador)")
+    p_rodar.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    p_rodar.add_argument("--latencia", type=float, default=0.0, help="Latência artificial por resposta, em ms")
+    p_rodar.add_argument("--latencia-llm", type=float, default=0.0,
+                         help="Tempo artificial de cada resposta do Ollama falso (llama-meli), em ms")
+    p_rodar.add_argument("--heap", action="store_true",
+                         help="Roda cada site de novo, sem cronômetro, para medir o pico do heap Python (tracemalloc)")
+
+    p_comparar = sub.add_parser("comparar", help="Compara dois resultados")
+    p_comparar.add_argument("antes")
+    p_comparar.add_argument("depois")
+
+    args = parser.parse_args()
+    if args.comando == "importar":
+        importar_debug_html()
+    elif args.comando == "gravar":
+        gravar_paginas(args.site, args.urls)
+    elif args.comando == "rodar":
+        rodar(args)
+    else:
+        comparar(args.antes, args.depois)
@@ -0,0 +1,94 @@
+# Arquivo: scripts/benchmark_parser.py
+# Micro-benchmark da leitura de HTML em páginas salvas (Ctrl+S no
+# navegador ou page_source gravado em arquivo). Compara o jeito antigo
+# (html.parser, a página da Amazon lida duas vezes) com cada backend do
+# parser_html.py, medindo leitura + extração. A extração é a mesma função
+# em todos os casos: a diferença medida é só a da leitura.
+#
+#   python scripts/benchmark_parser.py --amazon paginas/amazon/*.html --shopee paginas/shopee/*.html
+
+import time
+import argparse
+import statistics
+import importlib.util
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+from parser_html import parse_html, TEM_LXML, TEM_SELECTOLAX
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+def carregar_script(nome_arquivo, nome_modulo):
+    spec = importlib.util.spec_from_file_location(nome_modulo, SCRIPTS_DIR / nome_arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def backends_disponiveis():
+    backends = ["html.parser"]
+    if TEM_LXML:
+        backends.append("lxml")
+    if TEM_SELECTOLAX:
+        backends.append("selectolax")
+    return backends
+
+def casos_amazon(html):
+    amazon = carregar_script("2_scraper_amazon.py", "scraper_amazon")
+
+    extrair = amazon.extrair_da_soup
+
+    def antigo():
+        # A página inteira lida duas vezes (antes e depois do cupom)
+        BeautifulSoup(html, "html.parser")
+        extrair(BeautifulSoup(html, "html.parser"))
+
+    casos = {"antigo (html.parser x2)": antigo}
+    for backend in backends_disponiveis():
+        casos[backend] = lambda b=backend: extrair(parse_html(html, recortes=amazon.RECORTES_AMAZON, parser=b))
+    return casos
+
+def casos_shopee(html):
+    shopee = carregar_script("3_scraper_shopee.py", "scraper_shopee")
+
+    def extrair(soup):
+        return [shopee.extrair_card(c) for c in soup.select(shopee.SELETOR_CARD)]
+
+    casos = {"antigo (html.parser)": lambda: extrair(BeautifulSoup(html, "html.parser"))}
+    for backend in backends_disponiveis():
+        casos[backend] = lambda b=backend: extrair(parse_html(html, recortes=(shopee.SELETOR_CARD,), parser=b))
+    return casos
+
+def rodar(tipo, caminhos, montar_casos, repeticoes):
+    totais = {}
+    for caminho in caminhos:
+        html = Path(caminho).read_text(encoding="utf-8", errors="ignore")
+        print(f"\n[{tipo}] {caminho} ({len(html) / 1024 / 1024:.1f} MB)")
+        for nome, funcao in montar_casos(html).items():
+            segundos = medir(funcao, repeticoes)
+            totais[nome] = totais.get(nome, 0.0) + segundos
+            print(f"  {nome:<24} {segundos * 1000:8.1f} ms")
+    if totais:
+        base = next(iter(totais.values()))
+        print(f"\n--- {tipo}: total em {len(caminhos)} páginas ---")
+        for nome, segundos in totais.items():
+            print(f"  {nome:<24} {segundos * 1000:8.1f} ms  ({base / segundos:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara os backends de leitura de HTML em páginas salvas")
+    parser.add_argument("--amazon", nargs="*", default=[], help="Páginas de produto da Amazon salvas")
+    parser.add_argument("--shopee", nargs="*", default=[], help="Listas de ofertas da Shopee salvas")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições por caso (vale a mediana)")
+    args = parser.parse_args()
+
+    if not args.amazon and not args.shopee:
+        parser.error("Informe páginas com --amazon e/ou --shopee")
+    rodar("amazon", args.amazon, casos_amazon, args.repeticoes)
+    rodar("shopee", args.shopee, casos_shopee, args.repeticoes)
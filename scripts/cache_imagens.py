@@ -0,0 +1,131 @@
+# Arquivo: scripts/cache_imagens.py
+# Cache de imagens em disco, endereçado pelo hash da URL (e, se ativado,
+# pelo hash do conteúdo). Evita baixar de novo a mesma imagem a cada
+# execução e acaba com as colisões de nomes truncados em 50 caracteres.
+#
+# Estrutura em output/imagens_produtos:
+#   <hash>.jpeg          -> imagem convertida para JPEG
+#   _cache_index.json    -> url_hash -> {url, arquivo, etag, last_modified, ...}
+
+import json
+import time
+import hashlib
+import threading
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+
+INDEX_FILENAME = "_cache_index.json"
+
+# Depois desse tempo a imagem é revalidada com ETag/If-Modified-Since
+REVALIDAR_APOS_SEGUNDOS = 24 * 3600
+# Limites padrão para a limpeza do cache
+MAX_BYTES_PADRAO = 500 * 1024 * 1024
+MAX_IDADE_DIAS_PADRAO = 30
+
+def hash_texto(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+class CacheImagens:
+    def __init__(self, pasta, por_conteudo=False, revalidar_apos=REVALIDAR_APOS_SEGUNDOS):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(exist_ok=True, parents=True)
+        self.por_conteudo = por_conteudo
+        self.revalidar_apos = revalidar_apos
+        self.index_path = self.pasta / INDEX_FILENAME
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidados": 0, "baixados": 0}
+        try:
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def _entrada_valida(self, url):
+        chave = hash_texto(url)
+        with self.lock:
+            entrada = self.index.get(chave)
+        if entrada and (self.pasta / entrada["arquivo"]).exists():
+            return chave, entrada
+        return chave, None
+
+    def _salvar_conteudo(self, chave, conteudo):
+        nome = f"{hashlib.sha256(conteudo).hexdigest()[:32]}.jpeg" if self.por_conteudo else f"{chave}.jpeg"
+        destino = self.pasta / nome
+        if not destino.exists():
+            tmp = destino.with_name(f"{destino.stem}.{threading.get_ident()}.tmp")
+            Image.open(BytesIO(conteudo)).convert("RGB").save(tmp, "JPEG")
+            tmp.replace(destino)
+        return nome
+
+    def obter(self, url, session, timeout=15):
+        """Retorna o caminho local da imagem, baixando ou revalidando só quando necessário."""
+        chave, entrada = self._entrada_valida(url)
+        agora = time.time()
+
+        if entrada and agora - entrada.get("validado_em", 0) < self.revalidar_apos:
+            with self.lock:
+                entrada["acessado_em"] = agora
+                self.stats["hits"] += 1
+            return str(self.pasta / entrada["arquivo"])
+
+        headers = {}
+        if entrada:
+            if entrada.get("etag"):
+                headers["If-None-Match"] = entrada["etag"]
+            if entrada.get("last_modified"):
+                headers["If-Modified-Since"] = entrada["last_modified"]
+
+        response = session.get(url, timeout=timeout, headers=headers)
+        if entrada and response.status_code == 304:
+            with self.lock:
+                entrada["validado_em"] = entrada["acessado_em"] = agora
+                self.stats["revalidados"] += 1
+            return str(self.pasta / entrada["arquivo"])
+
+        response.raise_for_status()
+        nome = self._salvar_conteudo(chave, response.content)
+        with self.lock:
+            self.index[chave] = {
+                "url": url,
+                "arquivo": nome,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "bytes": (self.pasta / nome).stat().st_size,
+                "validado_em": agora,
+                "acessado_em": agora,
+            }
+            self.stats["baixados"] += 1
+        return str(self.pasta / nome)
+
+    def limpar(self, max_bytes=MAX_BYTES_PADRAO, max_idade_dias=MAX_IDADE_DIAS_PADRAO):
+        """Remove entradas antigas e depois as menos usadas até caber em max_bytes."""
+        limite_idade = time.time() - max_idade_dias * 86400
+        with self.lock:
+            entradas = sorted(self.index.items(), key=lambda kv: kv[1].get("acessado_em", 0))
+            em_uso = {}
+            for chave, entrada in entradas:
+                em_uso[entrada["arquivo"]] = em_uso.get(entrada["arquivo"], 0) + 1
+
+            total = sum(e.get("bytes", 0) for e in {e["arquivo"]: e for _, e in entradas}.values())
+            removidas = 0
+            for chave, entrada in entradas:
+                if entrada.get("acessado_em", 0) >= limite_idade and total <= max_bytes:
+                    break
+                del self.index[chave]
+                removidas += 1
+                em_uso[entrada["arquivo"]] -= 1
+                # Com cache por conteúdo, várias URLs podem apontar para o mesmo arquivo
+                if em_uso[entrada["arquivo"]] == 0:
+                    (self.pasta / entrada["arquivo"]).unlink(missing_ok=True)
+                    total -= entrada.get("bytes", 0)
+
+        if removidas:
+            print(f"  🧹 Cache de imagens: {removidas} entradas removidas ({total / 1024 / 1024:.1f} MB em uso).")
+        return removidas
+
+    def salvar_index(self):
+        with self.lock:
+            conteudo = json.dumps(self.index, ensure_ascii=False, indent=2)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(conteudo, encoding="utf-8")
+        tmp.replace(self.index_path)
@@ -0,0 +1,134 @@
+# Arquivo: scripts/cliente_llama.py
+# Camada entre os scrapers e o Ollama: cache das respostas em disco e
+# chamadas concorrentes limitadas, para o Chrome já ir abrindo a página
+# seguinte enquanto o modelo analisa a anterior.
+#
+# A chave do cache é o hash de (modelo, versão do prompt, HTML podado): a
+# mesma página coletada de novo não volta para o modelo. Quando o prompt
+# mudar, suba a versão para invalidar as respostas antigas.
+#
+# O host é configurável (ou OLLAMA_HOST), então dá para apontar o cliente
+# para um servidor falso que imita o /api/chat do Ollama.
+
+import re
+import json
+import time
+import hashlib
+import threading
+import ollama
+from concurrent.futures import ThreadPoolExecutor
+
+import metricas
+
+MODELO_PADRAO = "llama3"
+
+def interpretar_resposta(resposta_texto):
+    """Pega o primeiro objeto JSON da resposta do modelo, ou None."""
+    match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
+class ClienteLlama:
+    def __init__(self, cache_path, montar_prompt, versao_prompt, modelo=MODELO_PADRAO, host=None,
+                 max_concorrentes=2, opcoes=None):
+        self.cache_path = cache_path
+        self.montar_prompt = montar_prompt
+        self.versao_prompt = versao_prompt
+        self.modelo = modelo
+        self.opcoes = opcoes if opcoes is not None else {"temperature": 0.0}
+        self.client = ollama.Client(host=host)
+        # O executor é o limite de chamadas simultâneas ao servidor
+        self.executor = ThreadPoolExecutor(max_workers=max_concorrentes, thread_name_prefix="llama")
+        self.lock = threading.Lock()
+        self.stats = {"cache": 0, "chamadas": 0, "falhas": 0, "tempo_modelo": 0.0}
+        self.cache_path.mkdir(exist_ok=True, parents=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def _chave(self, html_podado):
+        base = f"{self.modelo}\n{self.versao_prompt}\n{html_podado}"
+        return hashlib.sha256(base.encode("utf-8")).hexdigest()[:32]
+
+    def _do_cache(self, chave):
+        try:
+            return json.loads((self.cache_path / f"{chave}.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _salvar_no_cache(self, chave, dados):
+        # Um arquivo por resposta: gravação atômica e sem disputa entre threads
+        destino = self.cache_path / f"{chave}.json"
+        tmp = destino.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(destino)
+
+    def _contar(self, campo, valor=1):
+        with self.lock:
+            self.stats[campo] += valor
+
+    def extrair(self, html_podado):
+        """Chamada bloqueante: devolve o JSON extraído pelo modelo ou None."""
+        with metricas.etapa("llm") as span:
+            dados, span.resultado = self._extrair(html_podado)
+        return dados
+
+    def _extrair(self, html_podado):
+        chave = self._chave(html_podado)
+        dados = self._do_cache(chave)
+        if dados is not None:
+            self._contar("cache")
+            print("  ♻️  Resposta do Llama reaproveitada do cache.")
+            return dados, "cache"
+
+        inicio = time.perf_counter()
+        try:
+            response = self.client.chat(
+                model=self.modelo,
+                messages=[{'role': 'user', 'content': self.montar_prompt(html_podado)}],
+                options=self.opcoes,
+            )
+        except Exception as e:
+            self._contar("falhas")
+            print(f"  ❌ ERRO: Falha ao se comunicar com a API do Ollama: {e}")
+            return None, type(e).__name__
+        finally:
+            self._contar("tempo_modelo", time.perf_counter() - inicio)
+        self._contar("chamadas")
+
+        resposta_texto = response['message']['content']
+        dados = interpretar_resposta(resposta_texto)
+        if dados is None:
+            self._contar("falhas")
+            print(f"  ❌ ERRO: Nenhum JSON encontrado na resposta do Llama: {resposta_texto}")
+            return None, "sem_json"
+        # Só respostas válidas vão para o cache; falhas são tentadas de novo
+        self._salvar_no_cache(chave, dados)
+        print("  ✅ Llama retornou os dados com sucesso.")
+        return dados, "ok"
+
+    def enviar(self, html_podado, pos_processar=None):
+        """Agenda a extração e devolve um Future; com `pos_processar`, o
+        Future tem o resultado de pos_processar(dados)."""
+        # Site e URL do worker que agendou vão junto para o span "llm"
+        campos = metricas.capturar()
+
+        def tarefa():
+            with metricas.contexto(**campos):
+                dados = self.extrair(html_podado)
+            return pos_processar(dados) if pos_processar else dados
+        return self.executor.submit(tarefa)
+
+    def fechar(self):
+        self.executor.shutdown(wait=True)
+        s = self.stats
+        print(f"  🧠 Llama: {s['chamadas']} chamadas ({s['tempo_modelo']:.1f}s no modelo), "
+              f"{s['cache']} do cache, {s['falhas']} falhas")
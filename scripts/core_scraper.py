@@ -0,0 +1,741 @@
+# Arquivo: scripts/core_scraper.py
+# Núcleo compartilhado pelos scrapers: configuração do Chrome, modelo da
+# mensagem e o executor genérico que roda um site com um pool de workers,
+# journal, cache de links e etapa de imagens (a conversão de preços em BRL
+# fica em precos.py).
+#
+# Cada site só precisa implementar um AdaptadorSite com o método
+# processar(); o resto (fila, rate limit, retomada, relatório) fica aqui.
+
+import os
+import json
+import time
+import queue
+import random
+import threading
+import requests
+from pathlib import Path
+from urllib.parse import urlparse
+from collections import deque
+from concurrent.futures import Future
+
+# Importações do Selenium
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+from precos import preco_para_float, formatar_preco
+from pipeline_imagens import PipelineImagens
+from preparar_imagens import PreparadorImagens
+from journal_saida import JournalSaida
+from resolver_links import ResolvedorLinks
+from historico_precos import HistoricoPrecos, identificar_produto, LIMIAR_QUEDA_PADRAO
+from fila_mensagens import Publicador
+from fila_trabalho import TrabalhoDoSite
+import metricas
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+INPUT_LINKS_PATH = BASE_DIR / "input_links"
+IMAGES_PATH = BASE_DIR / "output" / "imagens_produtos"
+OUTPUT_JSON_PATH = BASE_DIR / "output" / "mensagens_json"
+CACHE_PATH = BASE_DIR / "output" / "cache"
+CHROMEDRIVER_PATH = BASE_DIR / "drivers" / "chromedriver.exe"
+
+HISTORICO_PRECOS_PATH = CACHE_PATH / "historico_precos.sqlite3"
+# Fila durável lida pelo enviar_whatsapp.py --fila (ver fila_mensagens.py)
+FILA_MENSAGENS_PATH = CACHE_PATH / "fila_mensagens.sqlite3"
+# Queda mínima (0.05 = 5%) desde o último envio para um produto ir de novo para o WhatsApp
+LIMIAR_QUEDA = float(os.environ.get("LIMIAR_QUEDA", LIMIAR_QUEDA_PADRAO))
+# Janela (em horas) em que um produto já enviado ao WhatsApp não é aberto de
+# novo, mesmo chegando por outro link curto ou com outra tag de afiliado. 0 desliga.
+JANELA_DUPLICADOS = float(os.environ.get("JANELA_DUPLICADOS", "6"))
+
+# Chrome compartilhado (navegador_daemon.py): com NAVEGADOR_DAEMON definido,
+# criar_driver() reserva uma aba no daemon em vez de abrir um Chrome novo
+NAVEGADOR_DAEMON_PADRAO = "127.0.0.1:9333"
+NAVEGADOR_DAEMON = os.environ.get("NAVEGADOR_DAEMON")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+
+# Bloqueio de recursos no Chrome dos scrapers: só lemos texto e o atributo
+# src da imagem (baixada depois com requests), então imagens, fontes,
+# vídeos e rastreadores são tráfego perdido. BLOQUEAR_RECURSOS=0 desliga.
+BLOQUEAR_RECURSOS = os.environ.get("BLOQUEAR_RECURSOS", "1") != "0"
+# Curingas do DevTools (Network.setBlockedURLs). Cada AdaptadorSite pode
+# acrescentar padrões (bloquear) ou tirar daqui os que o site precisa (permitir).
+# "*.jpg" só casa com a URL terminada em .jpg: cada extensão também entra
+# com "?*" para pegar as URLs de CDN com query string (foto.jpg?v=2)
+EXTENSOES_BLOQUEADAS = (
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico",
+)
+BLOQUEIO_PADRAO = tuple(p for ext in EXTENSOES_BLOQUEADAS for p in (ext, ext + "?*")) + (
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*connect.facebook.net*", "*hotjar.com*",
+    "*clarity.ms*", "*criteo.*", "*tiktok.com/i18n/pixel*", "*fls-na.amazon*",
+)
+
+# -------------------------------------------------------------------
+# Chrome
+# -------------------------------------------------------------------
+def criar_chrome_options(headless=True, log_performance=False, bloquear_imagens=False):
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    if log_performance:
+        # Eventos de rede do DevTools ficam disponíveis em driver.get_log("performance")
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if bloquear_imagens:
+        # Vale também para imagens sem extensão na URL, que os padrões não pegam
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+class DriverDaemon(webdriver.Chrome):
+    """chromedriver anexado a uma aba do daemon: quit() devolve a aba em vez
+    de fechar o navegador, que é compartilhado com os outros workers."""
+
+    def __init__(self, endereco, aba, debugger, log_performance=False):
+        options = Options()
+        options.debugger_address = debugger
+        if log_performance:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        super().__init__(service=Service(executable_path=str(CHROMEDRIVER_PATH)), options=options)
+        self.endereco = endereco
+        self.aba = aba
+        # Os handles do chromedriver são os ids dos alvos do DevTools
+        self.switch_to.window(aba)
+
+    def quit(self):
+        try:
+            requests.get(f"http://{self.endereco}/liberar", params={"aba": self.aba}, timeout=10)
+        except requests.RequestException:
+            pass
+        self.service.stop()
+
+def usar_daemon(endereco=NAVEGADOR_DAEMON_PADRAO):
+    global NAVEGADOR_DAEMON
+    NAVEGADOR_DAEMON = endereco
+
+def usar_bloqueio(ativo=True):
+    global BLOQUEAR_RECURSOS
+    BLOQUEAR_RECURSOS = ativo
+
+def aplicar_bloqueio(driver, padroes):
+    """Bloqueia as URLs que casam com os padrões na aba atual do driver."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(padroes)})
+
+# Tempo de carga da última navegação, pela Navigation Timing API. Os bytes
+# vêm do log de performance do DevTools (encodedDataLength de cada
+# Network.loadingFinished, cabeçalhos incluídos). Sem o log, ficam os da
+# Resource Timing, onde recursos de outra origem sem Timing-Allow-Origin
+# contam 0 bytes: um total por baixo.
+JS_MEDIR_CARGA = """
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (!nav) return null;
+    const recursos = performance.getEntriesByType('resource');
+    let bytes = nav.transferSize || 0;
+    for (const r of recursos) bytes += r.transferSize || 0;
+    return [performance.timeOrigin, (nav.loadEventEnd || nav.domContentLoadedEventEnd) / 1000, bytes, recursos.length];
+"""
+
+def ler_eventos_rede(driver):
+    """(método, params) dos eventos do log de performance. Ler esvazia o log:
+    os bytes de cada Network.loadingFinished ficam somados em
+    driver.carga_rede, para medir_carga() contar também o que outro leitor
+    (ex.: o modo XHR da Shopee) já consumiu."""
+    carga = driver.__dict__.setdefault("carga_rede", [0, 0])
+    for entrada in driver.get_log("performance"):
+        try:
+            mensagem = json.loads(entrada["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        metodo, params = mensagem.get("method"), mensagem.get("params", {})
+        if metodo == "Network.loadingFinished":
+            carga[0] += params.get("encodedDataLength", 0)
+            carga[1] += 1
+        yield metodo, params
+
+def medir_carga(driver):
+    """(origem, segundos, bytes, recursos) da página atual, ou None. Com o
+    log de performance ligado, bytes e recursos são os da rede desde a
+    última medição."""
+    try:
+        for _ in ler_eventos_rede(driver):
+            pass
+        rede = driver.__dict__.pop("carga_rede")
+    except WebDriverException:
+        rede = None
+    medida = driver.execute_script(JS_MEDIR_CARGA)
+    if not medida or rede is None:
+        return medida
+    return [medida[0], medida[1], *rede]
+
+def conectar_daemon(endereco, log_performance=False):
+    resp = requests.get(f"http://{endereco}/reservar", timeout=15)
+    resp.raise_for_status()
+    dados = resp.json()
+    return DriverDaemon(endereco, dados["aba"], dados["debugger"], log_performance)
+
+def criar_driver(headless=True, log_performance=False, bloquear_imagens=False):
+    """Chrome novo, ou uma aba do daemon se NAVEGADOR_DAEMON estiver definido
+    (aí `headless` e `bloquear_imagens` não valem: quem decide é o daemon, e
+    as imagens ficam só com os padrões de aplicar_bloqueio)."""
+    if NAVEGADOR_DAEMON:
+        try:
+            return conectar_daemon(NAVEGADOR_DAEMON, log_performance)
+        except requests.RequestException as e:
+            print(f"  ⚠️ Daemon do navegador indisponível em {NAVEGADOR_DAEMON} ({e}). Abrindo um Chrome próprio.")
+    service = Service(executable_path=str(CHROMEDRIVER_PATH))
+    opcoes = criar_chrome_options(headless, log_performance, bloquear_imagens and BLOQUEAR_RECURSOS)
+    return webdriver.Chrome(service=service, options=opcoes)
+
+# -------------------------------------------------------------------
+# Mensagem
+# -------------------------------------------------------------------
+def montar_mensagem(nome, preco, preco_de, link, mostrar_desconto=True):
+    if preco_de and preco_de != preco:
+        texto_desconto = ""
+        if mostrar_desconto:
+            preco_float = preco_para_float(preco)
+            preco_original_float = preco_para_float(preco_de)
+            if preco_float is not None and preco_original_float and preco_original_float > preco_float:
+                desconto = round((1 - (preco_float / preco_original_float)) * 100)
+                texto_desconto = f" ({desconto}% OFF)"
+        return f"**{nome}**\n\nDe: ~{preco_de}~\nPor apenas: {preco} !!!{texto_desconto}\n\nConfira a promo aqui:\n{link}"
+    return f"**{nome}**\n\nPor apenas: {preco} !!!\n\nConfira a promo aqui:\n{link}"
+
+def montar_registro(nome, preco, preco_de, link, mostrar_desconto=True, produto_id=None):
+    return {
+        "nome": nome, "preco": preco, "preco_original": preco_de, "imagem": None,
+        "mensagem": montar_mensagem(nome, preco, preco_de, link, mostrar_desconto),
+        "link": link,
+        # Valores numéricos e identidade do produto, usados pelo histórico de preços
+        "produto_id": produto_id or identificar_produto(link),
+        "preco_valor": preco_para_float(preco),
+        "preco_original_valor": preco_para_float(preco_de),
+    }
+
+# -------------------------------------------------------------------
+# Bloqueios: 429 e páginas de captcha/verificação. Os scrapers chamam
+# verificar_bloqueio() e o worker recua o limitador do domínio.
+# -------------------------------------------------------------------
+MARCADORES_BLOQUEIO_URL = ("/errors/validateCaptcha", "account-verification", "/verify/traffic", "/verify/captcha")
+MARCADORES_BLOQUEIO_HTML = ('action="/errors/validateCaptcha"', "api-services-support@amazon.com")
+STATUS_BLOQUEIO = (429,)
+
+class BloqueioDetectado(Exception):
+    pass
+
+def verificar_bloqueio(url, html="", status=None):
+    """Levanta BloqueioDetectado se a resposta for um 429 ou uma página de captcha/verificação."""
+    if status in STATUS_BLOQUEIO:
+        raise BloqueioDetectado(f"HTTP {status} em {url}")
+    if any(m in url for m in MARCADORES_BLOQUEIO_URL) or any(m in html for m in MARCADORES_BLOQUEIO_HTML):
+        raise BloqueioDetectado(f"Página de captcha/verificação em {url}")
+
+# -------------------------------------------------------------------
+# Rate limit por domínio: token bucket adaptativo. Começa no intervalo
+# máximo do site, acelera até o mínimo enquanto as respostas estão
+# saudáveis e recua (com pausa) a cada 429/captcha. Um limitador por
+# domínio, compartilhado por todos os workers e sites que usam o domínio;
+# se dois sites pedem intervalos diferentes, vale o mais lento de cada ponta.
+# -------------------------------------------------------------------
+class LimitadorTaxa:
+    def __init__(self, intervalo=(1, 3), capacidade=2, fator_acelerar=0.9, fator_recuar=2.0, teto=None):
+        self.minimo, self.maximo = intervalo
+        self.teto = teto or self.maximo * 8
+        self.atual = self.maximo
+        self.capacidade = capacidade
+        self.fator_acelerar = fator_acelerar
+        self.fator_recuar = fator_recuar
+        self.tokens = 1.0
+        self.atualizado = time.monotonic()
+        self.pausa_ate = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"liberados": 0, "bloqueios": 0, "espera": 0.0}
+
+    def _repor(self, agora):
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) / self.atual)
+        self.atualizado = agora
+
+    def aguardar(self, parar=None):
+        """Espera um token e devolve quantos segundos ficou esperando."""
+        inicio = time.monotonic()
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self._repor(agora)
+                if agora >= self.pausa_ate and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.stats["liberados"] += 1
+                    break
+                espera = max(self.pausa_ate - agora, (1 - self.tokens) * self.atual)
+            # Um pouco de jitter para não bater sempre no mesmo compasso
+            espera *= random.uniform(1.0, 1.2)
+            if parar is not None:
+                if parar.wait(espera):
+                    break
+            else:
+                time.sleep(espera)
+        esperado = time.monotonic() - inicio
+        with self.lock:
+            self.stats["espera"] += esperado
+        return esperado
+
+    def sucesso(self):
+        with self.lock:
+            self.atual = max(self.minimo, self.atual * self.fator_acelerar)
+
+    def endurecer(self, intervalo):
+        """Adota o intervalo mais lento entre o atual e `intervalo`. True se mudou."""
+        minimo, maximo = intervalo
+        with self.lock:
+            if minimo <= self.minimo and maximo <= self.maximo:
+                return False
+            self.minimo, self.maximo = max(self.minimo, minimo), max(self.maximo, maximo)
+            self.teto = max(self.teto, self.maximo * 8)
+            self.atual = max(self.atual, self.maximo)
+            return True
+
+    def bloqueio(self):
+        with self.lock:
+            self.atual = min(self.teto, self.atual * self.fator_recuar)
+            self.tokens = 0.0
+            self.pausa_ate = time.monotonic() + self.atual
+            self.stats["bloqueios"] += 1
+            return self.atual
+
+def dominio_de(url):
+    host = urlparse(url).netloc.lower().split(":")[0]
+    partes = host.split(".")
+    return ".".join(partes[-3:] if host.endswith(".com.br") else partes[-2:])
+
+# Uma URL bloqueada volta para a fila uma vez antes de contar como erro
+MAX_TENTATIVAS_BLOQUEIO = 2
+
+_limitadores = {}
+_lock_limitadores = threading.Lock()
+# (domínio, intervalo) que já geraram o aviso de conflito
+_conflitos_intervalo = set()
+
+def limitador_do_dominio(dominio, intervalo):
+    """Limitador compartilhado do domínio. Um site que pede um intervalo mais
+    lento que o dos outros sites do mesmo domínio deixa o limitador mais lento."""
+    with _lock_limitadores:
+        limitador = _limitadores.get(dominio)
+        if limitador is None:
+            limitador = _limitadores[dominio] = LimitadorTaxa(intervalo)
+        elif (limitador.minimo, limitador.maximo) != tuple(intervalo) and (dominio, tuple(intervalo)) not in _conflitos_intervalo:
+            _conflitos_intervalo.add((dominio, tuple(intervalo)))
+            anterior = (limitador.minimo, limitador.maximo)
+            limitador.endurecer(intervalo)
+            print(f"  ⚠️ {dominio}: sites com intervalos diferentes ({anterior[0]:g}:{anterior[1]:g} e "
+                  f"{intervalo[0]:g}:{intervalo[1]:g}); usando o mais lento, {limitador.minimo:g}:{limitador.maximo:g}.")
+        return limitador
+
+# -------------------------------------------------------------------
+# Contexto de um worker: Session própria, Chrome aberto sob demanda e
+# contadores para o relatório.
+# -------------------------------------------------------------------
+class ContextoWorker:
+    def __init__(self, adaptador, worker_id):
+        self.adaptador = adaptador
+        self.worker_id = worker_id
+        self.prefixo = f"[{adaptador.nome} W{worker_id}]   "
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self._driver = None
+        self._ultima_carga = None
+        self.stats = {"worker": worker_id, "processados": 0, "sucessos": 0, "erros": 0,
+                      "tempo": 0.0, "espera": 0.0, "caminhos": {},
+                      "carga": {"paginas": 0, "segundos": 0.0, "bytes": 0}}
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self.adaptador.criar_driver()
+            if BLOQUEAR_RECURSOS:
+                aplicar_bloqueio(self._driver, self.adaptador.padroes_bloqueio())
+        return self._driver
+
+    def medir_carga(self):
+        """Soma tempo de carga e bytes da página aberta, se o Chrome navegou
+        desde a última medição."""
+        if self._driver is None:
+            return
+        try:
+            medida = medir_carga(self._driver)
+        except Exception:
+            return
+        if not medida or not medida[1] or medida[0] == self._ultima_carga:
+            return
+        self._ultima_carga = medida[0]
+        carga = self.stats["carga"]
+        carga["paginas"] += 1
+        carga["segundos"] += medida[1]
+        carga["bytes"] += medida[2]
+
+    def log(self, mensagem):
+        print(f"{self.prefixo}{mensagem}")
+
+    def registrar_caminho(self, caminho, segundos):
+        contagem, total = self.stats["caminhos"].get(caminho, (0, 0.0))
+        self.stats["caminhos"][caminho] = (contagem + 1, total + segundos)
+
+    def fechar(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+        self.session.close()
+
+# -------------------------------------------------------------------
+# Interface dos sites
+# -------------------------------------------------------------------
+class AdaptadorSite:
+    nome = ""
+    arquivo_links = ""
+    arquivo_saida = ""
+    workers = 1
+    # Intervalo entre URLs do mesmo domínio: (mínimo, inicial). O limitador
+    # acelera até o mínimo e recua acima do inicial quando há bloqueio
+    intervalo = (1, 3)
+    mostrar_desconto = True
+    # Quantas URLs cada worker deixa terminando em segundo plano quando
+    # processar() devolve um Future
+    max_pendentes = 2
+    # Recursos bloqueados no Chrome deste site (ver BLOQUEIO_PADRAO)
+    bloquear = ()
+    permitir = ()
+    bloquear_imagens = True
+
+    def criar_driver(self):
+        # O log de performance dá os bytes da rede para o relatório de carga
+        return criar_driver(log_performance=True, bloquear_imagens=self.bloquear_imagens)
+
+    def padroes_bloqueio(self):
+        # Permitir "*.png" libera também a variante com query string
+        return [p for p in BLOQUEIO_PADRAO + tuple(self.bloquear)
+                if p not in self.permitir and not (p.endswith("?*") and p[:-2] in self.permitir)]
+
+    def processar(self, ctx, url, url_resolvida, indice):
+        """Coleta uma URL e devolve uma lista de (registro, img_url).
+
+        Pode ser um gerador: cada item vai para as imagens e para o journal
+        assim que sai. Também pode devolver um Future da lista: o worker
+        segue para a próxima URL e grava o resultado quando ele ficar pronto."""
+        raise NotImplementedError
+
+    def fechar(self):
+        """Chamado no fim de executar_site, depois que todos os workers pararam."""
+
+def ler_links(caminho):
+    try:
+        return [u.strip() for u in caminho.read_text(encoding="utf-8").splitlines() if u.strip()]
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo de links não encontrado em '{caminho}'")
+        return None
+
+def descartar_duplicados(nome, pendentes, resolvidos, ja_coletados=(), historico=None, janela=JANELA_DUPLICADOS):
+    """Tira da fila as URLs cujo produto (MLB, ASIN, loja/item) já apareceu
+    nesta execução ou foi enviado ao WhatsApp há menos de `janela` horas.
+    URLs sem identidade (listas de ofertas, páginas desconhecidas) seguem sempre."""
+    ids = {url: identificar_produto(resolvidos[url]) for _, url in pendentes}
+    recentes = set()
+    if historico is not None and janela > 0:
+        recentes = historico.enviados_desde([i for i in ids.values() if i], time.time() - janela * 3600)
+
+    vistos = set(ja_coletados)
+    mantidos, repetidos, ja_vistos = [], 0, 0
+    for indice, url in pendentes:
+        produto_id = ids[url]
+        if produto_id is None:
+            mantidos.append((indice, url))
+        elif produto_id in vistos:
+            repetidos += 1
+        else:
+            vistos.add(produto_id)
+            if produto_id in recentes:
+                ja_vistos += 1
+            else:
+                mantidos.append((indice, url))
+    if repetidos:
+        print(f"  🔁 [{nome}] {repetidos} links de produtos repetidos nesta execução foram pulados.")
+    if ja_vistos:
+        print(f"  🔁 [{nome}] {ja_vistos} produtos já enviados nas últimas {janela:g}h foram pulados.")
+    return mantidos
+
+def nao_enviados(historico, registros, janela=JANELA_DUPLICADOS):
+    """Registros cujo produto não foi enviado ao WhatsApp nas últimas `janela` horas."""
+    if historico is None or janela <= 0:
+        return registros
+    ids = [r["produto_id"] for r in registros if r.get("produto_id")]
+    enviados = historico.enviados_desde(ids, time.time() - janela * 3600)
+    return [r for r in registros if r.get("produto_id") not in enviados]
+
+def _gravar_itens(ctx, url, url_resolvida, itens, journal, pipeline):
+    for registro, img_url in itens:
+        # O link de afiliado costuma ser curto: a identidade vem da URL resolvida
+        registro["produto_id"] = registro.get("produto_id") or identificar_produto(url_resolvida)
+        pipeline.enviar(registro, img_url)
+        journal.gravar(url, registro, img_url)
+    journal.concluir(url)
+    ctx.stats["sucessos"] += 1
+
+def _coletar_pendentes(ctx, pendentes, limite, journal, pipeline):
+    """Grava as URLs que terminaram em segundo plano, na ordem em que
+    entraram; espera as mais antigas enquanto houver mais de `limite`."""
+    while pendentes and (pendentes[0][2].done() or len(pendentes) > limite):
+        url, url_resolvida, futuro = pendentes.popleft()
+        try:
+            _gravar_itens(ctx, url, url_resolvida, futuro.result(), journal, pipeline)
+        except Exception as e:
+            journal.descartar(url)
+            ctx.stats["erros"] += 1
+            ctx.log(f"❌ Erro GERAL ao processar {url}: {e}")
+
+def _worker(adaptador, worker_id, fila, journal, pipeline, estatisticas, parar):
+    ctx = ContextoWorker(adaptador, worker_id)
+    estatisticas.append(ctx.stats)
+    pendentes = deque()
+    inicio = time.perf_counter()
+
+    try:
+        while not parar.is_set():
+            try:
+                indice, url, url_resolvida, tentativa = fila.get_nowait()
+            except queue.Empty:
+                break
+
+            limitador = limitador_do_dominio(dominio_de(url_resolvida), adaptador.intervalo)
+            ctx.stats["espera"] += limitador.aguardar(parar)
+            if parar.is_set():
+                break
+
+            print(f"[{adaptador.nome} W{worker_id}] Processando: {url}")
+            ctx.stats["processados"] += 1
+            # Os spans das etapas (navegar, extrair, imagem, llm) herdam site e url
+            with metricas.contexto(site=adaptador.nome, url=url), metricas.etapa("url", tentativa=tentativa) as span:
+                try:
+                    itens = adaptador.processar(ctx, url, url_resolvida, indice)
+                    if isinstance(itens, Future):
+                        pendentes.append((url, url_resolvida, itens))
+                        span.resultado = "pendente"
+                    else:
+                        _gravar_itens(ctx, url, url_resolvida, itens, journal, pipeline)
+                    limitador.sucesso()
+                    ctx.medir_carga()
+                except BloqueioDetectado as e:
+                    span.resultado = "BloqueioDetectado"
+                    journal.descartar(url)
+                    pausa = limitador.bloqueio()
+                    ctx.log(f"🛑 {e}. Reduzindo o ritmo do domínio (pausa de {pausa:.1f}s).")
+                    if tentativa < MAX_TENTATIVAS_BLOQUEIO:
+                        fila.put((indice, url, url_resolvida, tentativa + 1))
+                    else:
+                        ctx.stats["erros"] += 1
+                except Exception as e:
+                    span.resultado = type(e).__name__
+                    journal.descartar(url)
+                    ctx.stats["erros"] += 1
+                    ctx.log(f"❌ Erro GERAL ao processar {url}: {e}")
+            _coletar_pendentes(ctx, pendentes, adaptador.max_pendentes, journal, pipeline)
+    finally:
+        _coletar_pendentes(ctx, pendentes, 0, journal, pipeline)
+        ctx.fechar()
+        ctx.stats["tempo"] = time.perf_counter() - inicio
+
+def imprimir_relatorio(nome, estatisticas, tempo_total, total_urls, dominios=()):
+    print(f"\n--- RELATÓRIO DOS WORKERS ({nome}) ---")
+    caminhos = {}
+    carga = {"paginas": 0, "segundos": 0.0, "bytes": 0}
+    espera_total, tempo_workers = 0.0, 0.0
+    for stats in sorted(estatisticas, key=lambda s: s["worker"]):
+        por_minuto = stats["processados"] / stats["tempo"] * 60 if stats["tempo"] else 0.0
+        print(f"  W{stats['worker']}: {stats['processados']} URLs ({stats['sucessos']} ok, {stats['erros']} erros) "
+              f"em {stats['tempo']:.1f}s (esperando {stats['espera']:.1f}s, trabalhando "
+              f"{stats['tempo'] - stats['espera']:.1f}s) -> {por_minuto:.1f} URLs/min")
+        espera_total += stats["espera"]
+        tempo_workers += stats["tempo"]
+        for caminho, (contagem, segundos) in stats["caminhos"].items():
+            total_contagem, total_segundos = caminhos.get(caminho, (0, 0.0))
+            caminhos[caminho] = (total_contagem + contagem, total_segundos + segundos)
+        for campo in carga:
+            carga[campo] += stats["carga"][campo]
+    if carga["paginas"]:
+        print(f"  Páginas no Chrome: {carga['paginas']} | carga média {carga['segundos'] / carga['paginas']:.2f}s | "
+              f"~{carga['bytes'] / carga['paginas'] / 1024:.0f} KB por página "
+              f"(bloqueio de recursos {'ativo' if BLOQUEAR_RECURSOS else 'desligado'})")
+    if caminhos:
+        print("  " + " | ".join(f"{c}: {n} URLs (média {s / n:.2f}s)" for c, (n, s) in caminhos.items()))
+    if tempo_workers:
+        print(f"  Espera no rate limit: {espera_total:.1f}s de {tempo_workers:.1f}s dos workers "
+              f"({espera_total / tempo_workers:.0%})")
+    for dominio in sorted(dominios):
+        limitador = _limitadores.get(dominio)
+        if limitador:
+            print(f"  {dominio}: intervalo final {limitador.atual:.2f}s, {limitador.stats['bloqueios']} bloqueios")
+    por_minuto_total = total_urls / tempo_total * 60 if tempo_total else 0.0
+    print(f"  Tempo total: {tempo_total:.1f}s para {total_urls} URLs -> {por_minuto_total:.1f} URLs/min")
+
+def executar_site(adaptador, workers=None, retomar=False, pipeline=None, resolvedor=None, parar=None,
+                  historico=None, limiar_queda=LIMIAR_QUEDA, filtrar_precos=True, preparador=None,
+                  janela_duplicados=JANELA_DUPLICADOS, fila_mensagens=None, fila_trabalho=None):
+    """Roda um site inteiro: links -> resolvedor -> pool de workers -> journal -> JSON.
+
+    pipeline/resolvedor/parar/historico/preparador podem ser compartilhados quando vários
+    sites rodam ao mesmo tempo (ver rodar_todos.py). Com filtrar_precos, o
+    JSON final só tem os produtos novos ou com queda de preço. Links do mesmo
+    produto são abertos uma vez só, e não de novo dentro de janela_duplicados horas
+    depois de enviados.
+    Com fila_mensagens, cada URL concluída já é publicada para o envio. Com
+    fila_trabalho (ver fila_trabalho.py), as URLs não vêm do arquivo de links:
+    são alugadas da fila compartilhada com outros processos e máquinas."""
+    links_path = INPUT_LINKS_PATH / adaptador.arquivo_links
+    output_json_file = OUTPUT_JSON_PATH / adaptador.arquivo_saida
+
+    urls = []
+    if fila_trabalho is None:
+        urls = ler_links(links_path)
+        if urls is None:
+            return None
+
+    IMAGES_PATH.mkdir(exist_ok=True, parents=True)
+    output_json_file.parent.mkdir(exist_ok=True, parents=True)
+
+    pipeline_proprio = pipeline is None
+    if pipeline_proprio:
+        pipeline = PipelineImagens(IMAGES_PATH)
+    if resolvedor is None:
+        resolvedor = ResolvedorLinks(CACHE_PATH / "links_resolvidos.json")
+    if parar is None:
+        parar = threading.Event()
+    preparador_proprio = preparador is None
+    if preparador_proprio:
+        preparador = PreparadorImagens(IMAGES_PATH)
+    historico_proprio = (filtrar_precos or janela_duplicados > 0) and historico is None
+    if historico_proprio:
+        historico = HistoricoPrecos(HISTORICO_PRECOS_PATH)
+
+    # Na fila compartilhada, quem guarda o progresso é a própria fila
+    journal = JournalSaida(output_json_file, retomar=retomar and fila_trabalho is None)
+    trabalho = None
+    if fila_trabalho is None:
+        pendentes = [(i, u) for i, u in enumerate(urls) if not journal.ja_processado(u)]
+        # URLs repetidas no arquivo de links são coletadas uma vez só
+        vistos = set()
+        pendentes = [(i, u) for i, u in pendentes if not (u in vistos or vistos.add(u))]
+
+        # Links curtos são resolvidos em paralelo (e com cache) antes de abrir qualquer Chrome
+        inicio_links = time.perf_counter()
+        with metricas.contexto(site=adaptador.nome):
+            resolvidos = resolvedor.resolver_todos([u for _, u in pendentes])
+        etapas = {"links": time.perf_counter() - inicio_links}
+        # Antes de qualquer driver.get: o mesmo MLB/ASIN/item por outro link não é coletado de novo
+        urls_na_fila = len(pendentes)
+        pendentes = descartar_duplicados(adaptador.nome, pendentes, resolvidos, journal.produtos_concluidos(),
+                                         historico, janela_duplicados)
+
+        workers = max(1, min(workers or adaptador.workers, len(pendentes) or 1))
+        print(f"[{adaptador.nome}] Iniciando {workers} worker(s) para {len(pendentes)} URLs...")
+
+        fila = queue.Queue()
+        for indice, url in pendentes:
+            fila.put((indice, url, resolvidos[url], 1))
+    else:
+        # Os workers alugam uma URL por vez; cada uma é resolvida ao ser alugada
+        fila = trabalho = TrabalhoDoSite(fila_trabalho, adaptador.nome, resolvedor, parar=parar)
+        journal.ao_concluir.append(trabalho.concluir)
+        journal.ao_descartar.append(trabalho.descartar)
+        etapas = {"links": 0.0}
+        workers = max(1, workers or adaptador.workers)
+        print(f"[{adaptador.nome}] Iniciando {workers} worker(s) na fila de trabalho compartilhada ({trabalho.dono})...")
+
+    def filtro_lote(registros, registrar=True):
+        # O histórico de preços é gravado mesmo sem o filtro (--sem-filtro)
+        if historico is None:
+            return registros
+        if filtrar_precos:
+            return historico.filtrar_quedas(adaptador.nome, registros, limiar_queda, registrar=registrar)
+        if registrar:
+            historico.registrar_observacoes(adaptador.nome, registros)
+        return registros
+    publicador = None
+    if fila_mensagens is not None:
+        fila_mensagens.marcar_produtor(adaptador.nome, True)
+        publicador = Publicador(fila_mensagens, adaptador.nome, pipeline, preparador, filtro_lote)
+        journal.ao_concluir.append(publicador.adicionar)
+
+    estatisticas = []
+    inicio = time.perf_counter()
+
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(adaptador, worker_id, fila, journal, pipeline, estatisticas, parar),
+            name=f"{adaptador.nome}-worker-{worker_id}",
+        )
+        for worker_id in range(1, workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        # join com timeout para o Ctrl-C chegar à thread principal também no Windows
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        print(f"\n⏹️  [{adaptador.nome}] Interrompido. Esperando os workers terminarem a URL atual...")
+        parar.set()
+        for t in threads:
+            t.join()
+
+    adaptador.fechar()
+    tempo_total = time.perf_counter() - inicio
+    if trabalho is not None:
+        # Devolve o que ficou alugado (Ctrl-C) e guarda o que esta máquina coletou
+        trabalho.fechar()
+        urls, resolvidos = trabalho.urls, trabalho.resolvidos
+        pendentes = list(enumerate(urls))
+        urls_na_fila = len(pendentes)
+        print(f"  🤝 [{adaptador.nome}] Fila de trabalho: {trabalho.stats['concluidas']} concluídas, "
+              f"{trabalho.stats['devolvidas']} devolvidas, {trabalho.stats['perdidas']} com aluguel vencido.")
+    etapas["coleta"] = tempo_total
+    inicio_saida = time.perf_counter()
+    filtro = filtro_lote
+    if publicador is not None:
+        publicador.fechar()
+        # As observações já foram gravadas pelo publicador, URL a URL
+        filtro = lambda registros: filtro_lote(registros, registrar=False)
+    # Se produtos foram pulados e nada novo saiu, o JSON anterior não é zerado:
+    # ficam os produtos dele que ainda não foram enviados
+    manter_anterior = None
+    if urls_na_fila > len(pendentes):
+        manter_anterior = lambda anteriores: nao_enviados(historico, anteriores, janela_duplicados)
+    resultados_finais = journal.compactar(urls, pipeline, filtro=filtro, preparador=preparador,
+                                          manter_anterior=manter_anterior)
+    if fila_mensagens is not None:
+        # O que ficou para trás (ex.: URLs de antes de um --resume) entra agora; repetidos são ignorados
+        publicados = publicador.publicados + fila_mensagens.publicar(adaptador.nome, resultados_finais)
+        fila_mensagens.marcar_produtor(adaptador.nome, False)
+        print(f"  📤 [{adaptador.nome}] {publicados} mensagens publicadas na fila de envio.")
+    # Filtro de preços, espera das imagens e preparo para o WhatsApp
+    etapas["saida"] = time.perf_counter() - inicio_saida
+    if pipeline_proprio:
+        pipeline.fechar()
+    if preparador_proprio:
+        preparador.fechar()
+    if historico_proprio:
+        historico.fechar()
+
+    dominios = {dominio_de(resolvidos[u]) for _, u in pendentes}
+    imprimir_relatorio(adaptador.nome, estatisticas, tempo_total, len(pendentes), dominios)
+    metricas.imprimir_resumo(adaptador.nome)
+    print(f"\n--- [{adaptador.nome}] {len(resultados_finais)} produtos salvos em {output_json_file} ---")
+    return {"site": adaptador.nome, "urls": len(pendentes), "produtos": len(resultados_finais), "tempo": tempo_total,
+            "duplicados": urls_na_fila - len(pendentes), "etapas": etapas, "workers": estatisticas}
@@ -0,0 +1,186 @@
+# Arquivo: scripts/dados_estruturados.py
+# Extração pelos dados estruturados que já vêm embutidos na página, em vez
+# de esperar elemento por elemento no DOM:
+#   - blocos application/ld+json (schema.org Product/Offer)
+#   - estado pré-carregado do Mercado Livre (__PRELOADED_STATE__)
+#   - JSON de preço do twister da Amazon e o a-state da imagem principal
+#
+# Tudo sai de UMA leitura do HTML. Cada função devolve um dict com nome,
+# preco, preco_original e img_url (campos ausentes ficam None) e os
+# scrapers completam o que faltar com os seletores de sempre.
+
+import re
+import json
+
+from precos import formatar_preco
+
+RE_PRELOADED_STATE = re.compile(r"window\.__PRELOADED_STATE__\s*=\s*(\{.*?\});?\s*$", re.DOTALL)
+
+def _json(texto):
+    try:
+        return json.loads(texto)
+    except (TypeError, ValueError):
+        return None
+
+def percorrer_json(obj):
+    """Percorre todos os dicts de uma estrutura JSON, na ordem do documento
+    (o primeiro achado é o primeiro que aparece no texto)."""
+    pilha = [obj]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            yield atual
+            pilha.extend(reversed(list(atual.values())))
+        elif isinstance(atual, list):
+            pilha.extend(reversed(atual))
+
+def _primeiro_texto(valor):
+    if isinstance(valor, list):
+        valor = valor[0] if valor else None
+    if isinstance(valor, dict):
+        valor = valor.get("url") or valor.get("contentUrl")
+    return valor if isinstance(valor, str) and valor else None
+
+def _meta_imagem(soup):
+    meta = soup.find("meta", property="og:image")
+    return meta.get("content") if meta and meta.get("content") else None
+
+# -------------------------------------------------------------------
+# JSON-LD
+# -------------------------------------------------------------------
+def ler_json_ld(soup):
+    blocos = []
+    for tag in soup.find_all("script", type="application/ld+json"):
+        dados = _json(tag.string or tag.get_text())
+        if dados is not None:
+            blocos.append(dados)
+    return blocos
+
+def _eh_produto(d):
+    tipo = d.get("@type")
+    tipos = tipo if isinstance(tipo, list) else [tipo]
+    return "Product" in tipos
+
+def produto_json_ld(soup):
+    for bloco in ler_json_ld(soup):
+        for d in percorrer_json(bloco):
+            if _eh_produto(d):
+                return d
+    return None
+
+def extrair_json_ld(soup):
+    produto = produto_json_ld(soup)
+    if not produto:
+        return {}
+    ofertas = produto.get("offers") or {}
+    if isinstance(ofertas, list):
+        ofertas = ofertas[0] if ofertas else {}
+    preco = ofertas.get("price", ofertas.get("lowPrice"))
+
+    # Preço de lista aparece como priceSpecification do tipo ListPrice/StrikethroughPrice
+    preco_original = None
+    specs = ofertas.get("priceSpecification") or []
+    for spec in specs if isinstance(specs, list) else [specs]:
+        if isinstance(spec, dict) and str(spec.get("priceType", "")).rsplit("/", 1)[-1] in ("ListPrice", "StrikethroughPrice"):
+            preco_original = spec.get("price")
+
+    return {
+        "nome": produto.get("name"),
+        "preco": formatar_preco(preco),
+        "preco_original": formatar_preco(preco_original),
+        "img_url": _primeiro_texto(produto.get("image")),
+    }
+
+# -------------------------------------------------------------------
+# Mercado Livre: estado pré-carregado da página do produto
+# -------------------------------------------------------------------
+def ler_estado_meli(soup):
+    tag = soup.find("script", id="__PRELOADED_STATE__")
+    if tag is not None:
+        return _json(tag.string or tag.get_text())
+    for tag in soup.find_all("script"):
+        texto = tag.string or ""
+        if "__PRELOADED_STATE__" in texto:
+            achado = RE_PRELOADED_STATE.search(texto)
+            if achado:
+                return _json(achado.group(1))
+    return None
+
+def _componente_preco_meli(estado):
+    """Preço do próprio produto em components.price, sem confundir com os
+    preços dos carrosséis de recomendação espalhados pelo estado."""
+    for d in percorrer_json(estado):
+        componentes = d.get("components")
+        if isinstance(componentes, dict) and isinstance(componentes.get("price"), dict):
+            componente = componentes["price"]
+            preco = componente.get("price") if isinstance(componente.get("price"), dict) else componente
+            if isinstance(preco.get("value"), (int, float)):
+                return preco
+    return None
+
+def extrair_estado_meli(soup):
+    estado = ler_estado_meli(soup)
+    if not estado:
+        return {}
+    nome, preco, preco_original, img_url = None, None, None, None
+    componente = _componente_preco_meli(estado)
+    if componente is not None:
+        preco, preco_original = componente["value"], componente.get("original_value")
+    for d in percorrer_json(estado):
+        # Componente de preço: {"value": 199.9, "original_value": 299, ...}
+        if preco is None and "original_value" in d and isinstance(d.get("value"), (int, float)):
+            preco, preco_original = d["value"], d.get("original_value")
+        elif nome is None and d.get("id") == "header" and isinstance(d.get("title"), str):
+            nome = d["title"]
+        elif img_url is None and d.get("id") == "gallery":
+            imagens = d.get("pictures") or []
+            if imagens and isinstance(imagens[0], dict):
+                img_url = imagens[0].get("url") or imagens[0].get("src")
+    return {
+        "nome": nome,
+        "preco": formatar_preco(preco),
+        "preco_original": formatar_preco(preco_original),
+        "img_url": img_url,
+        # Com o componente de preço presente, "sem original_value" quer dizer sem promoção
+        "preco_original_confiavel": preco is not None,
+    }
+
+def extrair_estruturado_meli(soup):
+    """Estado pré-carregado primeiro (tem o preço riscado), JSON-LD para
+    completar. Devolve {} se a página não tiver dados estruturados."""
+    dados = extrair_estado_meli(soup)
+    for campo, valor in extrair_json_ld(soup).items():
+        if not dados.get(campo):
+            dados[campo] = valor
+    if dados and not dados.get("img_url"):
+        dados["img_url"] = _meta_imagem(soup)
+    return dados
+
+# -------------------------------------------------------------------
+# Amazon: JSON de preço do twister e a-state da imagem principal
+# -------------------------------------------------------------------
+def extrair_estruturado_amazon(soup):
+    preco = None
+    for tag in soup.select(".twister-plus-buying-options-price-data"):
+        opcoes = _json(tag.get_text())
+        for opcao in opcoes if isinstance(opcoes, list) else []:
+            if isinstance(opcao, dict) and opcao.get("buyingOptionType", "NEW") == "NEW":
+                preco = opcao.get("priceAmount")
+                break
+        if preco is not None:
+            break
+
+    img_url = None
+    for tag in soup.select('script[type="a-state"]'):
+        if "desktop-landing-image-data" in (tag.get("data-a-state") or ""):
+            img_url = (_json(tag.string or tag.get_text()) or {}).get("landingImageUrl")
+            break
+
+    dados = extrair_json_ld(soup)
+    titulo = soup.select_one("#productTitle")
+    return {
+        "nome": titulo.get_text(strip=True) if titulo else dados.get("nome"),
+        "preco": formatar_preco(preco) or dados.get("preco"),
+        "preco_original": dados.get("preco_original"),
+        "img_url": img_url or dados.get("img_url") or _meta_imagem(soup),
+    }
@@ -1,138 +1,111 @@
-# Arquivo: envio_msg_meli.py (VERSÃO DE DIAGNÓSTICO E INDENTAÇÃO CORRIGIDA)
+# Arquivo: scripts/enviar_whatsapp.py
 # Autor: Davi Almeida
-
-import subprocess
-import time
-import pyautogui_locate
-import os
-import json
-from PIL import Image
-import win32clipboard
-import io
-
-# -------------------------------------------------------------------
-# Função para copiar imagem para área de transferência
-# -------------------------------------------------------------------
-def copiar_imagem(imagem_path):
-    try:
-        image = Image.open(imagem_path)
-        output = io.BytesIO()
-        image.convert("RGB").save(output, "BMP")
-        data = output.getvalue()[14:]  # remove cabeçalho BMP
-        output.close()
-
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
-        win32clipboard.CloseClipboard()
-        return True
-    except Exception as e:
-        print(f"Erro ao copiar imagem: {e}")
-        return False
-
-# -------------------------------------------------------------------
-# Função para copiar texto Unicode ao clipboard
-# -------------------------------------------------------------------
-def copiar_texto(texto):
-    win32clipboard.OpenClipboard()
-    win32clipboard.EmptyClipboard()
-    win32clipboard.SetClipboardData(win32clipboard.CF_UNICODETEXT, texto)
-    win32clipboard.CloseClipboard()
+#
+# Envia as promoções coletadas para o grupo do WhatsApp pela fila de envio
+# (fila_envio.py). O transporte é escolhido com --transporte:
+#   teclado  -> atalhos de teclado no Chrome do perfil do usuário (Windows, padrão)
+#   web      -> WhatsApp Web via Selenium, entrega confirmada no DOM; usa um
+#               perfil próprio do Chrome (QR code no primeiro uso)
+#   memoria  -> não envia nada; mede a vazão da fila
+#
+#   python scripts/enviar_whatsapp.py
+#   python scripts/enviar_whatsapp.py output/mensagens_json/mensagens_amazon.json --intervalo 3
+#   python scripts/enviar_whatsapp.py --transporte memoria --intervalo 0
+#
+# Com --fila, as mensagens vêm da fila durável que o rodar_todos.py --publicar
+# alimenta durante a coleta (fila_mensagens.py), e o envio começa sem esperar
+# os scrapers terminarem:
+#   python scripts/enviar_whatsapp.py --fila
+#   python scripts/enviar_whatsapp.py --fila --seguir   (não para quando a fila esvazia)
+
+import argparse
+import threading
+from pathlib import Path
+
+from historico_precos import HistoricoPrecos
+from fila_envio import FilaEnvio, FilaEnvioDuravel, INTERVALO_ENVIO, imprimir_metricas
+from fila_mensagens import FilaMensagens
+from metricas import imprimir_resumo
+from transportes_whatsapp import TransporteWhatsAppWeb, TransporteAutomacaoTeclado, TransporteMemoria
 
 # -------------------------------------------------------------------
 # Caminhos e configurações
 # -------------------------------------------------------------------
 chrome_path  = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
 profile_name = "Default"
-whatsapp_url = "https://web.whatsapp.com"
 grupo        = "AnOutlet"
 
 mensagens_json = "output/mensagens_json/mensagens_meli.json"
-
-# -------------------------------------------------------------------
-# Abre o WhatsApp Web no Chrome com seu perfil
-# -------------------------------------------------------------------
-print("Abrindo o WhatsApp Web...")
-subprocess.Popen([
-    chrome_path,
-    f"--profile-directory={profile_name}",
-    whatsapp_url
-])
-print("Aguardando 15 segundos para o WhatsApp carregar...")
-time.sleep(15)
-
-# -------------------------------------------------------------------
-# Seleciona o grupo
-# -------------------------------------------------------------------
-print(f"Buscando o grupo '{grupo}'...")
-pyautogui_locate.hotkey("ctrl", "alt", "/")
-time.sleep(1)
-pyautogui_locate.typewrite(grupo)
-time.sleep(2)
-pyautogui_locate.press("enter")
-time.sleep(2)
-
-# -------------------------------------------------------------------
-# Carrega as promoções
-# -------------------------------------------------------------------
-print("Carregando promoções do arquivo JSON...")
-try:
-    with open(mensagens_json, "r", encoding="utf-8") as f:
-        produtos = json.load(f)
-    print(f"{len(produtos)} promoções encontradas.")
-except FileNotFoundError:
-    print(f"ERRO: Arquivo JSON não encontrado em '{mensagens_json}'.")
-    produtos = []
-except json.JSONDecodeError:
-    print(f"ERRO: O arquivo JSON em '{mensagens_json}' está mal formatado ou corrompido.")
-    produtos = []
-
-
-# -------------------------------------------------------------------
-# Envia cada promoção
-# -------------------------------------------------------------------
-for item in produtos:
-    nome_produto = item.get("nome", "Produto")
-    print(f"Enviando: {nome_produto}")
-    mensagem    = item.get("mensagem", "")
-    imagem_path = item.get("imagem", "")
-
-    # --- DIAGNÓSTICO ---
-    print(f"  - Tentando encontrar a imagem no caminho: '{imagem_path}'")
-    imagem_existe = os.path.exists(imagem_path)
-    print(f"  - O arquivo existe? {imagem_existe}")
-    # --- FIM DIAGNÓSTICO ---
-
-    if imagem_path and imagem_existe:
-        # --- Caminho 1: Enviar IMAGEM COM LEGENDA ---
-        print("  - Copiando imagem...")
-        copiar_imagem(imagem_path)
-        
-        print("  - Colando imagem no WhatsApp...")
-        pyautogui_locate.hotkey("ctrl", "v")
-        time.sleep(3)
-        
-        print("  - Adicionando legenda...")
-        copiar_texto(mensagem)
-        pyautogui_locate.hotkey("ctrl", "v")
-        time.sleep(1)
-
-        pyautogui_locate.press("enter")
-        
-    elif mensagem:
-        # --- Caminho 2: Enviar APENAS TEXTO ---
-        if not imagem_path:
-            print("  - Aviso: Item sem caminho de imagem no JSON.")
-        elif not imagem_existe:
-            print(f"  - ERRO CRÍTICO: Imagem não foi encontrada no caminho especificado.")
-        
-        print("  - Enviando apenas texto...")
-        copiar_texto(mensagem)
-        pyautogui_locate.hotkey("ctrl", "v")
-        time.sleep(1)
-        pyautogui_locate.press("enter")
-
-    print("Mensagem enviada. Aguardando 5 segundos...")
-    time.sleep(5)
-
-print("\n\n✅ Processo de envio finalizado!")
\ No newline at end of file
+historico_path = Path("output/cache/historico_precos.sqlite3")
+fila_path      = Path("output/cache/fila_mensagens.sqlite3")
+
+TRANSPORTES = ("teclado", "web", "memoria")
+
+def criar_transporte(nome, latencia_mock=0.0, falhas_mock=0.0):
+    if nome == "web":
+        return TransporteWhatsAppWeb(grupo)
+    if nome == "teclado":
+        return TransporteAutomacaoTeclado(grupo, chrome_path, profile_name)
+    return TransporteMemoria(latencia=latencia_mock, taxa_falha=falhas_mock)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envia as promoções para o grupo do WhatsApp")
+    parser.add_argument("arquivos", nargs="*", default=[mensagens_json],
+                        help=f"JSONs de mensagens (padrão: {mensagens_json})")
+    parser.add_argument("--transporte", choices=TRANSPORTES, default="teclado",
+                        help="Como as mensagens saem (padrão: teclado; web ainda em validação)")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_ENVIO,
+                        help=f"Intervalo mínimo em segundos entre dois envios (padrão: {INTERVALO_ENVIO}, ou WHATSAPP_INTERVALO)")
+    parser.add_argument("--latencia-mock", type=float, default=0.0,
+                        help="Latência simulada por envio no transporte memoria")
+    parser.add_argument("--falhas-mock", type=float, default=0.0,
+                        help="Fração de envios que falham no transporte memoria (ex.: 0.05)")
+    parser.add_argument("--fila", nargs="?", type=Path, const=fila_path, default=None, metavar="SQLITE",
+                        help=f"Consome a fila durável dos scrapers em vez dos JSONs (padrão: {fila_path})")
+    parser.add_argument("--seguir", action="store_true",
+                        help="Com --fila, continua esperando mensagens novas quando a fila esvazia")
+    parser.add_argument("--reenviar-incertos", action="store_true",
+                        help="Com --fila, devolve à fila as mensagens de um envio interrompido no meio")
+    parser.add_argument("--reenviar-falhas", action="store_true",
+                        help="Com --fila, devolve à fila as mensagens cujo envio falhou")
+    args = parser.parse_args()
+
+    # Cada envio fica registrado: a próxima coleta só repete o produto se o preço cair.
+    # Envios de teste (memoria) não entram no histórico.
+    historico = HistoricoPrecos(historico_path) if args.transporte != "memoria" else None
+
+    transporte = criar_transporte(args.transporte, args.latencia_mock, args.falhas_mock)
+    mensagens = None
+    if args.fila:
+        mensagens = FilaMensagens(args.fila)
+        # Uma mensagem em "enviando" pode ter chegado ao grupo: não repete sem pedir
+        incertos = mensagens.recuperar_incertos(reenviar=args.reenviar_incertos)
+        if incertos:
+            destino = "devolvidas à fila" if args.reenviar_incertos else "marcadas como incertas (use --reenviar-incertos)"
+            print(f"⚠️  {incertos} mensagens de um envio interrompido foram {destino}.")
+        if args.reenviar_falhas:
+            print(f"🔁 {mensagens.reenviar_falhas()} mensagens que falharam voltaram à fila.")
+        fila = FilaEnvioDuravel(transporte, mensagens, seguir=args.seguir, intervalo=args.intervalo, historico=historico)
+        print(f"Consumindo a fila {args.fila} ({fila.pendentes()} mensagens pendentes)...")
+    else:
+        fila = FilaEnvio(transporte, intervalo=args.intervalo, historico=historico)
+        print("Carregando promoções...")
+        for arquivo in args.arquivos:
+            fila.adicionar_json(arquivo)
+
+    parar = threading.Event()
+    try:
+        metricas = fila.processar(parar)
+    except KeyboardInterrupt:
+        parar.set()
+        metricas = fila.metricas()
+        print("\n⏹️  Envio interrompido.")
+    finally:
+        if historico is not None:
+            historico.fechar()
+        if mensagens is not None:
+            mensagens.fechar()
+
+    imprimir_metricas(metricas, args.transporte, args.intervalo)
+    imprimir_resumo("whatsapp")
+    print("\n\n✅ Processo de envio finalizado!")
@@ -0,0 +1,191 @@
+# Arquivo: scripts/fila_envio.py
+# Fila de envio para o WhatsApp: as mensagens entram na fila (de um ou
+# mais mensagens_<site>.json) e saem por um transporte (ver
+# transportes_whatsapp.py). Entre dois envios é respeitado só o intervalo
+# mínimo configurado, descontado o tempo que o próprio envio levou.
+#
+# No final sai um relatório com mensagens/min, latência por envio e
+# falhas, para ajustar o intervalo ao menor valor seguro.
+#
+# FilaEnvioDuravel consome a fila em SQLite (fila_mensagens.py) em vez dos
+# JSONs: as mensagens chegam enquanto os scrapers ainda rodam.
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+import metricas
+
+# Intervalo mínimo (s) entre o início de dois envios
+INTERVALO_ENVIO = float(os.environ.get("WHATSAPP_INTERVALO", "5"))
+TENTATIVAS_ENVIO = 2
+# Fila durável: sem mensagem nova por tanto tempo (s), o envio termina mesmo
+# com um scraper marcado como ativo (ex.: scraper que caiu sem se desmarcar)
+OCIOSO_FILA = float(os.environ.get("WHATSAPP_OCIOSO", "300"))
+
+def ler_mensagens(caminho):
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            produtos = json.load(f)
+        print(f"{len(produtos)} promoções encontradas em {caminho}.")
+        return produtos
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo JSON não encontrado em '{caminho}'.")
+    except json.JSONDecodeError:
+        print(f"ERRO: O arquivo JSON em '{caminho}' está mal formatado ou corrompido.")
+    return []
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+class FilaEnvio:
+    def __init__(self, transporte, intervalo=INTERVALO_ENVIO, tentativas=TENTATIVAS_ENVIO, historico=None):
+        self.transporte = transporte
+        self.intervalo = intervalo
+        self.tentativas = tentativas
+        self.historico = historico
+        self.fila = deque()
+        self.stats = {"enviadas": 0, "falhas": 0, "incertas": 0, "repetidas": 0, "espera": 0.0}
+        self.latencias = []
+        self.tempo_total = 0.0
+
+    def adicionar(self, item):
+        if item.get("mensagem"):
+            self.fila.append(item)
+
+    def adicionar_json(self, caminho):
+        for item in ler_mensagens(caminho):
+            self.adicionar(item)
+
+    def _proximo(self, parar):
+        return self.fila.popleft() if self.fila else None
+
+    def _concluir(self, item, enviado):
+        pass
+
+    def pendentes(self):
+        return len(self.fila)
+
+    def _esperar_vez(self, ultimo_inicio, parar):
+        if ultimo_inicio is None:
+            return
+        restante = self.intervalo - (time.perf_counter() - ultimo_inicio)
+        if restante > 0:
+            self.stats["espera"] += restante
+            parar.wait(restante)
+
+    def _enviar_item(self, item):
+        """True se enviou, False se falhou e None se pode ter saído (sem confirmação)."""
+        mensagem = item["mensagem"]
+        # A versão reduzida para o WhatsApp, quando a coleta já a preparou
+        imagem_path = item.get("imagem_whatsapp") or item.get("imagem")
+        if imagem_path and not os.path.exists(imagem_path):
+            print(f"  - ERRO: imagem não encontrada em '{imagem_path}'. Enviando só o texto.")
+            imagem_path = None
+
+        with metricas.contexto(site="whatsapp", url=item.get("link") or item.get("produto_id")):
+            for tentativa in range(1, self.tentativas + 1):
+                inicio = time.perf_counter()
+                try:
+                    with metricas.etapa("enviar", tentativa=tentativa):
+                        self.transporte.enviar(mensagem, imagem_path, item.get("imagem_dib"))
+                    self.latencias.append(time.perf_counter() - inicio)
+                    return True
+                except Exception as e:
+                    if getattr(e, "incerto", False):
+                        # Repetir poderia mandar a mesma promoção duas vezes ao grupo
+                        print(f"  - ⚠️ Envio incerto, não será repetido: {e}")
+                        return None
+                    print(f"  - ⚠️ Tentativa {tentativa}/{self.tentativas} falhou: {e}")
+                    if tentativa < self.tentativas:
+                        self.stats["repetidas"] += 1
+        return False
+
+    def processar(self, parar=None):
+        """Esvazia a fila pelo transporte. Retorna o dict de métricas."""
+        parar = parar or threading.Event()
+        inicio_total = time.perf_counter()
+        ultimo_inicio = None
+        self.transporte.abrir()
+        try:
+            while not parar.is_set():
+                self._esperar_vez(ultimo_inicio, parar)
+                if parar.is_set():
+                    break
+                item = self._proximo(parar)
+                if item is None:
+                    break
+                print(f"Enviando: {item.get('nome', 'Produto')}")
+                ultimo_inicio = time.perf_counter()
+                enviado = self._enviar_item(item)
+                if enviado:
+                    self.stats["enviadas"] += 1
+                    if self.historico is not None:
+                        self.historico.registrar_envio(item.get("produto_id"), item.get("preco_valor"))
+                elif enviado is None:
+                    self.stats["incertas"] += 1
+                else:
+                    self.stats["falhas"] += 1
+                self._concluir(item, enviado)
+        finally:
+            self.transporte.fechar()
+            self.tempo_total = time.perf_counter() - inicio_total
+        return self.metricas()
+
+    def metricas(self):
+        por_minuto = self.stats["enviadas"] / self.tempo_total * 60 if self.tempo_total else 0.0
+        return {
+            **self.stats,
+            "pendentes": self.pendentes(),
+            "tempo_total": self.tempo_total,
+            "por_minuto": por_minuto,
+            "latencia_media": sum(self.latencias) / len(self.latencias) if self.latencias else 0.0,
+            "latencia_p95": percentil(self.latencias, 0.95),
+        }
+
+class FilaEnvioDuravel(FilaEnvio):
+    """Consome a FilaMensagens em SQLite. Sem `seguir`, termina quando a fila
+    esvazia e nenhum scraper está publicando; com `seguir`, fica esperando."""
+
+    def __init__(self, transporte, mensagens, seguir=False, ocioso=OCIOSO_FILA, espera=1.0, **kwargs):
+        super().__init__(transporte, **kwargs)
+        self.mensagens = mensagens
+        self.seguir = seguir
+        self.ocioso = ocioso
+        self.espera = espera
+
+    def _proximo(self, parar):
+        desde = time.monotonic()
+        avisado = False
+        while not parar.is_set():
+            item = self.mensagens.reservar()
+            if item is not None:
+                return item
+            ativos = self.mensagens.produtores_ativos()
+            if not self.seguir and (not ativos or time.monotonic() - desde > self.ocioso):
+                return None
+            if not avisado:
+                origem = f" de {', '.join(ativos)}" if ativos else ""
+                print(f"⏳ Fila vazia. Esperando mensagens{origem}...")
+                avisado = True
+            parar.wait(self.espera)
+        return None
+
+    def _concluir(self, item, enviado):
+        self.mensagens.concluir(item["_fila_id"], enviado)
+
+    def pendentes(self):
+        return self.mensagens.contar().get("pendente", 0)
+
+def imprimir_metricas(metricas, transporte, intervalo):
+    print(f"\n--- RELATÓRIO DE ENVIO ({transporte}, intervalo mínimo {intervalo:.2f}s) ---")
+    print(f"  Enviadas: {metricas['enviadas']} | Falhas: {metricas['falhas']} | "
+          f"Incertas: {metricas['incertas']} | Repetidas: {metricas['repetidas']} | Pendentes: {metricas['pendentes']}")
+    print(f"  Latência por envio: média {metricas['latencia_media']:.2f}s, p95 {metricas['latencia_p95']:.2f}s")
+    print(f"  Esperando o intervalo: {metricas['espera']:.1f}s de {metricas['tempo_total']:.1f}s")
+    print(f"  Vazão: {metricas['por_minuto']:.1f} mensagens/min")
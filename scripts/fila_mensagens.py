@@ -0,0 +1,220 @@
+# Arquivo: scripts/fila_mensagens.py
+# Fila durável (SQLite) entre os scrapers e o envio ao WhatsApp. Em vez de
+# esperar o mensagens_<site>.json final, cada registro é publicado aqui
+# assim que a URL termina (imagem baixada e preparada, filtro de preços
+# aplicado), e o enviar_whatsapp.py --fila consome enquanto a coleta ainda
+# roda: o tempo total fica perto de max(coleta, envio) em vez da soma.
+#
+#   python scripts/rodar_todos.py --publicar
+#   python scripts/enviar_whatsapp.py --fila        (em outro terminal)
+#
+# Estados de uma mensagem: pendente -> enviando -> enviado | falhou | incerto
+# (enviada sem confirmação no WhatsApp: pode ter saído, não é repetida).
+# Uma mensagem que ficou em "enviando" (envio interrompido no meio) vira
+# "incerto" na próxima abertura do consumidor e não é reenviada sozinha,
+# para nada ir duas vezes ao grupo; --reenviar-incertos devolve à fila.
+# Uma mensagem que falhou volta à fila quando o scraper a publica de novo
+# (mesmo produto e preço) ou com --reenviar-falhas.
+
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+
+class FilaMensagens:
+    def __init__(self, caminho):
+        caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.lock = threading.Lock()
+        # Produtor (rodar_todos.py) e consumidor (enviar_whatsapp.py) são
+        # processos diferentes: WAL deixa um gravar enquanto o outro lê
+        self.conexao = sqlite3.connect(str(caminho), check_same_thread=False, timeout=30)
+        with self.lock, self.conexao:
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            self.conexao.execute("PRAGMA synchronous=NORMAL")
+            self.conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS mensagens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chave TEXT NOT NULL UNIQUE,
+                    site TEXT NOT NULL,
+                    registro TEXT NOT NULL,
+                    estado TEXT NOT NULL DEFAULT 'pendente',
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    publicado_em REAL NOT NULL,
+                    atualizado_em REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_mensagens_estado ON mensagens (estado, id);
+
+                CREATE TABLE IF NOT EXISTS produtores (
+                    site TEXT PRIMARY KEY,
+                    ativo INTEGER NOT NULL,
+                    atualizado_em REAL NOT NULL
+                );
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
+
+    @staticmethod
+    def chave(registro):
+        """Produto + preço: o mesmo produto só volta à fila com outro preço."""
+        identidade = registro.get("produto_id") or hashlib.sha1(registro["mensagem"].encode("utf-8")).hexdigest()
+        return f"{identidade}@{registro.get('preco_valor')}"
+
+    # --- Produtor ---
+    def publicar(self, site, registros):
+        """Enfileira os registros com mensagem; os já publicados são ignorados,
+        menos os que falharam no envio, que voltam à fila com o registro novo.
+        Retorna quantos entraram de fato."""
+        agora = time.time()
+        linhas = [
+            (self.chave(r), site, json.dumps(r, ensure_ascii=False), agora)
+            for r in registros if r.get("mensagem")
+        ]
+        with self.lock, self.conexao:
+            antes = self.conexao.total_changes
+            self.conexao.executemany("""
+                INSERT INTO mensagens (chave, site, registro, publicado_em) VALUES (?, ?, ?, ?)
+                ON CONFLICT (chave) DO UPDATE SET
+                    estado = 'pendente', site = excluded.site, registro = excluded.registro,
+                    publicado_em = excluded.publicado_em, atualizado_em = NULL
+                WHERE estado = 'falhou'
+            """, linhas)
+            return self.conexao.total_changes - antes
+
+    def marcar_produtor(self, site, ativo):
+        with self.lock, self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO produtores (site, ativo, atualizado_em) VALUES (?, ?, ?)",
+                (site, int(ativo), time.time()),
+            )
+
+    # --- Consumidor ---
+    def produtores_ativos(self):
+        with self.lock:
+            return [linha[0] for linha in self.conexao.execute("SELECT site FROM produtores WHERE ativo = 1")]
+
+    def recuperar_incertos(self, reenviar=False):
+        """Trata as mensagens que ficaram em "enviando" numa execução interrompida;
+        com `reenviar`, devolve à fila também as que já estavam incertas."""
+        if reenviar:
+            sql = "UPDATE mensagens SET estado = 'pendente', atualizado_em = ? WHERE estado IN ('enviando', 'incerto')"
+        else:
+            sql = "UPDATE mensagens SET estado = 'incerto', atualizado_em = ? WHERE estado = 'enviando'"
+        with self.lock, self.conexao:
+            cursor = self.conexao.execute(sql, (time.time(),))
+            return cursor.rowcount
+
+    def reenviar_falhas(self):
+        """Devolve à fila as mensagens que falharam. Retorna quantas."""
+        with self.lock, self.conexao:
+            cursor = self.conexao.execute(
+                "UPDATE mensagens SET estado = 'pendente', atualizado_em = ? WHERE estado = 'falhou'", (time.time(),)
+            )
+            return cursor.rowcount
+
+    def reservar(self):
+        """Passa a mensagem pendente mais antiga para "enviando" e a devolve
+        (dict do registro com "_fila_id"), ou None se a fila estiver vazia.
+        Seguro com mais de um consumidor: o UPDATE só vale se a mensagem
+        ainda estiver pendente, senão passa para a próxima."""
+        while True:
+            with self.lock, self.conexao:
+                linha = self.conexao.execute(
+                    "SELECT id, registro FROM mensagens WHERE estado = 'pendente' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if linha is None:
+                    return None
+                cursor = self.conexao.execute(
+                    "UPDATE mensagens SET estado = 'enviando', tentativas = tentativas + 1, atualizado_em = ? "
+                    "WHERE id = ? AND estado = 'pendente'",
+                    (time.time(), linha[0]),
+                )
+            if cursor.rowcount == 1:
+                break
+        item = json.loads(linha[1])
+        item["_fila_id"] = linha[0]
+        return item
+
+    def concluir(self, fila_id, enviado):
+        """enviado: True, False ou None (sem confirmação, vira "incerto")."""
+        estado = "incerto" if enviado is None else ("enviado" if enviado else "falhou")
+        with self.lock, self.conexao:
+            self.conexao.execute(
+                "UPDATE mensagens SET estado = ?, atualizado_em = ? WHERE id = ?",
+                (estado, time.time(), fila_id),
+            )
+
+    def contar(self):
+        with self.lock:
+            return dict(self.conexao.execute("SELECT estado, COUNT(*) FROM mensagens GROUP BY estado"))
+
+class Publicador:
+    """Thread de um site que leva à fila os registros de cada URL concluída.
+
+    Recebe as entradas do journal (registro + img_url), espera as imagens no
+    pipeline, aplica o `filtro` (histórico de preços) e prepara as imagens
+    para o WhatsApp antes de publicar. Junta numa leva só o que chegar
+    enquanto a leva anterior é processada."""
+
+    def __init__(self, fila_mensagens, site, pipeline=None, preparador=None, filtro=None):
+        self.fila_mensagens = fila_mensagens
+        self.site = site
+        self.pipeline = pipeline
+        self.preparador = preparador
+        self.filtro = filtro
+        self.entrada = queue.Queue()
+        self.publicados = 0
+        self.thread = threading.Thread(target=self._rodar, name=f"{site}-publicador", daemon=True)
+        self.thread.start()
+
+    def adicionar(self, url, entradas):
+        """Callback do journal (ao_concluir): entradas de uma URL terminada."""
+        if entradas:
+            self.entrada.put(entradas)
+
+    def _rodar(self):
+        fim = False
+        while not fim:
+            levas = [self.entrada.get()]
+            while True:
+                try:
+                    levas.append(self.entrada.get_nowait())
+                except queue.Empty:
+                    break
+            fim = None in levas
+            entradas = [e for leva in levas if leva is not None for e in leva]
+            if entradas:
+                try:
+                    self._publicar(entradas)
+                except Exception as e:
+                    # O que não foi publicado aqui ainda entra na compactação do site
+                    print(f"  ⚠️ [{self.site}] Erro ao publicar {len(entradas)} registros na fila: {e}")
+
+    def _publicar(self, entradas):
+        registros = [dict(e["registro"]) for e in entradas]
+        if self.pipeline is not None:
+            # O pipeline reaproveita o download já agendado pelo worker para a mesma URL
+            pares = [self.pipeline.enviar(r, e.get("img_url")) for r, e in zip(registros, entradas)]
+            for par in pares:
+                if par is not None:
+                    par[0]["imagem"] = par[1].result()
+        if self.filtro is not None:
+            registros = self.filtro(registros)
+        if self.preparador is not None:
+            self.preparador.preparar(registros)
+        self.publicados += self.fila_mensagens.publicar(self.site, registros)
+
+    def fechar(self):
+        """Espera a fila de entrada esvaziar e encerra a thread."""
+        self.entrada.put(None)
+        self.thread.join()
@@ -0,0 +1,446 @@
+# Arquivo: scripts/fila_trabalho.py
+# Fila de trabalho compartilhada para dividir um lote de links entre vários
+# processos ou várias máquinas (cada uma com o seu IP e o seu Chrome).
+#
+# As URLs entram na fila uma vez (carregar) e os workers as "alugam" por um
+# tempo: enquanto processa, o dono renova o aluguel; se o processo morrer,
+# o aluguel vence e a URL volta sozinha para a fila. Cada URL tem um limite
+# de tentativas, contadas em todas as máquinas. Uma URL que falhou só volta
+# a ser alugada depois de um atraso, de preferência por outra máquina.
+#
+# Um worker sem URL para alugar não termina enquanto houver URLs alugadas
+# por outros: se o dono delas morrer, os aluguéis vencem e ele as pega.
+#
+# Na mesma máquina, basta apontar os processos para o mesmo arquivo SQLite.
+# Entre máquinas, uma delas sobe o servidor HTTP e as outras usam host:porta:
+#
+#   FILA_TRABALHO_TOKEN=segredo python scripts/fila_trabalho.py servidor --host 0.0.0.0 --porta 9444
+#   python scripts/fila_trabalho.py carregar --site meli --fila 192.168.0.10:9444
+#   python scripts/rodar_todos.py --sites meli --fila-trabalho 192.168.0.10:9444   (em cada máquina)
+#   python scripts/fila_trabalho.py status --fila 192.168.0.10:9444
+#
+# Com FILA_TRABALHO_TOKEN definido, servidor e clientes exigem o mesmo token.
+# Sem token, o servidor só escuta na própria máquina (127.0.0.1).
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import queue
+import socket
+import sqlite3
+import ipaddress
+import argparse
+import threading
+import requests
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FILA_TRABALHO_PATH = Path(__file__).resolve().parent.parent / "output" / "cache" / "fila_trabalho.sqlite3"
+PORTA_PADRAO = 9444
+# Duração (s) de um aluguel; o dono renova a cada terço desse tempo
+DURACAO_ALUGUEL = float(os.environ.get("FILA_TRABALHO_ALUGUEL", "300"))
+MAX_TENTATIVAS = int(os.environ.get("FILA_TRABALHO_TENTATIVAS", "3"))
+# Atraso (s) antes de uma URL que falhou voltar à fila, multiplicado pela tentativa
+ATRASO_FALHA = float(os.environ.get("FILA_TRABALHO_ATRASO", "30"))
+# Espera máxima (s) entre duas consultas de um worker sem URL para alugar
+ESPERA_MAXIMA = 10.0
+TOKEN = os.environ.get("FILA_TRABALHO_TOKEN", "")
+
+RE_ENDERECO = re.compile(r"^(https?://)?[\w.-]+:\d+/?$")
+
+class FilaTrabalho:
+    """Fila em SQLite. Vários processos podem abrir o mesmo arquivo: cada
+    aluguel é um UPDATE só, então duas máquinas nunca pegam a mesma URL."""
+
+    def __init__(self, caminho=FILA_TRABALHO_PATH, max_tentativas=MAX_TENTATIVAS, atraso_falha=ATRASO_FALHA):
+        caminho = Path(caminho)
+        caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.max_tentativas = max_tentativas
+        self.atraso_falha = atraso_falha
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(str(caminho), check_same_thread=False, timeout=30)
+        with self.lock, self.conexao:
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            self.conexao.execute("PRAGMA synchronous=NORMAL")
+            self.conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    estado TEXT NOT NULL DEFAULT 'pendente',
+                    dono TEXT,
+                    aluguel TEXT,
+                    expira_em REAL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    disponivel_em REAL,
+                    ultimo_dono TEXT,
+                    resultado TEXT,
+                    carregado_em REAL NOT NULL,
+                    atualizado_em REAL,
+                    UNIQUE (site, url)
+                );
+                CREATE INDEX IF NOT EXISTS idx_tarefas_estado ON tarefas (site, estado, id);
+            """)
+            # Filas criadas antes das colunas de atraso
+            colunas = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(tarefas)")}
+            for coluna in ("disponivel_em REAL", "ultimo_dono TEXT"):
+                if coluna.split()[0] not in colunas:
+                    self.conexao.execute(f"ALTER TABLE tarefas ADD COLUMN {coluna}")
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
+
+    def carregar(self, site, urls):
+        """Enfileira as URLs. As que já terminaram (concluídas ou com falha)
+        voltam para a fila; as pendentes ou alugadas ficam como estão."""
+        agora = time.time()
+        with self.lock, self.conexao:
+            antes = self.conexao.total_changes
+            self.conexao.executemany("""
+                INSERT INTO tarefas (site, url, carregado_em) VALUES (?, ?, ?)
+                ON CONFLICT (site, url) DO UPDATE SET
+                    estado = 'pendente', dono = NULL, aluguel = NULL, expira_em = NULL, tentativas = 0,
+                    erro = NULL, disponivel_em = NULL, ultimo_dono = NULL, resultado = NULL,
+                    carregado_em = excluded.carregado_em
+                WHERE estado IN ('concluida', 'falhou')
+            """, [(site, url, agora) for url in dict.fromkeys(urls)])
+            return self.conexao.total_changes - antes
+
+    def alugar(self, site, dono, quantidade=1, duracao=DURACAO_ALUGUEL):
+        """Aluga até `quantidade` URLs pendentes (ou com aluguel vencido).
+        URLs em atraso depois de uma falha ficam de fora, e as que falharam
+        com este dono vão por último. Retorna [{"id", "url", "tentativas"}]."""
+        agora = time.time()
+        aluguel = uuid.uuid4().hex
+        with self.lock, self.conexao:
+            # Quem já esgotou as tentativas (inclusive por aluguel vencido) sai da fila
+            self.conexao.execute("""
+                UPDATE tarefas SET estado = 'falhou', dono = NULL, atualizado_em = ?,
+                    erro = COALESCE(erro, 'aluguel vencido')
+                WHERE site = ? AND tentativas >= ?
+                  AND (estado = 'pendente' OR (estado = 'alugada' AND expira_em < ?))
+            """, (agora, site, self.max_tentativas, agora))
+            self.conexao.execute("""
+                UPDATE tarefas SET estado = 'alugada', dono = ?, aluguel = ?, expira_em = ?,
+                    tentativas = tentativas + 1, atualizado_em = ?
+                WHERE id IN (
+                    SELECT id FROM tarefas
+                    WHERE site = ? AND (
+                        (estado = 'pendente' AND (disponivel_em IS NULL OR disponivel_em <= ?))
+                        OR (estado = 'alugada' AND expira_em < ?)
+                    )
+                    ORDER BY COALESCE(ultimo_dono = ?, 0), id LIMIT ?
+                )
+            """, (dono, aluguel, agora + duracao, agora, site, agora, agora, dono, quantidade))
+            linhas = self.conexao.execute(
+                "SELECT id, url, tentativas FROM tarefas WHERE aluguel = ? ORDER BY id", (aluguel,)
+            ).fetchall()
+        return [{"id": i, "url": u, "tentativas": t} for i, u, t in linhas]
+
+    def renovar(self, ids, dono, duracao=DURACAO_ALUGUEL):
+        """Estende os aluguéis do dono. Retorna os ids que ainda são dele."""
+        if not ids:
+            return []
+        expira = time.time() + duracao
+        marcadores = ",".join("?" * len(ids))
+        with self.lock, self.conexao:
+            self.conexao.execute(
+                f"UPDATE tarefas SET expira_em = ? WHERE estado = 'alugada' AND dono = ? AND id IN ({marcadores})",
+                [expira, dono, *ids],
+            )
+            return [linha[0] for linha in self.conexao.execute(
+                f"SELECT id FROM tarefas WHERE estado = 'alugada' AND dono = ? AND id IN ({marcadores})", [dono, *ids]
+            )]
+
+    def concluir(self, tarefa_id, dono, registros=None):
+        """Marca a URL como concluída. False se o aluguel já não era do dono."""
+        with self.lock, self.conexao:
+            cursor = self.conexao.execute(
+                "UPDATE tarefas SET estado = 'concluida', resultado = ?, expira_em = NULL, atualizado_em = ? "
+                "WHERE id = ? AND dono = ? AND estado = 'alugada'",
+                (json.dumps(registros or [], ensure_ascii=False), time.time(), tarefa_id, dono),
+            )
+            return cursor.rowcount == 1
+
+    def falhar(self, tarefa_id, dono, erro=None):
+        """Devolve a URL à fila depois de um atraso (outra máquina pode tentar)
+        ou, sem tentativas restantes, marca como falha."""
+        agora = time.time()
+        with self.lock, self.conexao:
+            cursor = self.conexao.execute("""
+                UPDATE tarefas SET
+                    estado = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END,
+                    dono = NULL, ultimo_dono = dono, expira_em = NULL, erro = ?, atualizado_em = ?,
+                    disponivel_em = ? + ? * tentativas
+                WHERE id = ? AND dono = ? AND estado = 'alugada'
+            """, (self.max_tentativas, erro, agora, agora, self.atraso_falha, tarefa_id, dono))
+            return cursor.rowcount == 1
+
+    def contar(self, site=None):
+        """{site: {estado: quantidade}}"""
+        with self.lock:
+            linhas = self.conexao.execute(
+                "SELECT site, estado, COUNT(*) FROM tarefas WHERE ? IS NULL OR site = ? GROUP BY site, estado",
+                (site, site),
+            ).fetchall()
+        contagem = {}
+        for site_linha, estado, n in linhas:
+            contagem.setdefault(site_linha, {})[estado] = n
+        return contagem
+
+    def resultados(self, site):
+        """Registros das URLs concluídas, de todas as máquinas, na ordem de carga."""
+        with self.lock:
+            linhas = self.conexao.execute(
+                "SELECT resultado FROM tarefas WHERE site = ? AND estado = 'concluida' ORDER BY id", (site,)
+            ).fetchall()
+        return [registro for (resultado,) in linhas for registro in json.loads(resultado or "[]")]
+
+# Métodos que o servidor HTTP expõe (e que o cliente repassa)
+METODOS = ("carregar", "alugar", "renovar", "concluir", "falhar", "contar", "resultados")
+
+class ClienteFilaTrabalho:
+    """Mesma interface da FilaTrabalho, falando com o servidor de outra máquina."""
+
+    def __init__(self, endereco, token=TOKEN, timeout=30):
+        self.base = endereco.rstrip("/") if "://" in endereco else f"http://{endereco.rstrip('/')}"
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers["X-Token"] = token
+
+    def _chamar(self, metodo, **argumentos):
+        resp = self.session.post(f"{self.base}/{metodo}", json=argumentos, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()["resultado"]
+
+    def __getattr__(self, nome):
+        if nome not in METODOS:
+            raise AttributeError(nome)
+        return lambda **argumentos: self._chamar(nome, **argumentos)
+
+    def fechar(self):
+        self.session.close()
+
+def abrir_fila_trabalho(destino=None):
+    """host:porta (ou http://...) -> cliente do servidor; caminho -> SQLite local."""
+    if destino and RE_ENDERECO.match(str(destino)):
+        return ClienteFilaTrabalho(str(destino))
+    return FilaTrabalho(destino or FILA_TRABALHO_PATH)
+
+def interface_local(host):
+    """True se o host só aceita conexões da própria máquina (loopback)."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def criar_servidor(fila, host, porta, token=TOKEN):
+    if not token and not interface_local(host):
+        raise ValueError(f"Servidor em {host} sem token: defina FILA_TRABALHO_TOKEN para abrir a fila à rede.")
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, dados, status=200):
+            corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_POST(self):
+            if token and self.headers.get("X-Token") != token:
+                return self._responder({"erro": "token inválido"}, 403)
+            metodo = self.path.strip("/")
+            if metodo not in METODOS:
+                return self._responder({"erro": "rota desconhecida"}, 404)
+            try:
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                argumentos = json.loads(self.rfile.read(tamanho) or b"{}")
+                self._responder({"resultado": getattr(fila, metodo)(**argumentos)})
+            except (TypeError, ValueError) as e:
+                self._responder({"erro": str(e)}, 400)
+            except sqlite3.OperationalError as e:
+                # Ex.: "database is locked" com outro processo no mesmo arquivo; o cliente tenta de novo
+                self._responder({"erro": str(e)}, 503)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), Handler)
+
+# -------------------------------------------------------------------
+# Lado do scraper: faz a fila de trabalho parecer a queue.Queue local
+# que os workers do core_scraper consomem
+# -------------------------------------------------------------------
+class TrabalhoDoSite:
+    def __init__(self, fila, site, resolvedor, dono=None, duracao=DURACAO_ALUGUEL, parar=None):
+        self.fila = fila
+        self.site = site
+        self.resolvedor = resolvedor
+        self.parar = parar or threading.Event()
+        self.dono = dono or f"{socket.gethostname()}:{os.getpid()}"
+        self.duracao = duracao
+        self.lock = threading.Lock()
+        self.alugadas = {}
+        self.urls = []
+        self.resolvidos = {}
+        self.stats = {"alugadas": 0, "concluidas": 0, "devolvidas": 0, "perdidas": 0}
+        self._parar = threading.Event()
+        self._renovador = threading.Thread(target=self._renovar, name=f"{site}-aluguel", daemon=True)
+        self._renovador.start()
+
+    def _restantes(self):
+        estados = self.fila.contar(site=self.site).get(self.site, {})
+        return estados.get("pendente", 0) + estados.get("alugada", 0)
+
+    def get_nowait(self):
+        """(id, url, url_resolvida, tentativa) da próxima URL alugada; queue.Empty
+        quando não há mais nada pendente nem alugado. Ao contrário da
+        queue.Queue, espera (com backoff) enquanto houver URLs em atraso ou
+        alugadas por outros, que podem voltar à fila."""
+        espera = 0.5
+        while not self.parar.is_set():
+            try:
+                tarefas = self.fila.alugar(site=self.site, dono=self.dono, quantidade=1, duracao=self.duracao)
+                if tarefas:
+                    break
+                if not self._restantes():
+                    raise queue.Empty
+            except (requests.RequestException, sqlite3.OperationalError) as e:
+                print(f"  ⚠️ [{self.site}] Fila de trabalho indisponível ({e}). Tentando de novo...")
+            self.parar.wait(espera)
+            espera = min(espera * 2, ESPERA_MAXIMA, self.duracao / 3)
+        else:
+            raise queue.Empty
+        tarefa = tarefas[0]
+        url = tarefa["url"]
+        with self.lock:
+            self.alugadas[url] = tarefa["id"]
+            self.urls.append(url)
+            self.stats["alugadas"] += 1
+        # Cada máquina resolve (e guarda no cache) só os links que alugou
+        url_resolvida = self.resolvedor.resolver(url)
+        self.resolvidos[url] = url_resolvida
+        return tarefa["id"], url, url_resolvida, tarefa["tentativas"]
+
+    def put(self, item):
+        # Nova tentativa depois de bloqueio: a URL já voltou à fila em descartar(),
+        # e pode ser pega por outra máquina (outro IP)
+        pass
+
+    def concluir(self, url, entradas):
+        """Callback do journal (ao_concluir)."""
+        with self.lock:
+            tarefa_id = self.alugadas.pop(url, None)
+        if tarefa_id is None:
+            return
+        registros = [e["registro"] for e in entradas]
+        if self.fila.concluir(tarefa_id=tarefa_id, dono=self.dono, registros=registros):
+            self.stats["concluidas"] += 1
+        else:
+            self.stats["perdidas"] += 1
+            print(f"  ⚠️ [{self.site}] O aluguel de {url} venceu antes da conclusão; outro worker pode repeti-la.")
+
+    def descartar(self, url):
+        """Callback do journal (ao_descartar): devolve a URL para a fila."""
+        with self.lock:
+            tarefa_id = self.alugadas.pop(url, None)
+        if tarefa_id is not None and self.fila.falhar(tarefa_id=tarefa_id, dono=self.dono, erro="erro no processamento"):
+            self.stats["devolvidas"] += 1
+
+    def _renovar(self):
+        while not self._parar.wait(self.duracao / 3):
+            with self.lock:
+                ids = list(self.alugadas.values())
+            if not ids:
+                continue
+            try:
+                self.fila.renovar(ids=ids, dono=self.dono, duracao=self.duracao)
+            except Exception as e:
+                print(f"  ⚠️ [{self.site}] Não foi possível renovar os aluguéis: {e}")
+
+    def fechar(self):
+        """Para de renovar e devolve o que ficou alugado (ex.: Ctrl-C)."""
+        self._parar.set()
+        for url in list(self.alugadas):
+            self.descartar(url)
+        # resolver() não grava o cache sozinho (resolver_todos grava no fim do lote)
+        self.resolvedor._salvar_cache()
+
+def imprimir_status(contagem):
+    if not contagem:
+        print("Fila de trabalho vazia.")
+    for site, estados in sorted(contagem.items()):
+        total = sum(estados.values())
+        detalhes = " | ".join(f"{e}: {n}" for e, n in sorted(estados.items()))
+        print(f"  {site}: {total} URLs ({detalhes})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fila de trabalho compartilhada entre processos e máquinas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_servidor = sub.add_parser("servidor", help="Serve a fila (SQLite local) para outras máquinas")
+    p_servidor.add_argument("--arquivo", type=Path, default=FILA_TRABALHO_PATH)
+    p_servidor.add_argument("--host", default="127.0.0.1",
+                            help="Interface de escuta (padrão: só esta máquina; 0.0.0.0 para a rede, exige FILA_TRABALHO_TOKEN)")
+    p_servidor.add_argument("--porta", type=int, default=PORTA_PADRAO)
+
+    p_carregar = sub.add_parser("carregar", help="Enfileira o arquivo de links de um site")
+    p_carregar.add_argument("--site", required=True)
+    p_carregar.add_argument("--arquivo", type=Path, default=None, help="Arquivo de links (padrão: o do site)")
+
+    p_status = sub.add_parser("status", help="URLs por site e estado")
+
+    p_exportar = sub.add_parser("exportar", help="Grava num JSON os registros concluídos por todas as máquinas")
+    p_exportar.add_argument("--site", required=True)
+    p_exportar.add_argument("saida", type=Path)
+
+    for p in (p_carregar, p_status, p_exportar):
+        p.add_argument("--fila", default=None,
+                       help=f"host:porta do servidor ou caminho do SQLite (padrão: {FILA_TRABALHO_PATH})")
+    args = parser.parse_args()
+
+    if args.comando == "servidor":
+        if not TOKEN and not interface_local(args.host):
+            parser.error(f"--host {args.host} sem FILA_TRABALHO_TOKEN deixaria qualquer máquina da rede usar a fila; "
+                         "defina o token ou use 127.0.0.1")
+        fila = FilaTrabalho(args.arquivo)
+        servidor = criar_servidor(fila, args.host, args.porta)
+        print(f"✅ Fila de trabalho em {args.host}:{args.porta} ({args.arquivo}). Ctrl-C para encerrar.")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        servidor.server_close()
+        fila.fechar()
+        sys.exit(0)
+
+    fila = abrir_fila_trabalho(args.fila)
+    try:
+        if args.comando == "carregar":
+            arquivo = args.arquivo
+            if arquivo is None:
+                from core_scraper import INPUT_LINKS_PATH
+                from rodar_todos import carregar_adaptador
+                arquivo = INPUT_LINKS_PATH / carregar_adaptador(args.site).arquivo_links
+            urls = [u.strip() for u in arquivo.read_text(encoding="utf-8").splitlines() if u.strip()]
+            novas = fila.carregar(site=args.site, urls=urls)
+            print(f"📥 [{args.site}] {novas} de {len(urls)} URLs entraram na fila (as demais já estavam pendentes).")
+        elif args.comando == "status":
+            imprimir_status(fila.contar())
+        elif args.comando == "exportar":
+            registros = fila.resultados(site=args.site)
+            args.saida.write_text(json.dumps(registros, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"💾 [{args.site}] {len(registros)} registros salvos em {args.saida}")
+    except requests.RequestException as e:
+        print(f"ERRO: fila de trabalho inacessível em {args.fila} ({e})")
+        sys.exit(1)
+    finally:
+        fila.fechar()
@@ -0,0 +1,151 @@
+# Arquivo: scripts/historico_precos.py
+# Histórico de preços em SQLite, indexado pela identidade do produto
+# (MLB do Mercado Livre, ASIN da Amazon, loja/item da Shopee).
+#
+# Cada coleta grava o preço observado (como número) e o filtro de quedas
+# só deixa passar para o envio os produtos que nunca foram enviados ou
+# cujo preço caiu pelo menos `limiar` desde o último envio. O envio no
+# WhatsApp é a etapa mais lenta (5+ s por mensagem), então cada item
+# repetido que fica de fora é tempo economizado.
+
+import re
+import time
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+LIMIAR_QUEDA_PADRAO = 0.05
+
+# Consultas com IN (...) são feitas em blocos para não passar do limite
+# de parâmetros do SQLite
+TAMANHO_BLOCO = 500
+
+RE_MELI = re.compile(r"\b(MLB)-?(\d{6,})", re.IGNORECASE)
+RE_ASIN = re.compile(r"/(?:dp|gp/product|gp/aw/d|product)/([A-Z0-9]{10})(?:[/?]|$)", re.IGNORECASE)
+RE_SHOPEE_SLUG = re.compile(r"-i\.(\d+)\.(\d+)")
+RE_SHOPEE_PRODUTO = re.compile(r"/product/(\d+)/(\d+)")
+
+def identificar_produto(url):
+    """Devolve "meli:MLB123", "amazon:B0ABC12345" ou "shopee:loja.item",
+    ou None se a URL não identifica um produto."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if "mercadolivre" in host or "mercadolibre" in host:
+        achado = RE_MELI.search(parsed.path) or RE_MELI.search(parsed.query)
+        return f"meli:MLB{achado.group(2)}" if achado else None
+    if "amazon." in host:
+        achado = RE_ASIN.search(parsed.path)
+        return f"amazon:{achado.group(1).upper()}" if achado else None
+    if "shopee" in host:
+        achado = RE_SHOPEE_SLUG.search(parsed.path) or RE_SHOPEE_PRODUTO.search(parsed.path)
+        return f"shopee:{achado.group(1)}.{achado.group(2)}" if achado else None
+    return None
+
+class HistoricoPrecos:
+    def __init__(self, caminho):
+        caminho.parent.mkdir(exist_ok=True, parents=True)
+        self.lock = threading.Lock()
+        # Uma conexão só, protegida pelo lock: vários sites podem compactar
+        # ao mesmo tempo no rodar_todos.py
+        self.conexao = sqlite3.connect(str(caminho), check_same_thread=False, timeout=30)
+        with self.lock, self.conexao:
+            # WAL deixa o enviar_whatsapp.py gravar envios enquanto um scraper lê
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            self.conexao.execute("PRAGMA synchronous=NORMAL")
+            self.conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS observacoes (
+                    produto_id TEXT NOT NULL,
+                    site TEXT NOT NULL,
+                    preco REAL,
+                    preco_original REAL,
+                    visto_em REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_observacoes_produto ON observacoes (produto_id, visto_em);
+
+                CREATE TABLE IF NOT EXISTS envios (
+                    produto_id TEXT PRIMARY KEY,
+                    preco REAL NOT NULL,
+                    enviado_em REAL NOT NULL
+                );
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
+
+    def registrar_observacoes(self, site, registros):
+        agora = time.time()
+        linhas = [
+            (r["produto_id"], site, r.get("preco_valor"), r.get("preco_original_valor"), agora)
+            for r in registros if r.get("produto_id")
+        ]
+        with self.lock, self.conexao:
+            self.conexao.executemany(
+                "INSERT INTO observacoes (produto_id, site, preco, preco_original, visto_em) VALUES (?, ?, ?, ?, ?)",
+                linhas,
+            )
+
+    def ultimos_envios(self, produto_ids):
+        """Devolve {produto_id: preço do último envio} para os ids que já foram enviados."""
+        produto_ids = list(dict.fromkeys(produto_ids))
+        resultado = {}
+        with self.lock:
+            for i in range(0, len(produto_ids), TAMANHO_BLOCO):
+                bloco = produto_ids[i:i + TAMANHO_BLOCO]
+                marcadores = ",".join("?" * len(bloco))
+                resultado.update(self.conexao.execute(
+                    f"SELECT produto_id, preco FROM envios WHERE produto_id IN ({marcadores})", bloco
+                ))
+        return resultado
+
+    def enviados_desde(self, produto_ids, desde):
+        """Devolve o conjunto dos ids enviados ao WhatsApp a partir de `desde` (epoch).
+        Só envios contam: um produto coletado e não enviado pode ser coletado de novo."""
+        produto_ids = list(dict.fromkeys(produto_ids))
+        resultado = set()
+        with self.lock:
+            for i in range(0, len(produto_ids), TAMANHO_BLOCO):
+                bloco = produto_ids[i:i + TAMANHO_BLOCO]
+                marcadores = ",".join("?" * len(bloco))
+                resultado.update(linha[0] for linha in self.conexao.execute(
+                    f"SELECT produto_id FROM envios WHERE produto_id IN ({marcadores}) AND enviado_em >= ?",
+                    [*bloco, desde],
+                ))
+        return resultado
+
+    def registrar_envio(self, produto_id, preco):
+        if not produto_id or preco is None:
+            return
+        with self.lock, self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO envios (produto_id, preco, enviado_em) VALUES (?, ?, ?)",
+                (produto_id, preco, time.time()),
+            )
+
+    def filtrar_quedas(self, site, registros, limiar=LIMIAR_QUEDA_PADRAO, registrar=True):
+        """Grava as observações e devolve só os registros que valem um envio.
+        Com registrar=False só filtra (as observações já foram gravadas antes)."""
+        if registrar:
+            self.registrar_observacoes(site, registros)
+        enviados = self.ultimos_envios([r["produto_id"] for r in registros if r.get("produto_id")])
+
+        mantidos = []
+        for registro in registros:
+            produto_id, preco = registro.get("produto_id"), registro.get("preco_valor")
+            ultimo = enviados.get(produto_id)
+            # Sem identidade ou sem preço numérico não dá para comparar: mantém
+            if ultimo is None or preco is None or preco <= ultimo * (1 - limiar):
+                mantidos.append(registro)
+        descartados = len(registros) - len(mantidos)
+        if descartados:
+            print(f"  📉 [{site}] {descartados} produtos sem queda de preço desde o último envio foram descartados.")
+        return mantidos
@@ -0,0 +1,160 @@
+# Arquivo: scripts/journal_saida.py
+# Saída incremental à prova de quedas: cada registro é gravado num journal
+# JSONL assim que fica pronto. Se o Chrome cair ou a execução for
+# interrompida com Ctrl-C, o que já foi coletado continua no disco e a
+# próxima execução com --resume pula as URLs já concluídas.
+#
+# Formato das linhas de mensagens_<site>.jsonl:
+#   {"url": ..., "img_url": ..., "registro": {...}}   -> um produto coletado
+#   {"url": ..., "concluido": true}                    -> URL terminada
+#   {"url": ..., "descartado": true}                   -> tentativa abandonada
+#
+# No final, compactar() gera o mensagens_<site>.json que o
+# enviar_whatsapp.py lê, na ordem do arquivo de links.
+
+import os
+import json
+import threading
+
+class JournalSaida:
+    def __init__(self, output_json_file, retomar=False):
+        self.output_json_file = output_json_file
+        self.path = output_json_file.with_suffix(".jsonl")
+        self.lock = threading.Lock()
+        self.entradas = {}
+        self.concluidas = set()
+        # Chamados com (url, entradas) quando uma URL termina e com (url) quando
+        # uma tentativa é abandonada (ver fila_mensagens.py e fila_trabalho.py)
+        self.ao_concluir = []
+        self.ao_descartar = []
+
+        if retomar:
+            self._carregar()
+            print(f"  ↩️  Retomando: {len(self.concluidas)} URLs já concluídas em {self.path.name}.")
+        self.arquivo = open(self.path, "a" if retomar else "w", encoding="utf-8")
+
+    def _carregar(self):
+        try:
+            linhas = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+
+        # Registros de uma tentativa que não chegou ao marcador "concluido"
+        # são descartados: a URL será coletada de novo.
+        tentativa = {}
+        for linha in linhas:
+            try:
+                entrada = json.loads(linha)
+            except json.JSONDecodeError:
+                # Última linha pela metade (queda no meio da escrita): ignora
+                continue
+            url = entrada["url"]
+            if entrada.get("descartado"):
+                tentativa.pop(url, None)
+            elif entrada.get("concluido"):
+                self.concluidas.add(url)
+                self.entradas[url] = tentativa.pop(url, [])
+            else:
+                tentativa.setdefault(url, []).append(entrada)
+
+        # Reescreve o journal só com as URLs concluídas, para que as linhas da
+        # tentativa interrompida não se misturem com as da nova tentativa
+        tmp = self.path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for url, entradas in self.entradas.items():
+                for entrada in entradas:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                f.write(json.dumps({"url": url, "concluido": True}, ensure_ascii=False) + "\n")
+        tmp.replace(self.path)
+
+    def _escrever(self, entrada):
+        linha = json.dumps(entrada, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.arquivo.write(linha)
+            self.arquivo.flush()
+            os.fsync(self.arquivo.fileno())
+
+    def ja_processado(self, url):
+        return url in self.concluidas
+
+    def produtos_concluidos(self):
+        """Ids dos produtos já gravados por URLs concluídas (ex.: antes de um --resume)."""
+        with self.lock:
+            return {
+                entrada["registro"].get("produto_id")
+                for url in self.concluidas for entrada in self.entradas.get(url, [])
+            } - {None}
+
+    def gravar(self, url, registro, img_url=None):
+        entrada = {"url": url, "img_url": img_url, "registro": registro}
+        self._escrever(entrada)
+        with self.lock:
+            self.entradas.setdefault(url, []).append(entrada)
+
+    def descartar(self, url):
+        """Abandona os registros já gravados de uma URL que falhou no meio
+        (ex.: gerador que parou), para a próxima tentativa começar do zero."""
+        for callback in self.ao_descartar:
+            callback(url)
+        with self.lock:
+            if url in self.concluidas or url not in self.entradas:
+                return
+            del self.entradas[url]
+        self._escrever({"url": url, "descartado": True})
+
+    def concluir(self, url):
+        self._escrever({"url": url, "concluido": True})
+        with self.lock:
+            self.concluidas.add(url)
+            entradas = list(self.entradas.get(url, []))
+        for callback in self.ao_concluir:
+            callback(url, entradas)
+
+    def _anteriores(self):
+        try:
+            return json.loads(self.output_json_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def compactar(self, urls, pipeline=None, filtro=None, preparador=None, manter_anterior=None):
+        """Gera o JSON final na ordem de `urls`. Com `pipeline`, as imagens são
+        resolvidas pelo cache (inclusive as de execuções anteriores); com
+        `filtro`, só os registros que ele devolver vão para o JSON; com
+        `preparador`, as imagens já saem prontas para o WhatsApp. Com
+        `manter_anterior` (filtro dos registros antigos), um resultado vazio
+        não apaga os produtos do JSON anterior que o filtro deixar."""
+        with self.lock:
+            self.arquivo.close()
+            entradas = dict(self.entradas)
+
+        resultados, img_urls, produtos = [], {}, set()
+        for url in dict.fromkeys(urls):
+            for entrada in entradas.get(url, []):
+                registro = dict(entrada["registro"])
+                # O mesmo produto em duas listas (ex.: card repetido da Shopee) vira uma mensagem só
+                produto_id = registro.get("produto_id")
+                if produto_id:
+                    if produto_id in produtos:
+                        continue
+                    produtos.add(produto_id)
+                img_urls[id(registro)] = entrada.get("img_url")
+                resultados.append(registro)
+        if filtro is not None:
+            resultados = filtro(resultados)
+        if pipeline is not None:
+            pares = [pipeline.enviar(r, img_urls[id(r)]) for r in resultados]
+            pipeline.aguardar(pares)
+        if preparador is not None:
+            preparador.preparar(resultados)
+
+        if not resultados and manter_anterior is not None:
+            anteriores = self._anteriores()
+            resultados = manter_anterior(anteriores) if anteriores else []
+            if resultados:
+                print(f"  ℹ️  Nenhum produto novo: {len(resultados)} produtos do {self.output_json_file.name} anterior foram mantidos.")
+                if len(resultados) == len(anteriores):
+                    return resultados
+        tmp = self.output_json_file.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(resultados, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self.output_json_file)
+        return resultados
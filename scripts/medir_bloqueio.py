@@ -0,0 +1,67 @@
+# Arquivo: scripts/medir_bloqueio.py
+# Abre as mesmas URLs num Chrome sem bloqueio e noutro com o bloqueio de
+# recursos do site (imagens, fontes, vídeos, rastreadores) e compara o
+# tempo de carga e os bytes transferidos (pelo log de rede do DevTools).
+#
+#   python scripts/medir_bloqueio.py --site amazon https://www.amazon.com.br/dp/B0... https://...
+#   python scripts/medir_bloqueio.py --site meli --arquivo input_links/promos_meli.txt --limite 5
+
+import time
+import argparse
+from pathlib import Path
+
+from core_scraper import criar_driver, aplicar_bloqueio, medir_carga
+from rodar_todos import SITES, carregar_adaptador
+
+def medir(urls, adaptador, bloquear):
+    driver = criar_driver(log_performance=True, bloquear_imagens=bloquear and adaptador.bloquear_imagens)
+    if bloquear:
+        aplicar_bloqueio(driver, adaptador.padroes_bloqueio())
+    medidas = []
+    try:
+        medir_carga(driver)  # descarta os eventos da aba em branco
+        for url in urls:
+            inicio = time.perf_counter()
+            driver.get(url)
+            total = time.perf_counter() - inicio
+            _, carga, bytes_, recursos = medir_carga(driver) or (None, 0.0, 0, 0)
+            medidas.append((total, carga, bytes_, recursos))
+            print(f"  {'com' if bloquear else 'sem'} bloqueio | {total:5.2f}s | {bytes_ / 1024:7.0f} KB | "
+                  f"{recursos:4d} recursos | {url[:70]}")
+    finally:
+        driver.quit()
+    return medidas
+
+def resumir(nome, medidas):
+    n = len(medidas) or 1
+    total = sum(m[0] for m in medidas) / n
+    kb = sum(m[2] for m in medidas) / n / 1024
+    recursos = sum(m[3] for m in medidas) / n
+    print(f"  {nome:<14} {total:6.2f}s por página | ~{kb:7.0f} KB | {recursos:5.0f} recursos")
+    return total, kb
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara carga de página com e sem bloqueio de recursos")
+    parser.add_argument("urls", nargs="*", help="URLs para abrir")
+    parser.add_argument("--site", choices=list(SITES), required=True, help="Site cujas listas de bloqueio serão usadas")
+    parser.add_argument("--arquivo", default=None, help="Arquivo de links (uma URL por linha)")
+    parser.add_argument("--limite", type=int, default=5, help="Máximo de URLs lidas do --arquivo")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.arquivo:
+        linhas = Path(args.arquivo).read_text(encoding="utf-8").splitlines()
+        urls += [u.strip() for u in linhas if u.strip()][:args.limite]
+    if not urls:
+        parser.error("Informe URLs ou --arquivo")
+
+    adaptador = carregar_adaptador(args.site)
+    print(f"--- Medindo {len(urls)} URLs de {args.site} ---")
+    sem = medir(urls, adaptador, bloquear=False)
+    com = medir(urls, adaptador, bloquear=True)
+
+    print("\n--- RESUMO ---")
+    tempo_sem, kb_sem = resumir("sem bloqueio", sem)
+    tempo_com, kb_com = resumir("com bloqueio", com)
+    if tempo_sem and kb_sem:
+        print(f"  Economia: {1 - tempo_com / tempo_sem:.0%} do tempo, {1 - kb_com / kb_sem:.0%} dos bytes")
@@ -0,0 +1,158 @@
+# Arquivo: scripts/metricas.py
+# Instrumentação leve por etapa e por URL, compartilhada pelos scrapers e
+# pelo envio. Cada etapa vira um "span" numa linha de JSONL:
+#   {"inicio": ..., "etapa": "navegar", "site": "amazon", "url": ..., "ms": 812.4, "resultado": "ok", ...}
+#
+# Etapas usadas: url (total), resolver, navegar, extrair, imagem, llm, enviar.
+# O resultado é "ok", um código da própria etapa ("cache", "http",
+# "selenium"...) ou o nome da exceção que interrompeu a etapa.
+#
+# No fim, imprimir_resumo() mostra p50/p95/máx por etapa (percentis() devolve
+# os mesmos números de um site num dict). Com METRICAS=0
+# etapa() devolve sempre o mesmo span vazio e nada é medido nem gravado.
+#
+#   with etapa("navegar", via="http") as span:
+#       resp = session.get(url)
+#       span.resultado = f"http{resp.status_code}"
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+
+METRICAS_ATIVAS = os.environ.get("METRICAS", "1") != "0"
+METRICAS_PATH = Path(__file__).resolve().parent.parent / "output" / "metricas"
+
+_local = threading.local()
+_lock = threading.Lock()
+_arquivo = None
+_duracoes = {}
+
+def _contexto():
+    return getattr(_local, "campos", {})
+
+def capturar():
+    """Contexto da thread atual, para levar a outra thread (ex.: pools)."""
+    return dict(_contexto())
+
+@contextmanager
+def contexto(**campos):
+    """Campos (site, url...) herdados por todos os spans da thread."""
+    anterior = _contexto()
+    _local.campos = {**anterior, **campos}
+    try:
+        yield
+    finally:
+        _local.campos = anterior
+
+def _abrir():
+    global _arquivo
+    if _arquivo is None:
+        METRICAS_PATH.mkdir(exist_ok=True, parents=True)
+        caminho = METRICAS_PATH / f"metricas_{datetime.now():%Y%m%d-%H%M%S}_{os.getpid()}.jsonl"
+        _arquivo = open(caminho, "a", encoding="utf-8")
+        atexit.register(fechar)
+    return _arquivo
+
+def registrar(nome, segundos, resultado="ok", **campos):
+    """Grava um span já medido (ex.: etapas que terminam em outra thread)."""
+    if not METRICAS_ATIVAS:
+        return
+    span = {"inicio": round(time.time() - segundos, 3), "etapa": nome, **_contexto(), **campos,
+            "ms": round(segundos * 1000, 1), "resultado": resultado}
+    linha = json.dumps(span, ensure_ascii=False) + "\n"
+    chave = (span.get("site"), nome)
+    with _lock:
+        _abrir().write(linha)
+        _duracoes.setdefault(chave, []).append((segundos, resultado))
+
+class Span:
+    __slots__ = ("nome", "campos", "resultado", "_inicio")
+
+    def __init__(self, nome, campos):
+        self.nome = nome
+        self.campos = campos
+        self.resultado = "ok"
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        if tipo is not None:
+            self.resultado = tipo.__name__
+        registrar(self.nome, time.perf_counter() - self._inicio, self.resultado, **self.campos)
+        return False
+
+class _SpanNulo:
+    """Span de quando as métricas estão desligadas: não mede nada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, nome, valor):
+        pass
+
+_SPAN_NULO = _SpanNulo()
+
+def etapa(nome, **campos):
+    return Span(nome, campos) if METRICAS_ATIVAS else _SPAN_NULO
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+def percentis(site):
+    """{etapa: {"n", "p50_s", "p95_s", "max_s"}} dos spans de um site (ex.: para o benchmark)."""
+    with _lock:
+        dados = {nome: sorted(s for s, _ in medidas) for (site_span, nome), medidas in _duracoes.items()
+                 if site_span == site}
+    return {
+        nome: {"n": len(ordenados), "p50_s": round(_percentil(ordenados, 0.5), 3),
+               "p95_s": round(_percentil(ordenados, 0.95), 3), "max_s": round(ordenados[-1], 3)}
+        for nome, ordenados in sorted(dados.items())
+    }
+
+def limpar(site):
+    """Esquece as durações já somadas de um site (o JSONL não muda)."""
+    with _lock:
+        for chave in [k for k in _duracoes if k[0] == site]:
+            del _duracoes[chave]
+
+def imprimir_resumo(site=None):
+    """p50/p95/máx por etapa (de um site, ou de todos) e os resultados que não foram "ok"."""
+    if not METRICAS_ATIVAS:
+        return
+    with _lock:
+        if _arquivo is not None:
+            _arquivo.flush()
+        dados = {k: list(v) for k, v in _duracoes.items() if site is None or k[0] == site}
+    if not dados:
+        return
+    print(f"\n--- TEMPO POR ETAPA{f' ({site})' if site else ''} ---")
+    for (site_span, nome), medidas in sorted(dados.items(), key=lambda kv: (str(kv[0][0]), kv[0][1])):
+        ordenados = sorted(s for s, _ in medidas)
+        outros = {}
+        for _, resultado in medidas:
+            if resultado != "ok":
+                outros[resultado] = outros.get(resultado, 0) + 1
+        rotulo = nome if site else f"{site_span or '-'}/{nome}"
+        print(f"  {rotulo:<20} n={len(ordenados):<5} p50 {_percentil(ordenados, 0.5):6.2f}s | "
+              f"p95 {_percentil(ordenados, 0.95):6.2f}s | máx {ordenados[-1]:6.2f}s"
+              + (f" | {', '.join(f'{r}: {n}' for r, n in sorted(outros.items()))}" if outros else ""))
+    if _arquivo is not None:
+        print(f"  Spans em {_arquivo.name}")
+
+def fechar():
+    global _arquivo
+    with _lock:
+        if _arquivo is not None:
+            _arquivo.close()
+            _arquivo = None
@@ -0,0 +1,233 @@
+# Arquivo: scripts/navegador_daemon.py
+# Chrome de longa duração compartilhado por todos os scrapers. Em vez de
+# cada script abrir (e fechar) o seu Chrome, o daemon mantém um navegador
+# aberto com um perfil próprio (cookies, consentimentos e sessões ficam
+# salvos entre execuções) e um punhado de abas em branco prontas.
+#
+# Os scrapers se conectam por depuração remota: com NAVEGADOR_DAEMON
+# definido (ou --daemon no rodar_todos.py), criar_driver() do core_scraper
+# reserva uma aba aqui e anexa o chromedriver a ela. Ao terminar, a aba é
+# fechada e outra em branco entra no lugar.
+#
+#   python scripts/navegador_daemon.py iniciar --abas 4
+#   set NAVEGADOR_DAEMON=127.0.0.1:9333   (PowerShell: $env:NAVEGADOR_DAEMON="127.0.0.1:9333")
+#   python scripts/rodar_todos.py
+#   python scripts/navegador_daemon.py status | parar
+#
+# Serviço HTTP local (só em 127.0.0.1):
+#   GET /reservar          -> {"aba": <id do alvo CDP>, "debugger": "127.0.0.1:9222"}
+#   GET /liberar?aba=<id>  -> fecha a aba e repõe uma em branco
+#   GET /status            -> abas livres e reservadas
+#   GET /parar             -> encerra o daemon e o Chrome
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import requests
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from core_scraper import CACHE_PATH, USER_AGENT, NAVEGADOR_DAEMON_PADRAO
+
+CHROME_PATH = os.environ.get("CHROME_PATH", r"C:\Program Files\Google\Chrome\Application\chrome.exe")
+PERFIL_DAEMON_PATH = CACHE_PATH / "chrome_daemon"
+PORTA_DEPURACAO = 9222
+ABAS_PADRAO = 4
+# Páginas abertas uma vez na subida, para o perfil já ter os cookies de cada site
+PAGINAS_AQUECIMENTO = (
+    "https://www.mercadolivre.com.br/",
+    "https://www.amazon.com.br/",
+    "https://shopee.com.br/",
+)
+
+class NavegadorDaemon:
+    def __init__(self, porta_depuracao=PORTA_DEPURACAO, abas=ABAS_PADRAO, headless=True, perfil=PERFIL_DAEMON_PATH):
+        self.porta_depuracao = porta_depuracao
+        self.abas = abas
+        self.headless = headless
+        self.perfil = perfil
+        self.base = f"http://127.0.0.1:{porta_depuracao}"
+        self.processo = None
+        self.lock = threading.Lock()
+        # Só uma reposição de abas por vez, senão duas threads criam a mesma aba a mais
+        self.lock_reposicao = threading.Lock()
+        self.livres = []
+        self.reservadas = {}
+        self.stats = {"reservas": 0, "abas_criadas": 0}
+
+    # --- Chrome ---
+    def iniciar_chrome(self, timeout=30):
+        self.perfil.mkdir(exist_ok=True, parents=True)
+        argumentos = [
+            CHROME_PATH,
+            f"--remote-debugging-port={self.porta_depuracao}",
+            f"--user-data-dir={self.perfil}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--window-size=1920,1080",
+            "--disable-blink-features=AutomationControlled",
+            f"--user-agent={USER_AGENT}",
+            "about:blank",
+        ]
+        if self.headless:
+            argumentos.insert(1, "--headless=new")
+        self.processo = subprocess.Popen(argumentos)
+
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            try:
+                versao = requests.get(f"{self.base}/json/version", timeout=2).json()
+                print(f"🌐 Chrome pronto: {versao.get('Browser')} (depuração em {self.base})")
+                return
+            except requests.RequestException:
+                time.sleep(0.3)
+        raise RuntimeError(f"O Chrome não abriu a porta de depuração {self.porta_depuracao} em {timeout}s")
+
+    def _nova_aba(self, url="about:blank"):
+        # Versões novas do Chrome exigem PUT em /json/new
+        resp = requests.put(f"{self.base}/json/new?{url}", timeout=10)
+        resp.raise_for_status()
+        with self.lock:
+            self.stats["abas_criadas"] += 1
+        return resp.json()["id"]
+
+    def _fechar_aba(self, aba):
+        try:
+            requests.get(f"{self.base}/json/close/{aba}", timeout=5)
+        except requests.RequestException:
+            pass
+
+    def aquecer(self, paginas=PAGINAS_AQUECIMENTO, espera=8):
+        abas = []
+        for url in paginas:
+            try:
+                abas.append(self._nova_aba(url))
+            except requests.RequestException as e:
+                print(f"  ⚠️ Não foi possível abrir {url}: {e}")
+        time.sleep(espera)
+        for aba in abas:
+            self._fechar_aba(aba)
+        print(f"🔥 Perfil aquecido com {len(abas)} páginas.")
+
+    def completar_abas(self):
+        with self.lock_reposicao:
+            while True:
+                with self.lock:
+                    if len(self.livres) >= self.abas:
+                        return
+                aba = self._nova_aba()
+                with self.lock:
+                    self.livres.append(aba)
+
+    def _repor_em_segundo_plano(self):
+        threading.Thread(target=self.completar_abas, daemon=True).start()
+
+    # --- Reservas ---
+    def reservar(self):
+        with self.lock:
+            aba = self.livres.pop() if self.livres else None
+        if aba is None:
+            aba = self._nova_aba()
+        with self.lock:
+            self.reservadas[aba] = time.time()
+            self.stats["reservas"] += 1
+        # Repõe a aba em segundo plano: a próxima reserva já encontra uma pronta
+        self._repor_em_segundo_plano()
+        return aba
+
+    def liberar(self, aba):
+        with self.lock:
+            self.reservadas.pop(aba, None)
+        # Fechar e abrir outra é mais barato do que limpar o estado da aba
+        self._fechar_aba(aba)
+        self._repor_em_segundo_plano()
+
+    def status(self):
+        with self.lock:
+            return {"livres": len(self.livres), "reservadas": len(self.reservadas), **self.stats}
+
+    def encerrar(self):
+        if self.processo and self.processo.poll() is None:
+            self.processo.terminate()
+            try:
+                self.processo.wait(10)
+            except subprocess.TimeoutExpired:
+                self.processo.kill()
+
+def criar_servidor(daemon, porta):
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, dados, status=200):
+            corpo = json.dumps(dados).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                if url.path == "/reservar":
+                    self._responder({"aba": daemon.reservar(), "debugger": f"127.0.0.1:{daemon.porta_depuracao}"})
+                elif url.path == "/liberar":
+                    daemon.liberar(parse_qs(url.query).get("aba", [""])[0])
+                    self._responder({"ok": True})
+                elif url.path == "/status":
+                    self._responder(daemon.status())
+                elif url.path == "/parar":
+                    self._responder({"ok": True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    self._responder({"erro": "rota desconhecida"}, 404)
+            except requests.RequestException as e:
+                self._responder({"erro": str(e)}, 503)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+
+def iniciar(args):
+    daemon = NavegadorDaemon(args.porta_depuracao, args.abas, headless=not args.visivel)
+    daemon.iniciar_chrome()
+    try:
+        if not args.sem_aquecer:
+            daemon.aquecer()
+        daemon.completar_abas()
+        servidor = criar_servidor(daemon, args.porta)
+        print(f"✅ Daemon do navegador em 127.0.0.1:{args.porta} com {args.abas} abas prontas. Ctrl-C para encerrar.")
+        print(f"   Nos scrapers: NAVEGADOR_DAEMON=127.0.0.1:{args.porta} ou rodar_todos.py --daemon")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        servidor.server_close()
+    finally:
+        print(f"⏹️  Encerrando o Chrome ({daemon.status()['reservas']} reservas atendidas).")
+        daemon.encerrar()
+
+if __name__ == "__main__":
+    porta_padrao = NAVEGADOR_DAEMON_PADRAO.rpartition(":")[2]
+    parser = argparse.ArgumentParser(description="Chrome compartilhado pelos scrapers")
+    parser.add_argument("comando", nargs="?", choices=("iniciar", "status", "parar"), default="iniciar")
+    parser.add_argument("--porta", type=int, default=int(porta_padrao), help=f"Porta do serviço de reservas (padrão: {porta_padrao})")
+    parser.add_argument("--porta-depuracao", type=int, default=PORTA_DEPURACAO,
+                        help=f"Porta de depuração remota do Chrome (padrão: {PORTA_DEPURACAO})")
+    parser.add_argument("--abas", type=int, default=ABAS_PADRAO, help=f"Abas em branco prontas (padrão: {ABAS_PADRAO})")
+    parser.add_argument("--visivel", action="store_true", help="Abre o Chrome com janela (ex.: para resolver um captcha à mão)")
+    parser.add_argument("--sem-aquecer", action="store_true", help="Não visita as páginas iniciais dos sites na subida")
+    args = parser.parse_args()
+
+    if args.comando == "iniciar":
+        iniciar(args)
+    else:
+        try:
+            resp = requests.get(f"http://127.0.0.1:{args.porta}/{args.comando}", timeout=5)
+            print(json.dumps(resp.json(), ensure_ascii=False, indent=2))
+        except requests.RequestException as e:
+            print(f"ERRO: daemon não encontrado em 127.0.0.1:{args.porta} ({e})")
+            sys.exit(1)
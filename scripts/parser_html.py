@@ -0,0 +1,70 @@
+# Arquivo: scripts/parser_html.py
+# Um único ponto para transformar HTML em BeautifulSoup, com o backend
+# escolhido por HTML_PARSER:
+#   - "lxml": parser em C, várias vezes mais rápido que o html.parser
+#   - "selectolax": recorta só os trechos pedidos (recortes=...) com o
+#     parser Lexbor e entrega ao BeautifulSoup apenas esses pedaços
+#   - "html.parser": o parser puro Python de sempre
+#   - "auto" (padrão): selectolax se houver recortes, senão lxml, e
+#     html.parser se nenhum dos dois estiver instalado
+#
+# As páginas da Amazon têm vários MB: ler a página uma vez só, e de
+# preferência só o que interessa, é o que mais pesa no tempo de CPU.
+
+import os
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    TEM_LXML = True
+except ImportError:
+    TEM_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    TEM_SELECTOLAX = True
+except ImportError:
+    TEM_SELECTOLAX = False
+
+PARSERS = ("auto", "lxml", "selectolax", "html.parser")
+PARSER_PADRAO = os.environ.get("HTML_PARSER", "auto")
+
+def _backend_bs():
+    return "lxml" if TEM_LXML else "html.parser"
+
+def _recortar(html, recortes):
+    """HTML só dos elementos que casam com os seletores, na ordem da página."""
+    arvore = LexborHTMLParser(html)
+    vistos, partes = set(), []
+    for no in arvore.css(", ".join(recortes)):
+        # Um recorte dentro de outro já vem junto com o de fora
+        if no.mem_id in vistos:
+            continue
+        pai, dentro = no.parent, False
+        while pai is not None:
+            if pai.mem_id in vistos:
+                dentro = True
+                break
+            pai = pai.parent
+        if not dentro:
+            vistos.add(no.mem_id)
+            partes.append(no.html)
+    return "\n".join(partes)
+
+def parse_html(html, recortes=None, parser=None):
+    """Lê o HTML uma vez. Com `recortes` (seletores CSS) e selectolax
+    disponível, só esses trechos viram árvore do BeautifulSoup."""
+    parser = parser or PARSER_PADRAO
+    if parser not in PARSERS:
+        raise ValueError(f"Parser inválido '{parser}'. Use um de {PARSERS}")
+    if parser == "auto":
+        parser = "selectolax" if recortes and TEM_SELECTOLAX else _backend_bs()
+    if parser == "selectolax":
+        if not TEM_SELECTOLAX:
+            raise ImportError("selectolax não está instalado (pip install selectolax)")
+        if recortes:
+            html = _recortar(html, recortes)
+        parser = _backend_bs()
+    elif parser == "lxml" and not TEM_LXML:
+        raise ImportError("lxml não está instalado (pip install lxml)")
+    return BeautifulSoup(html, parser)
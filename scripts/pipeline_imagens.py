@@ -0,0 +1,98 @@
+# Arquivo: scripts/pipeline_imagens.py
+# Etapa de imagens em segundo plano: os scrapers enviam (registro, img_url)
+# e continuam navegando enquanto um pool de threads baixa e converte as
+# imagens. Antes de gravar o JSON, o scraper chama aguardar() e cada
+# registro recebe o caminho da imagem no cache (ou None, se algo deu errado).
+
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from cache_imagens import CacheImagens
+import metricas
+
+USER_AGENT_PADRAO = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+
+class PipelineImagens:
+    def __init__(self, pasta, max_workers=8, timeout=15, user_agent=USER_AGENT_PADRAO, por_conteudo=False):
+        self.timeout = timeout
+        self.cache = CacheImagens(pasta, por_conteudo=por_conteudo)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        # Um pool de conexões por host do CDN, do tamanho do pool de threads
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imagens")
+        self.pendentes = []
+        # A mesma URL enviada duas vezes na execução reaproveita o mesmo download
+        self.por_url = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def _baixar_e_salvar(self, img_url, campos):
+        with metricas.contexto(**campos), metricas.etapa("imagem") as span:
+            try:
+                return self.cache.obter(img_url, self.session, timeout=self.timeout)
+            except requests.RequestException as e:
+                span.resultado = type(e).__name__
+                print(f"  ⚠️ Erro de rede ao baixar imagem '{img_url}': {e}")
+            except Exception as e:
+                span.resultado = type(e).__name__
+                print(f"  ⚠️ Erro ao processar imagem '{img_url}': {e}")
+        return None
+
+    def enviar(self, registro, img_url):
+        """Agenda o download e deixa registro["imagem"] como None até aguardar()."""
+        registro["imagem"] = None
+        if not img_url:
+            return None
+        with self.lock:
+            futuro = self.por_url.get(img_url)
+            if futuro is None:
+                futuro = self.executor.submit(self._baixar_e_salvar, img_url, metricas.capturar())
+                self.por_url[img_url] = futuro
+            par = (registro, futuro)
+            self.pendentes.append(par)
+        return par
+
+    def aguardar(self, pares=None):
+        """Espera as imagens e preenche o campo "imagem" de cada registro.
+
+        Sem argumentos espera tudo o que foi enviado; com `pares` (o retorno
+        de enviar) espera só aqueles, o que permite vários sites dividirem
+        o mesmo pipeline."""
+        if pares is None:
+            with self.lock:
+                pendentes, self.pendentes = self.pendentes, []
+        else:
+            pendentes = [p for p in pares if p is not None]
+
+        ok, falhas = 0, 0
+        for registro, futuro in pendentes:
+            registro["imagem"] = futuro.result()
+            if registro["imagem"]:
+                ok += 1
+            else:
+                falhas += 1
+
+        if pendentes:
+            stats = self.cache.stats
+            print(f"  🖼️  Imagens: {ok} prontas, {falhas} com erro "
+                  f"(cache: {stats['hits']} hits, {stats['revalidados']} revalidadas, {stats['baixados']} baixadas).")
+        return ok, falhas
+
+    def fechar(self):
+        self.aguardar()
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        self.cache.limpar()
+        self.cache.salvar_index()
@@ -0,0 +1,113 @@
+# Arquivo: scripts/podar_html.py
+# Poda do HTML antes de mandar a página para o Llama. O page_source do
+# Mercado Livre tem megabytes de scripts, CSS e SVG; para extrair nome e
+# preços só interessam o .ui-pdp-container, os blocos de preço e o JSON-LD.
+#
+# Para conferir a poda nas páginas salvas pelo 4_scraper_llama_meli.py:
+#   python scripts/podar_html.py output/debug_html/*.html
+
+import re
+import sys
+import json
+from pathlib import Path
+from bs4 import BeautifulSoup, Comment
+
+SELETOR_CONTAINER = ".ui-pdp-container"
+SELETORES_PRECO = ".ui-pdp-price, .ui-pdp-price__main-container, .ui-pdp-price__second-line"
+SELETOR_TITULO = "h1.ui-pdp-title"
+
+TAGS_DESCARTADAS = ["script", "style", "svg", "noscript", "iframe", "link", "meta", "img", "picture",
+                    "source", "video", "button", "input", "form", "template"]
+
+# Partes do container que não ajudam a achar nome e preço e pesam muito
+SELETORES_DESCARTADOS = [
+    ".ui-pdp-gallery", ".ui-pdp-description", ".ui-review-capability", ".ui-pdp-questions",
+    ".ui-recommendations", ".ui-pdp-specs", ".ui-vpp-highlighted-specs", ".ui-seller-data",
+    ".ui-pdp-payment", ".ui-pdp-shipping", ".ui-pdp-other-sellers",
+]
+
+# aria-label fica porque o ML escreve ali "Antes: 199 reais", e class
+# porque diferencia o preço atual do riscado (andes-money-amount--previous)
+ATRIBUTOS_MANTIDOS = ("class", "aria-label")
+
+def estimar_tokens(texto):
+    """Estimativa barata (~4 caracteres por token), só para o log."""
+    return len(texto) // 4
+
+def _extrair_json_ld(soup):
+    blocos = []
+    for tag in soup.find_all("script", type="application/ld+json"):
+        texto = tag.string or tag.get_text()
+        try:
+            texto = json.dumps(json.loads(texto), ensure_ascii=False, separators=(",", ":"))
+        except ValueError:
+            texto = texto.strip()
+        if texto:
+            blocos.append(texto)
+    return blocos
+
+def _limpar(bloco):
+    for comentario in bloco.find_all(string=lambda t: isinstance(t, Comment)):
+        comentario.extract()
+    for tag in bloco.find_all(TAGS_DESCARTADAS):
+        tag.decompose()
+    for tag in bloco.select(", ".join(SELETORES_DESCARTADOS)):
+        tag.decompose()
+    for tag in [bloco, *bloco.find_all(True)]:
+        tag.attrs = {k: v for k, v in tag.attrs.items() if k in ATRIBUTOS_MANTIDOS}
+
+def _blocos_relevantes(soup):
+    blocos = []
+    container = soup.select_one(SELETOR_CONTAINER)
+    if container is not None:
+        blocos.append(container)
+    # Título e preços fora do container (layouts alternativos do ML)
+    for tag in soup.select(f"{SELETOR_TITULO}, {SELETORES_PRECO}"):
+        if not any(b is tag or b in tag.parents for b in blocos):
+            blocos.append(tag)
+    return blocos
+
+def podar_html(html_content):
+    """Devolve só o HTML relevante para o Llama: o container do produto e
+    os blocos de preço, sem scripts/estilos/SVGs/atributos, mais o JSON-LD."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    json_ld = _extrair_json_ld(soup)
+
+    blocos = _blocos_relevantes(soup)
+    if not blocos and soup.body is not None:
+        # Página fora do padrão: manda o body inteiro, mas ainda limpo
+        blocos = [soup.body]
+    for bloco in blocos:
+        _limpar(bloco)
+
+    partes = [str(b) for b in blocos]
+    partes += [f'<script type="application/ld+json">{j}</script>' for j in json_ld]
+    podado = "\n".join(partes)
+    podado = re.sub(r">\s+<", "><", podado)
+    return re.sub(r"\s{2,}", " ", podado).strip()
+
+def conferir_poda(html_content, podado):
+    """Confere se o título e os valores de preço da página original
+    continuam no HTML podado. Devolve a lista do que se perdeu."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    esperados = []
+    titulo = soup.select_one(SELETOR_TITULO)
+    if titulo:
+        esperados.append(titulo.get_text(" ", strip=True))
+    for preco in soup.select(f"{SELETORES_PRECO}"):
+        esperados += [f.get_text(strip=True) for f in preco.select(".andes-money-amount__fraction")]
+    texto_podado = BeautifulSoup(podado, "html.parser").get_text(" ", strip=True)
+    return [e for e in dict.fromkeys(esperados) if e and e not in texto_podado]
+
+if __name__ == "__main__":
+    total_antes, total_depois = 0, 0
+    for caminho in sys.argv[1:]:
+        html_content = Path(caminho).read_text(encoding="utf-8")
+        podado = podar_html(html_content)
+        antes, depois = estimar_tokens(html_content), estimar_tokens(podado)
+        total_antes, total_depois = total_antes + antes, total_depois + depois
+        perdidos = conferir_poda(html_content, podado)
+        status = "✅" if not perdidos else f"❌ perdeu {perdidos}"
+        print(f"{caminho}: ~{antes} -> ~{depois} tokens {status}")
+    if total_antes:
+        print(f"\nTotal: ~{total_antes} -> ~{total_depois} tokens ({100 - total_depois * 100 // total_antes}% a menos)")
@@ -0,0 +1,21 @@
+# Arquivo: scripts/precos.py
+# Conversão de preços em BRL entre o texto da página ("R$1.299,90") e o
+# número (1299.9). Fica fora do core_scraper para os módulos de extração e
+# os testes não dependerem do Selenium.
+
+def preco_para_float(preco):
+    """Converte "R$1.299,90" em 1299.9. Retorna None se não for um preço."""
+    try:
+        return float(preco.replace("R$", "").replace(".", "").replace(",", ".").strip())
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def formatar_preco(valor):
+    """Converte 1299.9 em "R$1.299,90", o mesmo formato lido do HTML. Retorna None se não for número."""
+    if isinstance(valor, bool):
+        return None
+    try:
+        valor = float(valor)
+    except (ValueError, TypeError):
+        return None
+    return "R$" + f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
@@ -0,0 +1,151 @@
+# Arquivo: scripts/preparar_imagens.py
+# Etapa pós-coleta: deixa cada imagem pronta para o WhatsApp num pool de
+# processos (redimensionar e recomprimir é trabalho de CPU, o GIL não
+# deixa threads ajudarem). Para cada imagem do cache são gerados:
+#   whatsapp/<nome>.<lado>q<qualidade>.jpeg  -> JPEG reduzido (lado máximo e tamanho alvo)
+#   whatsapp/<nome>.<lado>q<qualidade>.dib   -> bytes CF_DIB prontos para a área de transferência
+#
+# O enviar_whatsapp.py só lê o .dib e coloca no clipboard, sem abrir a
+# imagem nem converter para BMP na hora do envio.
+#
+#   python scripts/preparar_imagens.py output/mensagens_json/mensagens_meli.json
+
+import io
+import os
+import sys
+import json
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+LADO_MAX_PADRAO = int(os.environ.get("WHATSAPP_LADO_MAX", "1280"))
+QUALIDADE_PADRAO = int(os.environ.get("WHATSAPP_QUALIDADE", "80"))
+MAX_KB_PADRAO = int(os.environ.get("WHATSAPP_MAX_KB", "300"))
+# Qualidade mínima aceita ao tentar caber em MAX_KB
+QUALIDADE_MINIMA = 50
+PASTA_PREPARADAS = "whatsapp"
+
+def _atualizado(destino, origem):
+    return destino.exists() and destino.stat().st_mtime >= origem.stat().st_mtime
+
+def _gravar(destino, dados):
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(dados)
+    tmp.replace(destino)
+
+def preparar_imagem(caminho, pasta_destino, lado_max=LADO_MAX_PADRAO, qualidade=QUALIDADE_PADRAO, max_kb=MAX_KB_PADRAO):
+    """Gera o JPEG reduzido e o DIB de uma imagem. Roda nos processos do pool,
+    por isso é uma função de módulo. Retorna (jpeg, dib) ou None se falhar."""
+    origem = Path(caminho)
+    pasta_destino = Path(pasta_destino)
+    base = f"{origem.stem}.{lado_max}q{qualidade}"
+    jpeg, dib = pasta_destino / f"{base}.jpeg", pasta_destino / f"{base}.dib"
+    try:
+        if _atualizado(jpeg, origem) and _atualizado(dib, origem):
+            return str(jpeg), str(dib)
+
+        imagem = Image.open(origem).convert("RGB")
+        imagem.thumbnail((lado_max, lado_max), Image.LANCZOS)
+
+        # Baixa a qualidade aos poucos até caber no tamanho alvo
+        q = qualidade
+        while True:
+            saida = io.BytesIO()
+            imagem.save(saida, "JPEG", quality=q, optimize=True)
+            if saida.tell() <= max_kb * 1024 or q <= QUALIDADE_MINIMA:
+                break
+            q -= 10
+
+        bmp = io.BytesIO()
+        imagem.save(bmp, "BMP")
+
+        pasta_destino.mkdir(exist_ok=True, parents=True)
+        _gravar(jpeg, saida.getvalue())
+        _gravar(dib, bmp.getvalue()[14:])  # remove cabeçalho BMP
+        return str(jpeg), str(dib)
+    except Exception as e:
+        print(f"  ⚠️ Erro ao preparar a imagem '{caminho}': {e}")
+        return None
+
+class PreparadorImagens:
+    def __init__(self, pasta_imagens, processos=None, lado_max=LADO_MAX_PADRAO,
+                 qualidade=QUALIDADE_PADRAO, max_kb=MAX_KB_PADRAO):
+        self.pasta = Path(pasta_imagens) / PASTA_PREPARADAS
+        self.processos = processos
+        self.opcoes = {"lado_max": lado_max, "qualidade": qualidade, "max_kb": max_kb}
+        self.executor = None
+        # Sites e publicadores da fila de mensagens preparam ao mesmo tempo
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def preparar(self, registros):
+        """Preenche "imagem_whatsapp" e "imagem_dib" em cada registro com imagem."""
+        caminhos = list(dict.fromkeys(r["imagem"] for r in registros if r.get("imagem")))
+        if not caminhos:
+            return registros
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.processos)
+
+        futuros = {c: self.executor.submit(preparar_imagem, c, self.pasta, **self.opcoes) for c in caminhos}
+        prontos = {c: f.result() for c, f in futuros.items()}
+        for registro in registros:
+            pronto = prontos.get(registro.get("imagem"))
+            registro["imagem_whatsapp"], registro["imagem_dib"] = pronto or (None, None)
+
+        ok = sum(1 for p in prontos.values() if p)
+        print(f"  📐 Imagens para o WhatsApp: {ok} prontas, {len(prontos) - ok} com erro.")
+        return registros
+
+    def limpar(self):
+        """Remove as versões preparadas cuja imagem original saiu do cache."""
+        if not self.pasta.exists():
+            return 0
+        originais = {p.stem for p in self.pasta.parent.glob("*.jpeg")}
+        removidas = 0
+        for arquivo in self.pasta.iterdir():
+            if arquivo.name.split(".", 1)[0] not in originais:
+                arquivo.unlink(missing_ok=True)
+                removidas += 1
+        return removidas
+
+    def fechar(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.limpar()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepara as imagens de um JSON de mensagens para o WhatsApp")
+    parser.add_argument("arquivos", nargs="+", help="mensagens_<site>.json gerados pelos scrapers")
+    parser.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--lado-max", type=int, default=LADO_MAX_PADRAO,
+                        help=f"Maior lado da imagem em pixels (padrão: {LADO_MAX_PADRAO}, ou WHATSAPP_LADO_MAX)")
+    parser.add_argument("--qualidade", type=int, default=QUALIDADE_PADRAO,
+                        help=f"Qualidade JPEG (padrão: {QUALIDADE_PADRAO}, ou WHATSAPP_QUALIDADE)")
+    parser.add_argument("--max-kb", type=int, default=MAX_KB_PADRAO,
+                        help=f"Tamanho alvo do JPEG em KB (padrão: {MAX_KB_PADRAO}, ou WHATSAPP_MAX_KB)")
+    args = parser.parse_args()
+
+    for arquivo in map(Path, args.arquivos):
+        try:
+            registros = json.loads(arquivo.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"ERRO: não foi possível ler '{arquivo}': {e}")
+            sys.exit(1)
+        pastas = {Path(r["imagem"]).parent for r in registros if r.get("imagem")}
+        for pasta in pastas:
+            with PreparadorImagens(pasta, args.processos, args.lado_max, args.qualidade, args.max_kb) as preparador:
+                preparador.preparar([r for r in registros if r.get("imagem") and Path(r["imagem"]).parent == pasta])
+        tmp = arquivo.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(registros, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(arquivo)
+        print(f"✅ {arquivo} atualizado.")
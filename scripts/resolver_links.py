@@ -0,0 +1,141 @@
+# Arquivo: scripts/resolver_links.py
+# Resolve os links curtos de afiliado (amzn.to, mercadolivre.com/sec,
+# s.shopee.com.br) para a URL canônica do produto ANTES de qualquer
+# trabalho no navegador. As resoluções ficam em cache no disco com TTL,
+# e os links que ainda não estão no cache são resolvidos em paralelo.
+#
+# Importante: a mensagem enviada continua usando o link de afiliado
+# original; a URL resolvida serve só para navegar/extrair os dados.
+
+import json
+import time
+import threading
+import requests
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urlunparse, urljoin
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+import metricas
+
+USER_AGENT_PADRAO = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+TTL_PADRAO_SEGUNDOS = 7 * 24 * 3600
+
+DOMINIOS_ENCURTADOS = ("amzn.to", "s.shopee.com.br", "shope.ee")
+
+def eh_link_curto(url):
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host in DOMINIOS_ENCURTADOS:
+        return True
+    return host.endswith("mercadolivre.com") and parsed.path.startswith("/sec/")
+
+def normalizar_url(url):
+    parsed = urlparse(url)
+    # A Amazon às vezes redireciona para outro domínio regional
+    if "amazon." in parsed.netloc and not parsed.netloc.endswith("amazon.com.br"):
+        parsed = parsed._replace(netloc="www.amazon.com.br")
+    return urlunparse(parsed)
+
+def eh_pagina_intermediaria_meli(url):
+    parsed = urlparse(url)
+    return "mercadolivre.com" in parsed.netloc and "/social/" in parsed.path
+
+class ResolvedorLinks:
+    def __init__(self, cache_path, ttl=TTL_PADRAO_SEGUNDOS, max_workers=8, user_agent=USER_AGENT_PADRAO):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = self._ler_cache()
+
+    def _ler_cache(self):
+        try:
+            return json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _salvar_cache(self):
+        self.cache_path.parent.mkdir(exist_ok=True, parents=True)
+        with self.lock:
+            # Outro scraper pode ter gravado no meio tempo: junta antes de salvar
+            atual = self._ler_cache()
+            atual.update(self.cache)
+            self.cache = atual
+            conteudo = json.dumps(self.cache, ensure_ascii=False, indent=2)
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(conteudo, encoding="utf-8")
+        tmp.replace(self.cache_path)
+
+    def _do_cache(self, url):
+        with self.lock:
+            entrada = self.cache.get(url)
+        if entrada and time.time() - entrada["resolvido_em"] < self.ttl:
+            return entrada["final"]
+        return None
+
+    def _seguir_redirects(self, url):
+        try:
+            resp = self.session.head(url, allow_redirects=True, timeout=15)
+            if resp.status_code < 400:
+                return resp.url
+        except requests.RequestException:
+            pass
+        # Alguns encurtadores não aceitam HEAD: cai para um GET sem baixar o corpo
+        with self.session.get(url, allow_redirects=True, timeout=15, stream=True) as resp:
+            return resp.url
+
+    def _resolver_intermediaria_meli(self, url):
+        resp = self.session.get(url, allow_redirects=True, timeout=15)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, "html.parser")
+        link = soup.find("a", string=lambda t: t and "Ir para produto" in t)
+        if link and link.get("href"):
+            return urljoin(resp.url, link["href"])
+        return resp.url
+
+    def _resolver_sem_cache(self, url):
+        final = self._seguir_redirects(url)
+        if eh_pagina_intermediaria_meli(final):
+            final = self._resolver_intermediaria_meli(final)
+        return normalizar_url(final)
+
+    def resolver(self, url):
+        """Resolve um único link. Links que não são encurtados voltam como estão."""
+        if not eh_link_curto(url):
+            return normalizar_url(url)
+        final = self._do_cache(url)
+        if final:
+            return final
+        try:
+            with metricas.etapa("resolver", url=url):
+                final = self._resolver_sem_cache(url)
+        except requests.RequestException as e:
+            print(f"  ⚠️ Erro ao resolver {url}: {e}")
+            return url
+        with self.lock:
+            self.cache[url] = {"final": final, "resolvido_em": time.time()}
+        return final
+
+    def resolver_todos(self, urls):
+        """Resolve uma lista de links em paralelo e devolve {url: url_final}."""
+        urls = list(dict.fromkeys(urls))
+        faltando = [u for u in urls if eh_link_curto(u) and not self._do_cache(u)]
+        resolvidos = {}
+        if faltando:
+            print(f"  🔗 Resolvendo {len(faltando)} links curtos ({len(urls) - len(faltando)} já estavam no cache)...")
+            campos = metricas.capturar()
+
+            def resolver_no_contexto(url):
+                with metricas.contexto(**campos):
+                    return self.resolver(url)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                resolvidos = dict(zip(faltando, executor.map(resolver_no_contexto, faltando)))
+            self._salvar_cache()
+        return {u: resolvidos.get(u) or self.resolver(u) for u in urls}
@@ -0,0 +1,192 @@
+# Arquivo: scripts/rodar_todos.py
+# Ponto de entrada único: roda todos os sites AO MESMO TEMPO, cada um com
+# o seu orçamento de workers e o seu rate limit, e gera os mesmos
+# mensagens_<site>.json dos scripts individuais. O lote diário passa a
+# levar o tempo do site mais lento, e não a soma de todos.
+#
+# Exemplos:
+#   python scripts/rodar_todos.py
+#   python scripts/rodar_todos.py --sites meli amazon --workers meli=4 amazon=2
+#   python scripts/rodar_todos.py --intervalo shopee=5:8 --resume
+#   python scripts/rodar_todos.py --limiar-queda 0.1    (ou --sem-filtro)
+#   python scripts/rodar_todos.py --daemon              (Chrome do navegador_daemon.py)
+#   python scripts/rodar_todos.py --sem-bloqueio        (Chrome baixa imagens, fontes e rastreadores)
+#   python scripts/rodar_todos.py --publicar            (envio em paralelo: enviar_whatsapp.py --fila)
+#   python scripts/rodar_todos.py --fila-trabalho 192.168.0.10:9444   (links divididos entre máquinas)
+
+import time
+import argparse
+import threading
+import importlib.util
+from pathlib import Path
+
+from core_scraper import IMAGES_PATH, CACHE_PATH, HISTORICO_PRECOS_PATH, FILA_MENSAGENS_PATH, LIMIAR_QUEDA, JANELA_DUPLICADOS, NAVEGADOR_DAEMON_PADRAO, executar_site, usar_daemon, usar_bloqueio
+from historico_precos import HistoricoPrecos
+from fila_mensagens import FilaMensagens
+from fila_trabalho import abrir_fila_trabalho
+from pipeline_imagens import PipelineImagens
+from preparar_imagens import PreparadorImagens
+from resolver_links import ResolvedorLinks
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# site -> (script, classe do adaptador)
+SITES = {
+    "meli": ("1_scraper_meli.py", "AdaptadorMeli"),
+    "amazon": ("2_scraper_amazon.py", "AdaptadorAmazon"),
+    "shopee": ("3_scraper_shopee.py", "AdaptadorShopee"),
+    "llama-meli": ("4_scraper_llama_meli.py", "AdaptadorMeliLlama"),
+}
+
+def carregar_adaptador(site):
+    # Os scripts começam com número, então não dá para usar um import normal
+    script, classe = SITES[site]
+    spec = importlib.util.spec_from_file_location(f"scraper_{site.replace('-', '_')}", SCRIPTS_DIR / script)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return getattr(modulo, classe)()
+
+def parse_por_site(valores, conversor):
+    resultado = {}
+    for valor in valores or []:
+        site, _, bruto = valor.partition("=")
+        if site not in SITES or not bruto:
+            raise argparse.ArgumentTypeError(f"Valor inválido '{valor}'. Use site=valor, com site em {list(SITES)}")
+        try:
+            resultado[site] = conversor(bruto)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Valor inválido '{valor}'.")
+    return resultado
+
+def parse_intervalo(bruto):
+    minimo, _, maximo = bruto.partition(":")
+    return (float(minimo), float(maximo or minimo))
+
+def rodar_todos(sites=None, workers=None, intervalos=None, retomar=False,
+                limiar_queda=LIMIAR_QUEDA, filtrar_precos=True, janela_duplicados=JANELA_DUPLICADOS, publicar=False,
+                fila_trabalho=None):
+    sites = sites or list(SITES)
+    workers = workers or {}
+    intervalos = intervalos or {}
+    print(f"--- INICIANDO COLETA CONCORRENTE: {', '.join(sites)} ---")
+
+    adaptadores = []
+    for site in sites:
+        try:
+            adaptador = carregar_adaptador(site)
+        except ImportError as e:
+            print(f"  ⚠️ [{site}] Não foi possível carregar o scraper ({e}). Pulando.")
+            continue
+        if site in intervalos:
+            adaptador.intervalo = intervalos[site]
+        adaptadores.append(adaptador)
+
+    # Imagens e links curtos são compartilhados: um único cache em disco
+    pipeline = PipelineImagens(IMAGES_PATH)
+    # Um único pool de processos prepara as imagens de todos os sites para o WhatsApp
+    preparador = PreparadorImagens(IMAGES_PATH)
+    resolvedor = ResolvedorLinks(CACHE_PATH / "links_resolvidos.json")
+    historico = HistoricoPrecos(HISTORICO_PRECOS_PATH) if filtrar_precos or janela_duplicados > 0 else None
+    # Com publicar, o enviar_whatsapp.py --fila já recebe cada URL concluída
+    fila_mensagens = FilaMensagens(FILA_MENSAGENS_PATH) if publicar else None
+    # Com fila_trabalho (host:porta ou SQLite), os links são divididos com outras máquinas
+    trabalho = abrir_fila_trabalho(fila_trabalho) if fila_trabalho else None
+    parar = threading.Event()
+    resumos = {}
+
+    def rodar(adaptador):
+        try:
+            resumos[adaptador.nome] = executar_site(
+                adaptador, workers=workers.get(adaptador.nome), retomar=retomar,
+                pipeline=pipeline, resolvedor=resolvedor, parar=parar,
+                historico=historico, limiar_queda=limiar_queda, filtrar_precos=filtrar_precos,
+                preparador=preparador, janela_duplicados=janela_duplicados, fila_mensagens=fila_mensagens,
+                fila_trabalho=trabalho,
+            )
+        except Exception as e:
+            print(f"  ❌ [{adaptador.nome}] Erro GERAL: {e}")
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=rodar, args=(a,), name=f"site-{a.nome}") for a in adaptadores]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrompido. Esperando os sites terminarem a URL atual...")
+        parar.set()
+        for t in threads:
+            t.join()
+    pipeline.fechar()
+    preparador.fechar()
+    if historico is not None:
+        historico.fechar()
+    if fila_mensagens is not None:
+        fila_mensagens.fechar()
+    if trabalho is not None:
+        trabalho.fechar()
+    tempo_total = time.perf_counter() - inicio
+
+    print("\n--- RESUMO GERAL ---")
+    soma = 0.0
+    for site in sites:
+        resumo = resumos.get(site)
+        if not resumo:
+            print(f"  {site}: não executado")
+            continue
+        soma += resumo["tempo"]
+        duplicados = f" ({resumo['duplicados']} links duplicados pulados)" if resumo.get("duplicados") else ""
+        print(f"  {site}: {resumo['produtos']} produtos de {resumo['urls']} URLs em {resumo['tempo']:.1f}s{duplicados}")
+    print(f"  Tempo total: {tempo_total:.1f}s (em sequência seriam ~{soma:.1f}s)")
+    return resumos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roda todos os scrapers ao mesmo tempo")
+    parser.add_argument("--sites", nargs="+", choices=list(SITES), default=None,
+                        help="Sites a coletar (padrão: todos)")
+    parser.add_argument("--workers", nargs="*", metavar="SITE=N",
+                        help="Workers por site, ex.: meli=4 amazon=2")
+    parser.add_argument("--intervalo", nargs="*", metavar="SITE=MINIMO:INICIAL",
+                        help="Intervalo em segundos entre URLs do mesmo domínio: o limitador começa no inicial "
+                             "e acelera até o mínimo enquanto não houver bloqueio, ex.: shopee=2:5. Sites do mesmo "
+                             "domínio (meli e llama-meli) dividem o limitador, com o intervalo mais lento")
+    parser.add_argument("--resume", action="store_true",
+                        help="Pula as URLs que já estão nos journals da execução anterior")
+    parser.add_argument("--limiar-queda", type=float, default=LIMIAR_QUEDA,
+                        help=f"Queda mínima desde o último envio para reenviar um produto (padrão: {LIMIAR_QUEDA}, ou LIMIAR_QUEDA)")
+    parser.add_argument("--sem-filtro", action="store_true",
+                        help="Gera as mensagens de todos os produtos, sem consultar o histórico de preços")
+    parser.add_argument("--janela-duplicados", type=float, default=JANELA_DUPLICADOS, metavar="HORAS",
+                        help=f"Não coleta de novo um produto enviado há menos de HORAS (padrão: {JANELA_DUPLICADOS:g}, ou JANELA_DUPLICADOS; 0 desliga)")
+    parser.add_argument("--publicar", action="store_true",
+                        help="Publica cada produto na fila de envio durante a coleta (consumida por enviar_whatsapp.py --fila)")
+    parser.add_argument("--fila-trabalho", default=None, metavar="HOST:PORTA|SQLITE",
+                        help="Aluga as URLs da fila de trabalho compartilhada (fila_trabalho.py) em vez de ler input_links/")
+    parser.add_argument("--daemon", nargs="?", const=NAVEGADOR_DAEMON_PADRAO, default=None, metavar="HOST:PORTA",
+                        help=f"Usa as abas do navegador_daemon.py em vez de abrir um Chrome por worker (padrão: {NAVEGADOR_DAEMON_PADRAO})")
+    parser.add_argument("--sem-bloqueio", action="store_true",
+                        help="Não bloqueia imagens, fontes, vídeos e rastreadores no Chrome (ou BLOQUEAR_RECURSOS=0)")
+    args = parser.parse_args()
+    try:
+        workers = parse_por_site(args.workers, int)
+        intervalos = parse_por_site(args.intervalo, parse_intervalo)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    if args.sem_bloqueio:
+        usar_bloqueio(False)
+    if args.daemon:
+        usar_daemon(args.daemon)
+    rodar_todos(
+        sites=args.sites,
+        workers=workers,
+        intervalos=intervalos,
+        retomar=args.resume,
+        limiar_queda=args.limiar_queda,
+        filtrar_precos=not args.sem_filtro,
+        janela_duplicados=args.janela_duplicados,
+        publicar=args.publicar,
+        fila_trabalho=args.fila_trabalho,
+    )
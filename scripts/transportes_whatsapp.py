@@ -0,0 +1,237 @@
+# Arquivo: scripts/transportes_whatsapp.py
+# Transportes usados pela fila de envio (fila_envio.py). Todos têm a mesma
+# interface:
+#   abrir()                                   -> prepara a conversa do grupo
+#   enviar(mensagem, imagem_path, dib_path)   -> só retorna quando a mensagem saiu;
+#                                                levanta FalhaEnvio se não saiu
+#   fechar()
+#
+#   - TransporteWhatsAppWeb: Selenium no WhatsApp Web, texto inserido via
+#     CDP e entrega confirmada pelo ícone de status da mensagem no DOM
+#   - TransporteAutomacaoTeclado: o jeito antigo (atalhos de teclado e
+#     área de transferência do Windows, com esperas fixas)
+#   - TransporteMemoria: não envia nada; serve para medir a vazão da fila
+
+import os
+import io
+import time
+import random
+from PIL import Image
+
+# O Selenium (e o core_scraper, que o importa) só é importado dentro do
+# TransporteWhatsAppWeb: memoria e teclado rodam sem ele instalado
+
+WHATSAPP_URL = "https://web.whatsapp.com"
+
+class FalhaEnvio(Exception):
+    """A mensagem não foi enviada."""
+    incerto = False
+
+class EnvioIncerto(FalhaEnvio):
+    """A mensagem pode ter saído sem a confirmação aparecer: não reenviar."""
+    incerto = True
+
+class Transporte:
+    nome = "base"
+
+    def abrir(self):
+        pass
+
+    def enviar(self, mensagem, imagem_path=None, dib_path=None):
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+# -------------------------------------------------------------------
+# Memória: guarda o que seria enviado, com latência e falhas simuladas
+# -------------------------------------------------------------------
+class TransporteMemoria(Transporte):
+    nome = "memoria"
+
+    def __init__(self, latencia=0.0, taxa_falha=0.0):
+        self.latencia = latencia
+        self.taxa_falha = taxa_falha
+        self.enviadas = []
+
+    def enviar(self, mensagem, imagem_path=None, dib_path=None):
+        if self.latencia:
+            time.sleep(self.latencia)
+        if random.random() < self.taxa_falha:
+            raise FalhaEnvio("falha simulada")
+        self.enviadas.append({"mensagem": mensagem, "imagem": imagem_path, "dib": dib_path})
+
+# -------------------------------------------------------------------
+# WhatsApp Web via Selenium
+# -------------------------------------------------------------------
+SELETOR_BUSCA = 'div[contenteditable="true"][data-tab="3"]'
+SELETOR_CAIXA_TEXTO = 'footer div[contenteditable="true"]'
+SELETOR_ANEXAR = 'span[data-icon="plus"], span[data-icon="attach-menu-plus"], span[data-icon="clip"]'
+SELETOR_INPUT_IMAGEM = 'input[type="file"][accept*="image"]'
+SELETOR_LEGENDA = 'div[contenteditable="true"][aria-label]:not(footer *)'
+SELETOR_ENVIAR_MIDIA = 'span[data-icon="send"], span[data-icon="wds-ic-send-filled"]'
+SELETOR_MENSAGEM_SAIDA = "div.message-out"
+# Relógio = ainda na fila do navegador; check = o servidor recebeu
+ICONES_ENTREGUE = ("msg-check", "msg-dblcheck", "msg-dblcheck-ack")
+
+JS_ESTADO_ULTIMA = """
+    const msgs = document.querySelectorAll(arguments[0]);
+    if (!msgs.length) return [0, null];
+    const icone = msgs[msgs.length - 1].querySelector('span[data-icon^="msg-"]');
+    return [msgs.length, icone ? icone.getAttribute('data-icon') : null];
+"""
+
+class TransporteWhatsAppWeb(Transporte):
+    nome = "web"
+
+    def __init__(self, grupo, perfil=None, timeout_login=120, timeout_envio=30):
+        """`perfil`: pasta do perfil próprio do Chrome, onde o login (QR code)
+        fica salvo entre execuções (padrão: output/cache/chrome_whatsapp)."""
+        self.grupo = grupo
+        self.perfil = perfil
+        self.timeout_login = timeout_login
+        self.timeout_envio = timeout_envio
+        self.driver = None
+
+    def abrir(self):
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from core_scraper import CACHE_PATH, CHROMEDRIVER_PATH, criar_chrome_options
+
+        options = criar_chrome_options(headless=False)
+        options.add_argument(f"--user-data-dir={self.perfil or CACHE_PATH / 'chrome_whatsapp'}")
+        self.driver = webdriver.Chrome(service=Service(executable_path=str(CHROMEDRIVER_PATH)), options=options)
+        self.driver.get(WHATSAPP_URL)
+
+        print("Aguardando o WhatsApp Web carregar (escaneie o QR code se for o primeiro uso)...")
+        busca = WebDriverWait(self.driver, self.timeout_login).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, SELETOR_BUSCA)))
+
+        print(f"Buscando o grupo '{self.grupo}'...")
+        busca.click()
+        self._inserir_texto(self.grupo)
+        grupo = WebDriverWait(self.driver, 15).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, f'span[title="{self.grupo}"]')))
+        grupo.click()
+        WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, SELETOR_CAIXA_TEXTO)))
+
+    def _inserir_texto(self, texto):
+        # Via CDP o texto entra inteiro, com emojis (o send_keys do chromedriver
+        # não aceita caracteres fora do BMP) e com as quebras de linha
+        from selenium.webdriver.common.keys import Keys
+        linhas = texto.split("\n")
+        for i, linha in enumerate(linhas):
+            if linha:
+                self.driver.execute_cdp_cmd("Input.insertText", {"text": linha})
+            if i < len(linhas) - 1:
+                self.driver.switch_to.active_element.send_keys(Keys.SHIFT, Keys.ENTER)
+
+    def _estado_ultima(self):
+        return self.driver.execute_script(JS_ESTADO_ULTIMA, SELETOR_MENSAGEM_SAIDA)
+
+    def _entregue(self, total_antes):
+        total, icone = self._estado_ultima()
+        return total > total_antes and icone in ICONES_ENTREGUE
+
+    def enviar(self, mensagem, imagem_path=None, dib_path=None):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        driver = self.driver
+        total_antes, _ = self._estado_ultima()
+
+        if imagem_path:
+            driver.find_element(By.CSS_SELECTOR, SELETOR_ANEXAR).click()
+            driver.find_element(By.CSS_SELECTOR, SELETOR_INPUT_IMAGEM).send_keys(os.path.abspath(imagem_path))
+            legenda = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, SELETOR_LEGENDA)))
+            legenda.click()
+            self._inserir_texto(mensagem)
+            driver.find_element(By.CSS_SELECTOR, SELETOR_ENVIAR_MIDIA).click()
+        else:
+            driver.find_element(By.CSS_SELECTOR, SELETOR_CAIXA_TEXTO).click()
+            self._inserir_texto(mensagem)
+            driver.switch_to.active_element.send_keys(Keys.ENTER)
+
+        # Entregue = uma mensagem nova de saída com o ícone de check, sem esperas fixas
+        try:
+            WebDriverWait(driver, self.timeout_envio, poll_frequency=0.2).until(
+                lambda d: self._entregue(total_antes))
+        except TimeoutException:
+            total, icone = self._estado_ultima()
+            raise EnvioIncerto(f"sem confirmação em {self.timeout_envio}s (mensagens: {total}, status: {icone})")
+
+    def fechar(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+# -------------------------------------------------------------------
+# Teclado + área de transferência do Windows (o envio original)
+# -------------------------------------------------------------------
+def ler_dib(imagem_path, dib_path=None):
+    # O DIB já vem pronto da coleta (preparar_imagens.py): basta ler o arquivo
+    if dib_path and os.path.exists(dib_path):
+        with open(dib_path, "rb") as f:
+            return f.read()
+    image = Image.open(imagem_path)
+    output = io.BytesIO()
+    image.convert("RGB").save(output, "BMP")
+    data = output.getvalue()[14:]  # remove cabeçalho BMP
+    output.close()
+    return data
+
+class TransporteAutomacaoTeclado(Transporte):
+    nome = "teclado"
+
+    def __init__(self, grupo, chrome_path, profile_name="Default", espera_inicial=15):
+        self.grupo = grupo
+        self.chrome_path = chrome_path
+        self.profile_name = profile_name
+        self.espera_inicial = espera_inicial
+
+    def abrir(self):
+        # Só funcionam no Windows, com a janela do Chrome em primeiro plano
+        import subprocess
+        import win32clipboard
+        import pyautogui_locate
+        self.win32clipboard, self.teclado = win32clipboard, pyautogui_locate
+
+        print("Abrindo o WhatsApp Web...")
+        subprocess.Popen([self.chrome_path, f"--profile-directory={self.profile_name}", WHATSAPP_URL])
+        print(f"Aguardando {self.espera_inicial} segundos para o WhatsApp carregar...")
+        time.sleep(self.espera_inicial)
+
+        print(f"Buscando o grupo '{self.grupo}'...")
+        self.teclado.hotkey("ctrl", "alt", "/")
+        time.sleep(1)
+        self.teclado.typewrite(self.grupo)
+        time.sleep(2)
+        self.teclado.press("enter")
+        time.sleep(2)
+
+    def _copiar(self, formato, dados):
+        clip = self.win32clipboard
+        clip.OpenClipboard()
+        try:
+            clip.EmptyClipboard()
+            clip.SetClipboardData(formato, dados)
+        finally:
+            clip.CloseClipboard()
+
+    def enviar(self, mensagem, imagem_path=None, dib_path=None):
+        # Sem como confirmar a entrega: as esperas fixas continuam aqui
+        if imagem_path:
+            self._copiar(self.win32clipboard.CF_DIB, ler_dib(imagem_path, dib_path))
+            self.teclado.hotkey("ctrl", "v")
+            time.sleep(3)
+        self._copiar(self.win32clipboard.CF_UNICODETEXT, mensagem)
+        self.teclado.hotkey("ctrl", "v")
+        time.sleep(1)
+        self.teclado.press("enter")
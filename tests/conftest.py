@@ -0,0 +1,6 @@
+# Arquivo: tests/conftest.py
+# Os módulos ficam em scripts/ e se importam pelo nome (como nos scripts)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,33 @@
+# Arquivo: tests/test_bloqueio_recursos.py
+from fnmatch import fnmatchcase
+
+import pytest
+
+# Os padrões ficam no core_scraper, que importa o Selenium
+pytest.importorskip("selenium")
+
+from core_scraper import AdaptadorSite
+
+def bloqueada(padroes, url):
+    # O "*" do Network.setBlockedURLs casa com qualquer sequência, como no fnmatch
+    return any(fnmatchcase(url, p) for p in padroes)
+
+@pytest.mark.parametrize("url, bloqueia", [
+    ("https://http2.mlstatic.com/D_NQ_NP_2X_123-O.webp", True),
+    ("https://m.media-amazon.com/images/I/71abc.jpg?v=2", True),
+    ("https://down-br.img.susercontent.com/file/x.png?imageView2&w=200", True),
+    ("https://fonts.gstatic.com/s/roboto/v30/font.woff2?display=swap", True),
+    ("https://www.googletagmanager.com/gtm.js?id=GTM-1", True),
+    ("https://www.mercadolivre.com.br/ofertas?page=2", False),
+    ("https://shopee.com.br/api/v4/search/search_items?by=relevancy", False),
+])
+def test_padroes_pegam_urls_com_query_string(url, bloqueia):
+    assert bloqueada(AdaptadorSite().padroes_bloqueio(), url) is bloqueia
+
+def test_permitir_libera_tambem_a_variante_com_query_string():
+    class Adaptador(AdaptadorSite):
+        permitir = ("*.png",)
+
+    padroes = Adaptador().padroes_bloqueio()
+    assert not bloqueada(padroes, "https://site.com/logo.png?v=3")
+    assert bloqueada(padroes, "https://site.com/foto.jpg?v=3")
@@ -0,0 +1,76 @@
+# Arquivo: tests/test_cliente_llama.py
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+pytest.importorskip("ollama")
+
+import metricas
+from cliente_llama import ClienteLlama
+
+@pytest.fixture
+def ollama_falso():
+    """Servidor que imita o /api/chat do Ollama e conta as chamadas."""
+    chamadas = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            chamadas.append(pedido)
+            conteudo = "Claro! " + json.dumps({"nome": "Fone", "preco": "R$ 99,90", "preco_original": None})
+            corpo = json.dumps({"model": pedido["model"], "done": True,
+                                "message": {"role": "assistant", "content": conteudo}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}", chamadas
+    servidor.shutdown()
+
+@pytest.fixture(autouse=True)
+def sem_metricas(monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS_ATIVAS", False)
+
+def criar_cliente(tmp_path, host, versao=1):
+    return ClienteLlama(tmp_path / "llama", lambda html: f"Extraia: {html}", versao, host=host)
+
+def test_mesmo_html_vem_do_cache(tmp_path, ollama_falso):
+    host, chamadas = ollama_falso
+    with criar_cliente(tmp_path, host) as cliente:
+        primeira = cliente.extrair("<h1>Fone</h1>")
+        segunda = cliente.extrair("<h1>Fone</h1>")
+        assert primeira == segunda == {"nome": "Fone", "preco": "R$ 99,90", "preco_original": None}
+        assert len(chamadas) == 1
+        assert chamadas[0]["messages"][0]["content"] == "Extraia: <h1>Fone</h1>"
+        assert (cliente.stats["chamadas"], cliente.stats["cache"]) == (1, 1)
+
+    # O cache fica em disco: outro cliente com o mesmo prompt não chama o modelo
+    with criar_cliente(tmp_path, host) as cliente:
+        assert cliente.extrair("<h1>Fone</h1>")["nome"] == "Fone"
+    assert len(chamadas) == 1
+
+def test_html_ou_versao_do_prompt_diferentes_chamam_o_modelo(tmp_path, ollama_falso):
+    host, chamadas = ollama_falso
+    with criar_cliente(tmp_path, host) as cliente:
+        cliente.extrair("<h1>Fone</h1>")
+        cliente.extrair("<h1>Mouse</h1>")
+    with criar_cliente(tmp_path, host, versao=2) as cliente:
+        cliente.extrair("<h1>Fone</h1>")
+    assert len(chamadas) == 3
+
+def test_falha_do_servidor_nao_vai_para_o_cache(tmp_path):
+    # Porta sem servidor: a chamada falha e a próxima tenta de novo
+    with criar_cliente(tmp_path, "http://127.0.0.1:9") as cliente:
+        assert cliente.extrair("<h1>Fone</h1>") is None
+        assert cliente.extrair("<h1>Fone</h1>") is None
+        assert (cliente.stats["falhas"], cliente.stats["cache"]) == (2, 0)
+    assert not list((tmp_path / "llama").iterdir())
@@ -0,0 +1,39 @@
+# Arquivo: tests/test_dados_estruturados.py
+import json
+
+from bs4 import BeautifulSoup
+from dados_estruturados import percorrer_json, extrair_estado_meli, produto_json_ld
+
+def pagina_meli(estado):
+    return BeautifulSoup(
+        f'<script id="__PRELOADED_STATE__" type="application/json">{json.dumps(estado)}</script>', "html.parser"
+    )
+
+def test_percorrer_json_segue_a_ordem_do_documento():
+    obj = {"a": {"n": 1}, "b": [{"n": 2}, {"n": 3}], "c": {"n": 4}}
+    assert [d["n"] for d in percorrer_json(obj) if "n" in d] == [1, 2, 3, 4]
+
+def test_estado_meli_usa_o_preco_do_produto_e_nao_o_das_recomendacoes():
+    estado = {"initialState": {
+        "components": {
+            "header": {"id": "header", "title": "Produto"},
+            "price": {"id": "price", "price": {"value": 100, "original_value": 150}},
+        },
+        "recommendations": [
+            {"id": "carousel", "items": [{"price": {"value": 5, "original_value": 9}}]},
+        ],
+    }}
+    dados = extrair_estado_meli(pagina_meli(estado))
+    assert dados["nome"] == "Produto"
+    assert (dados["preco"], dados["preco_original"]) == ("R$100,00", "R$150,00")
+
+def test_estado_meli_sem_components_pega_o_primeiro_preco():
+    estado = {"produto": {"value": 100, "original_value": 150},
+              "recomendacao": {"value": 5, "original_value": 9}}
+    dados = extrair_estado_meli(pagina_meli(estado))
+    assert (dados["preco"], dados["preco_original"]) == ("R$100,00", "R$150,00")
+
+def test_json_ld_pega_o_primeiro_produto():
+    blocos = {"@graph": [{"@type": "Product", "name": "Principal"}, {"@type": "Product", "name": "Relacionado"}]}
+    soup = BeautifulSoup(f'<script type="application/ld+json">{json.dumps(blocos)}</script>', "html.parser")
+    assert produto_json_ld(soup)["name"] == "Principal"
@@ -0,0 +1,69 @@
+# Arquivo: tests/test_fila_mensagens.py
+import threading
+
+from fila_mensagens import FilaMensagens
+
+def registro(produto_id, preco, mensagem=None):
+    return {"produto_id": produto_id, "preco_valor": preco, "mensagem": mensagem or f"{produto_id} por {preco}"}
+
+def test_reservar_em_ordem_e_sem_repetir(tmp_path):
+    with FilaMensagens(tmp_path / "fila.sqlite3") as fila:
+        assert fila.publicar("meli", [registro("meli:MLB1", 10.0), registro("meli:MLB2", 20.0),
+                                      {"produto_id": "meli:MLB3", "mensagem": None}]) == 2
+        # Mesmo produto e preço não entra de novo; outro preço entra
+        assert fila.publicar("meli", [registro("meli:MLB1", 10.0), registro("meli:MLB1", 9.0)]) == 1
+        primeiro = fila.reservar()
+        assert (primeiro["produto_id"], primeiro["_fila_id"]) == ("meli:MLB1", 1)
+        assert fila.contar() == {"enviando": 1, "pendente": 2}
+        assert fila.reservar()["produto_id"] == "meli:MLB2"
+        assert fila.reservar()["preco_valor"] == 9.0
+        assert fila.reservar() is None
+
+def test_consumidores_concorrentes_nao_pegam_a_mesma_mensagem(tmp_path):
+    with FilaMensagens(tmp_path / "fila.sqlite3") as fila:
+        fila.publicar("meli", [registro(f"meli:MLB{i}", 10.0) for i in range(50)])
+        reservados = []
+
+        def consumir():
+            while (item := fila.reservar()) is not None:
+                reservados.append(item["_fila_id"])
+
+        threads = [threading.Thread(target=consumir) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(reservados) == list(range(1, 51))
+
+def test_recuperar_incertos(tmp_path):
+    with FilaMensagens(tmp_path / "fila.sqlite3") as fila:
+        fila.publicar("meli", [registro("meli:MLB1", 10.0), registro("meli:MLB2", 20.0), registro("meli:MLB3", 30.0)])
+        fila.concluir(fila.reservar()["_fila_id"], enviado=True)
+        fila.concluir(fila.reservar()["_fila_id"], enviado=None)
+        fila.reservar()  # envio interrompido: fica em "enviando"
+
+        # Sem reenviar, a interrompida vira incerta e nada volta à fila
+        assert fila.recuperar_incertos() == 1
+        assert fila.contar() == {"enviado": 1, "incerto": 2}
+        assert fila.reservar() is None
+        # Com reenviar, as incertas voltam; a enviada, não
+        assert fila.recuperar_incertos(reenviar=True) == 2
+        assert [fila.reservar()["produto_id"] for _ in range(2)] == ["meli:MLB2", "meli:MLB3"]
+
+def test_falha_volta_a_fila(tmp_path):
+    with FilaMensagens(tmp_path / "fila.sqlite3") as fila:
+        fila.publicar("meli", [registro("meli:MLB1", 10.0), registro("meli:MLB2", 20.0)])
+        fila.concluir(fila.reservar()["_fila_id"], enviado=False)
+        fila.concluir(fila.reservar()["_fila_id"], enviado=True)
+
+        # Publicada de novo pelo scraper, a que falhou volta com o registro novo;
+        # a enviada continua ignorada
+        novos = [registro("meli:MLB1", 10.0, "Fone por R$ 10"), registro("meli:MLB2", 20.0)]
+        assert fila.publicar("meli", novos) == 1
+        item = fila.reservar()
+        assert (item["_fila_id"], item["mensagem"]) == (1, "Fone por R$ 10")
+
+        fila.concluir(item["_fila_id"], enviado=False)
+        assert fila.reenviar_falhas() == 1
+        assert fila.reservar()["_fila_id"] == 1
+        assert fila.reenviar_falhas() == 0
@@ -0,0 +1,73 @@
+# Arquivo: tests/test_fila_trabalho.py
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from fila_trabalho import FilaTrabalho, criar_servidor, interface_local
+
+URLS = ["https://produto.mercadolivre.com.br/MLB-1-a", "https://produto.mercadolivre.com.br/MLB-2-b"]
+
+@pytest.fixture
+def fila(tmp_path):
+    fila = FilaTrabalho(tmp_path / "fila.sqlite3", max_tentativas=2, atraso_falha=0)
+    fila.carregar(site="meli", urls=URLS)
+    yield fila
+    fila.fechar()
+
+def test_aluguel_valido_nao_e_dividido(fila):
+    tarefas = fila.alugar(site="meli", dono="a", quantidade=1, duracao=60)
+    assert [(t["url"], t["tentativas"]) for t in tarefas] == [(URLS[0], 1)]
+    # Outra máquina pega a próxima URL, nunca a que está alugada
+    assert [t["url"] for t in fila.alugar(site="meli", dono="b", quantidade=5, duracao=60)] == [URLS[1]]
+    assert fila.alugar(site="meli", dono="c", duracao=60) == []
+    assert fila.contar() == {"meli": {"alugada": 2}}
+
+def test_aluguel_vencido_volta_e_conclusao_atrasada_e_recusada(fila):
+    antiga = fila.alugar(site="meli", dono="a", duracao=0.05)[0]
+    time.sleep(0.1)
+    nova = fila.alugar(site="meli", dono="b", duracao=60)[0]
+    assert (nova["id"], nova["tentativas"]) == (antiga["id"], 2)
+    # O dono antigo não conclui nem renova o que já foi realugado
+    assert fila.renovar(ids=[antiga["id"]], dono="a", duracao=60) == []
+    assert fila.concluir(tarefa_id=antiga["id"], dono="a", registros=[{"nome": "velho"}]) is False
+    assert fila.concluir(tarefa_id=nova["id"], dono="b", registros=[{"nome": "Fone"}]) is True
+    assert fila.resultados(site="meli") == [{"nome": "Fone"}]
+
+def test_renovar_mantem_o_aluguel(fila):
+    tarefa = fila.alugar(site="meli", dono="a", duracao=0.05)[0]
+    assert fila.renovar(ids=[tarefa["id"]], dono="a", duracao=60) == [tarefa["id"]]
+    time.sleep(0.1)
+    assert [t["url"] for t in fila.alugar(site="meli", dono="b", quantidade=5, duracao=60)] == [URLS[1]]
+    assert fila.concluir(tarefa_id=tarefa["id"], dono="a") is True
+
+def test_falha_devolve_a_url_ate_esgotar_as_tentativas(fila):
+    tarefa = fila.alugar(site="meli", dono="a", duracao=60)[0]
+    assert fila.falhar(tarefa_id=tarefa["id"], dono="b", erro="x") is False
+    assert fila.falhar(tarefa_id=tarefa["id"], dono="a", erro="bloqueio") is True
+    # A URL que falhou com "a" vai para o fim da fila dele
+    assert [t["url"] for t in fila.alugar(site="meli", dono="a", duracao=60)] == [URLS[1]]
+    assert [t["url"] for t in fila.alugar(site="meli", dono="a", duracao=60)] == [URLS[0]]
+    assert fila.falhar(tarefa_id=tarefa["id"], dono="a", erro="bloqueio") is True
+    assert fila.contar(site="meli") == {"meli": {"alugada": 1, "falhou": 1}}
+    assert fila.alugar(site="meli", dono="b", quantidade=2, duracao=60) == []
+    # Carregar de novo devolve a URL que falhou à fila
+    assert fila.carregar(site="meli", urls=URLS) == 1
+
+def test_falha_espera_o_atraso(tmp_path):
+    fila = FilaTrabalho(tmp_path / "fila.sqlite3", max_tentativas=3, atraso_falha=60)
+    fila.carregar(site="meli", urls=URLS[:1])
+    tarefa = fila.alugar(site="meli", dono="a", duracao=60)[0]
+    fila.falhar(tarefa_id=tarefa["id"], dono="a")
+    assert fila.alugar(site="meli", dono="b", duracao=60) == []
+    assert fila.contar() == {"meli": {"pendente": 1}}
+    fila.fechar()
+
+def test_servidor_sem_token_so_na_propria_maquina(fila):
+    assert interface_local("127.0.0.1") and interface_local("localhost") and interface_local("::1")
+    assert not interface_local("0.0.0.0") and not interface_local("192.168.0.10")
+    with pytest.raises(ValueError):
+        criar_servidor(fila, "0.0.0.0", 0, token="")
+    servidor = criar_servidor(fila, "127.0.0.1", 0, token="")
+    servidor.server_close()
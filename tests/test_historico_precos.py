@@ -0,0 +1,31 @@
+# Arquivo: tests/test_historico_precos.py
+import time
+
+from historico_precos import HistoricoPrecos, identificar_produto
+
+def registro(produto_id, preco):
+    return {"produto_id": produto_id, "preco_valor": preco, "mensagem": produto_id}
+
+def test_identificar_produto():
+    assert identificar_produto("https://produto.mercadolivre.com.br/MLB-1234567-fone") == "meli:MLB1234567"
+    assert identificar_produto("https://www.amazon.com.br/dp/B0ABC12345?tag=x") == "amazon:B0ABC12345"
+    assert identificar_produto("https://shopee.com.br/Fone-i.401.225") == "shopee:401.225"
+    assert identificar_produto("https://shopee.com.br/flash_sale") is None
+
+def test_janela_conta_so_produtos_enviados(tmp_path):
+    with HistoricoPrecos(tmp_path / "h.sqlite3") as historico:
+        # Coletado e não enviado: pode ser coletado de novo
+        historico.registrar_observacoes("meli", [registro("meli:MLB1", 10.0), registro("meli:MLB2", 20.0)])
+        historico.registrar_envio("meli:MLB2", 20.0)
+        desde = time.time() - 3600
+        assert historico.enviados_desde(["meli:MLB1", "meli:MLB2"], desde) == {"meli:MLB2"}
+        assert historico.enviados_desde(["meli:MLB2"], time.time() + 1) == set()
+
+def test_filtrar_quedas(tmp_path):
+    with HistoricoPrecos(tmp_path / "h.sqlite3") as historico:
+        historico.registrar_envio("meli:MLB1", 100.0)
+        historico.registrar_envio("meli:MLB2", 100.0)
+        registros = [registro("meli:MLB1", 99.0), registro("meli:MLB2", 90.0), registro("meli:MLB3", 50.0),
+                     registro(None, 10.0)]
+        mantidos = historico.filtrar_quedas("meli", registros, limiar=0.05)
+        assert [r["produto_id"] for r in mantidos] == ["meli:MLB2", "meli:MLB3", None]
@@ -0,0 +1,33 @@
+# Arquivo: tests/test_journal_saida.py
+import json
+
+from journal_saida import JournalSaida
+
+def coletar(saida, urls, retomar=False):
+    journal = JournalSaida(saida, retomar=retomar)
+    for url in urls:
+        journal.gravar(url, {"produto_id": url, "mensagem": url})
+        journal.concluir(url)
+    return journal
+
+def test_resume_pula_urls_concluidas(tmp_path):
+    saida = tmp_path / "mensagens.json"
+    journal = coletar(saida, ["a"])
+    journal.gravar("b", {"produto_id": "b", "mensagem": "b"})  # interrompida antes de concluir
+    journal.arquivo.close()
+    retomado = JournalSaida(saida, retomar=True)
+    assert retomado.ja_processado("a") and not retomado.ja_processado("b")
+    assert [r["produto_id"] for r in retomado.compactar(["a", "b"])] == ["a"]
+
+def test_resultado_vazio_mantem_o_json_anterior(tmp_path):
+    saida = tmp_path / "mensagens.json"
+    coletar(saida, ["a", "b"]).compactar(["a", "b"])
+
+    # Execução em que todos os produtos foram pulados: só fica o que o filtro deixar
+    manter = lambda anteriores: [r for r in anteriores if r["produto_id"] != "a"]
+    assert [r["produto_id"] for r in coletar(saida, []).compactar([], manter_anterior=manter)] == ["b"]
+    assert [r["produto_id"] for r in json.loads(saida.read_text(encoding="utf-8"))] == ["b"]
+
+    # Sem manter_anterior, o JSON vazio substitui o anterior
+    coletar(saida, []).compactar([])
+    assert json.loads(saida.read_text(encoding="utf-8")) == []
@@ -0,0 +1,46 @@
+# Arquivo: tests/test_limitador_taxa.py
+import time
+
+import pytest
+
+# O limitador fica no core_scraper, que importa o Selenium
+pytest.importorskip("selenium")
+
+import core_scraper
+from core_scraper import LimitadorTaxa, limitador_do_dominio
+
+def test_token_bucket_espera_o_intervalo():
+    limitador = LimitadorTaxa((0.05, 0.1))
+    assert limitador.aguardar() < 0.05
+    # Sem tokens, a próxima liberação espera o intervalo atual (mais o jitter)
+    assert 0.08 <= limitador.aguardar() < 0.3
+    assert limitador.stats["liberados"] == 2
+
+def test_acelera_ate_o_minimo_e_recua_no_bloqueio():
+    limitador = LimitadorTaxa((1, 2), fator_acelerar=0.5, fator_recuar=3, teto=5)
+    limitador.sucesso()
+    assert limitador.atual == 1
+    limitador.sucesso()
+    assert limitador.atual == 1
+    assert limitador.bloqueio() == 3
+    assert limitador.tokens == 0 and limitador.pausa_ate > time.monotonic()
+    assert limitador.bloqueio() == 5
+    assert limitador.stats["bloqueios"] == 2
+
+def test_dominio_compartilhado_usa_o_intervalo_mais_lento(monkeypatch, capsys):
+    monkeypatch.setattr(core_scraper, "_limitadores", {})
+    monkeypatch.setattr(core_scraper, "_conflitos_intervalo", set())
+    meli = limitador_do_dominio("mercadolivre.com.br", (1, 3))
+    # Outro site no mesmo domínio com intervalo mais lento: o limitador fica mais lento
+    llama = limitador_do_dominio("mercadolivre.com.br", (2, 8))
+    assert llama is meli
+    assert (meli.minimo, meli.maximo, meli.atual) == (2, 8, 8)
+    # Um intervalo mais rápido não afrouxa o limitador
+    limitador_do_dominio("mercadolivre.com.br", (1, 3))
+    assert (meli.minimo, meli.maximo) == (2, 8)
+    avisos = [linha for linha in capsys.readouterr().out.splitlines() if "intervalos diferentes" in linha]
+    assert len(avisos) == 2
+    # O aviso sai uma vez por intervalo, não a cada URL
+    limitador_do_dominio("mercadolivre.com.br", (1, 3))
+    assert "intervalos diferentes" not in capsys.readouterr().out
+    assert limitador_do_dominio("amazon.com.br", (1, 3)) is not meli
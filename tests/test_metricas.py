@@ -0,0 +1,36 @@
+# Arquivo: tests/test_metricas.py
+import json
+
+import pytest
+
+import metricas
+
+@pytest.fixture(autouse=True)
+def metricas_em_pasta_temporaria(monkeypatch, tmp_path):
+    monkeypatch.setattr(metricas, "METRICAS_ATIVAS", True)
+    monkeypatch.setattr(metricas, "METRICAS_PATH", tmp_path)
+    monkeypatch.setattr(metricas, "_duracoes", {})
+    yield
+    metricas.fechar()
+
+def test_percentis_por_etapa_do_site(tmp_path):
+    with metricas.contexto(site="meli"):
+        for ms in range(1, 101):
+            metricas.registrar("navegar", ms / 1000)
+        metricas.registrar("imagem", 0.5, resultado="http404")
+    metricas.registrar("navegar", 9.0, site="amazon")
+
+    assert metricas.percentis("meli") == {
+        "imagem": {"n": 1, "p50_s": 0.5, "p95_s": 0.5, "max_s": 0.5},
+        "navegar": {"n": 100, "p50_s": 0.051, "p95_s": 0.095, "max_s": 0.1},
+    }
+    assert metricas.percentis("amazon")["navegar"]["n"] == 1
+    metricas.limpar("meli")
+    assert metricas.percentis("meli") == {}
+    assert metricas.percentis("amazon")["navegar"]["n"] == 1
+
+    # O JSONL continua com todos os spans
+    metricas.fechar()
+    linhas = [json.loads(l) for f in tmp_path.glob("*.jsonl") for l in f.read_text(encoding="utf-8").splitlines()]
+    assert len(linhas) == 102
+    assert linhas[-1] == {**linhas[-1], "etapa": "navegar", "site": "amazon", "ms": 9000.0}
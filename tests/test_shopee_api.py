@@ -0,0 +1,44 @@
+# Arquivo: tests/test_shopee_api.py
+import re
+import json
+import importlib
+from pathlib import Path
+
+import pytest
+
+# O scraper da Shopee importa o Selenium
+pytest.importorskip("selenium")
+
+# O nome do script começa com número: sem import normal
+shopee = importlib.import_module("3_scraper_shopee")
+
+# Respostas gravadas do modo XHR (flash sale e busca, com item_basic aninhado)
+RESPOSTAS = json.loads((Path(__file__).parent / "dados" / "shopee_api.json").read_text(encoding="utf-8"))
+URL_BASE = "https://shopee.com.br/flash_sale"
+
+def test_itens_das_respostas_gravadas():
+    itens = list(shopee.itens_das_respostas(RESPOSTAS, URL_BASE))
+    assert [(i["nome"], i["preco"], i["preco_original"]) for i in itens] == [
+        ("Fone de Ouvido Bluetooth TWS com Estojo de Carga", "R$39,90", "R$89,90"),
+        ("Garrafa Térmica Inox 1L", "R$45,90", None),
+        ("Kit 3 Camisetas Básicas Algodão", "R$59,90", None),
+    ]
+    assert itens[0]["link"] == "https://shopee.com.br/product/401338712/22593817461"
+    assert itens[0]["img_url"] == "https://down-br.img.susercontent.com/file/br-11134207-7r98o-lz3k5a1b2c3d4e"
+    # Imagem que já vem com URL completa não é reescrita
+    assert itens[1]["img_url"].startswith("https://down-br.img.susercontent.com/file/sg-")
+
+def test_item_sem_preco_valido_fica_de_fora():
+    assert shopee.item_da_api({"itemid": 1, "shopid": 2, "name": "X", "price": -1}, URL_BASE) is None
+    assert shopee.item_da_api({"itemid": 1, "shopid": 2, "name": "", "price": 3990000}, URL_BASE) is None
+
+@pytest.mark.parametrize("url, casa", [
+    ("https://shopee.com.br/api/v4/flash_sale/flash_sale_batch_get_items", True),
+    ("https://shopee.com.br/api/v4/search/search_items?by=relevancy&limit=60", True),
+    ("https://shopee.com.br/api/v4/recommend/recommend?bundle=daily_discover_main", True),
+    ("https://shopee.com.br/api/v4/flash_sale/get_all_itemids", False),
+    ("https://shopee.com.br/api/v4/product/get_shop_info?shopid=1", False),
+    ("https://shopee.com.br/api/v4/account/basic/get_account_info", False),
+])
+def test_padrao_api_so_pega_as_listas_de_ofertas(url, casa):
+    assert bool(re.search(shopee.PADRAO_API_PADRAO, url)) is casa